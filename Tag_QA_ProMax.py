@@ -1,23 +1,174 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import csv
 import asyncio
-from playwright.async_api import async_playwright
+import bisect
+from array import array
 import threading
 import os
 import shutil
+import gzip
+import hashlib
+import html
+import http.server
+import importlib
+import io
 import json
+import multiprocessing
+import queue
 import tempfile
+import traceback
+import zipfile
+import zlib
 from datetime import datetime
-from collections import deque
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 import time
+_PROCESS_START = time.perf_counter() # Start of module import, for the startup benchmark
 import sys
+import urllib.request
 from pathlib import Path
-from PIL import Image, ImageGrab, ImageDraw, ImageFont
-from openpyxl import Workbook
-from openpyxl.drawing.image import Image as OpenpyxlImage
+from urllib.parse import quote, urlsplit, urlunsplit
+from xml.etree import ElementTree
+# Playwright, PIL and openpyxl are imported where they are used: none of them
+# is needed to show the window, and together they dominate cold-start time.
+# They are pre-imported in the background once the window is up.
+
+STARTUP_BENCHMARK_ENV = "TAG_QA_STARTUP_BENCHMARK" # "cold" or "warm"; see functions/startup_benchmark.py
+METRICS_PORT_ENV = "TAG_QA_METRICS_PORT" # Port of the local /metrics endpoint; 0 disables it
+PREWARM_MODULES = ("PIL.Image", "PIL.ImageDraw", "PIL.ImageFont", "openpyxl", "openpyxl.drawing.image", "playwright.async_api")
+
+
+def prewarm_dependencies():
+    """Imports the heavy dependencies, so the first capture or report finds them loaded.
+
+    Runs in an executor of the AutomationService after the window is shown;
+    the service then starts the Playwright driver and a browser once.
+    """
+    for module in PREWARM_MODULES:
+        importlib.import_module(module)
+
+
+async def request_log_record(request, navigation_start, url_hash):
+    """Builds a LogTable record for a finished or failed request.
+
+    Size is the bytes transferred (headers + body) from `request.sizes()`,
+    falling back to content-length. Duration is Playwright's responseEnd (ms
+    after the request started); offset is when the request started, in ms
+    after `navigation_start` (LogTable.now() seconds), never negative.
+    Failed and aborted requests have no response and are logged with an
+    unknown status and size, so a blocked tag is not mistaken for a missing one.
+    """
+    url = request.url
+    name = url.split('/')[-1] or url
+    response = await request.response()
+    if response is None:
+        status, size = "N/A", "N/A"
+    else:
+        status, size = response.status, response.headers.get('content-length', 'N/A')
+    try:
+        sizes = await request.sizes()
+        if sizes['responseBodySize'] >= 0:
+            size = sizes['responseBodySize'] + max(sizes['responseHeadersSize'], 0)
+    except Exception:
+        pass # Not available for every request (e.g. some cached ones); keep content-length
+
+    timing = request.timing or {}
+    duration = timing.get('responseEnd', -1)
+    start_time = timing.get('startTime', -1) # Epoch milliseconds
+    offset = max(0.0, start_time - navigation_start * 1000) if start_time > 0 and navigation_start else -1
+    return (name, status, request.method, request.resource_type, size, LogTable.now(), url_hash, duration, offset)
+
+
+def mark_attempts(result, attempts, error=""):
+    """Records on a URL result, and each of its report rows, how many attempts it took and the final error."""
+    result['attempts'] = attempts
+    if error:
+        result['error'] = error
+    for report_row in result['report_rows']:
+        report_row['attempts'] = attempts
+        report_row['error'] = error or report_row.get('error', '') # Keeps a failed screenshot's error
+    return result
+
+
+def combine_traces(retired, trace, keep=True):
+    """Trace stats of a URL over its attempts: `trace` of the latest attempt plus the tracing time of `retired` ones.
+
+    With `keep=False` the attempt is being retried: its trace zip is deleted,
+    so only the last attempt's trace is kept. Either argument may be None.
+    """
+    if trace and not keep and trace.get('path'):
+        try:
+            os.remove(trace['path'])
+        except OSError as e:
+            print(f"Failed to delete superseded trace: {e}")
+        trace = dict(trace, path=None, bytes=0)
+    if not retired or not trace:
+        return trace or retired
+    return dict(trace, seconds=trace['seconds'] + retired['seconds'])
+
+
+def failed_url_result(url_obj, keyword_objects, error, attempts, trace=None, keywords=None):
+    """Result for a URL that could not be tested: every keyword of the URL is reported as N/A with the error.
+
+    `keywords` are the URL's own keywords when already grouped (RunPlan), instead of filtering `keyword_objects`.
+    `trace` is the URL's trace stats (see combine_traces); its kept trace is linked from every row.
+    """
+    trace_path = trace.get('path') if trace else None
+    if keywords is None:
+        keywords = UrlTestRunner.keywords_for(url_obj, keyword_objects)
+    report_rows = [{
+        'keyword': kw['text'],
+        'lang': kw['lang'],
+        'url': url_obj['url'],
+        'status': 'N/A',
+        'screenshot_path': '',
+        **({'trace_path': trace_path} if trace_path else {}),
+    } for kw in keywords]
+    result = {
+        'url': url_obj['url'], 'lang': url_obj['lang'], 'num': url_obj.get('num', 1),
+        'logs': [], 'statuses': {row['keyword']: 'N/A' for row in report_rows}, 'report_rows': report_rows,
+        **({'trace': trace} if trace else {}),
+    }
+    return mark_attempts(result, attempts, error)
+
+
+def keyword_status(logs):
+    """Determines the status (PASS, FAILED) for a given list of logs. Returns None when unclear."""
+    return status_from_codes(log[1] for log in logs) # Status is the second item
+
+
+def status_from_codes(status_codes):
+    """keyword_status() over bare status codes. Returns "STANDBY" when there are none."""
+    seen_any = False
+    all_pass = True
+    for status in status_codes:
+        seen_any = True
+        try:
+            status_code = int(status)
+            if 400 <= status_code < 500:
+                return "FAILED" # Immediate failure
+            elif not (200 <= status_code < 400):
+                # It's a number but not a 2xx or 3xx code (e.g. 5xx, or unknown).
+                all_pass = False
+        except (TypeError, ValueError):
+            # Status is not a valid integer
+            all_pass = False
+
+    if not seen_any:
+        return "STANDBY"
+    # Not a FAILED state, but not a clear PASS state either -> None
+    return "PASS" if all_pass else None
+
+
+def short_url_hash(url):
+    """8-character URL id for the log's URL Hash column, stable across runs and processes."""
+    return f"{zlib.crc32(url.encode('utf-8')):08x}"
+
 
 class TaggingAutomationApp:
+    LOG_COLUMNS = ("name", "status", "method", "type", "size", "time", "url_hash", "duration", "offset")
+
     def __init__(self, root):
         self.root = root
         self.root.title("Tagging Automation QA Pro")
@@ -40,20 +191,48 @@ class TaggingAutomationApp:
         style.configure("Highlight.TButton", font=("Helvetica", 12, "bold"))
 
         # Instance variables
-        self.playwright_loop = None
+        self.automation = AutomationService() # Runs every browser job on one long-lived loop
+        self.jobs_window = None
+        self.closing = False # Set once the window is closing and jobs are being stopped
         self.browser_context = None
         self.playwright_page = None
-        self.all_logs = []
-        self.keyword_matches = {}
+        self.navigation_start = None # LogTable.now() when the manual browser started navigating
+        self.all_logs = LogTable()
+        self.keyword_matches = {} # keyword text -> row indices into all_logs
+        self.log_load_generation = 0 # Bumped when the logs are replaced, to drop chunks of an older archive load
         self.update_timer = None
         self.active_filter_keyword = None
+        self.log_sort = None # (column, reverse) of the log view, or None for arrival order
+        self._view_logs = [] # Row indices shown in the tree, in ascending sort-key order
+        self._view_sort_keys = [] # Sort keys parallel to _view_logs
+        self._view_items = [] # Tree item ids parallel to _view_logs
         self.last_clicked_keyword_index = None
         self.urls = [{'url': 'https://www.google.com', 'lang': 'en', 'num': 1}] # Now a list of objects
         self.report_data = []
+        self.report_builder = None # Set while a Fast Test is running
+        self.run_keywords = [] # Keyword objects snapshotted when a Fast Test starts
+        self.run_plan = None # RunPlan compiled when a Fast Test starts
+        self.worker_count = 1 # Fast Test worker processes, snapshotted when a run starts
+        self.incremental_run = False # Incremental mode, snapshotted when a run starts
+        self.fingerprint_store = None # Loaded while an incremental Fast Test is running
+        self.run_fingerprints = {} # URL key -> fingerprint probed for this run
+        self.latency_history = None # Loaded while a Fast Test is running
+        self.retry_policy = RetryPolicy() # Loaded when a Fast Test starts
+        self.trace_failures = False # Trace-on-failure mode, snapshotted when a run starts
+        self.run_batch_clicks = False # Batched button clicks, snapshotted when a run starts
+        self.run_metrics = RunMetrics() # Live counters of the current Fast Test
+        self.run_incognito = True # Browser mode, snapshotted when a run starts
+        self.run_page_capture = None # Full-page capture options, snapshotted when a run starts
+        self.run_encoder = ScreenshotEncoder() # Screenshot format, snapshotted when a run starts
+        # Copies of Tk variables for the Playwright threads, which must not touch Tk
+        self.ui_state = {'url': "", 'url_hash': "N/A", 'gui_capture': "Rendered Log"}
+        self.url_results = [] # Per-URL logs and statuses of the last run, for run archives
+        self.log_panel_renderer = None # Created on first rendered capture
         
-        # Undo/Redo stacks
-        self.undo_stack = deque(maxlen=5)
-        self.redo_stack = deque()
+        # Undo/Redo log of keyword list edits
+        self.keyword_history = EditHistory(max_steps=500)
+        # (text, lang, num) -> count, kept in sync with every keyword list edit
+        self.keyword_keys = Counter()
 
         # --- Main Layout Frames ---
         top_controls_frame = ttk.Frame(root, padding="10")
@@ -81,10 +260,65 @@ class TaggingAutomationApp:
         self.status_var = tk.StringVar()
         self.status_label = ttk.Label(root, textvariable=self.status_var, padding=5, relief=tk.SUNKEN)
         self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        self.metrics_var = tk.StringVar()
+        self.metrics_label = ttk.Label(root, textvariable=self.metrics_var, padding=(5, 0), anchor=tk.E)
+        self.metrics_label.pack(side=tk.BOTTOM, fill=tk.X)
         self.update_status("Ready")
 
         # Initialize URL combobox with correctly formatted strings
         self.update_urls(self.urls)
+        self.url_var.trace_add("write", self._sync_ui_state)
+        for var in (self.gui_capture_var, self.page_capture_var, self.capture_max_height_var, self.capture_scale_var,
+                    self.capture_format_var, self.capture_quality_var):
+            var.trace_add("write", self._sync_ui_state)
+        self._sync_ui_state()
+
+        # --- Startup --- #
+        self.startup_benchmark = os.environ.get(STARTUP_BENCHMARK_ENV, "").lower()
+        self.startup_marks = {} # name -> seconds since module import
+        self.root.bind("<Map>", self._on_first_window, add="+")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        """Stops the automation service (closing its browsers and driver) before the window closes.
+
+        A running Fast Test is cancelled but still writes its report, stores
+        and run archive; the hidden window keeps serving it until then.
+        """
+        if self.closing:
+            return
+        if self.automation.active_jobs("Fast Test") and not messagebox.askyesno(
+            "Fast Test Running",
+            "A Fast Test is still running. Stop it and close?\nThe report of the URLs finished so far will be saved."
+        ):
+            return
+        self.closing = True
+        self.root.withdraw()
+        self.automation.stop(on_stopped=lambda: self.root.after(0, self.root.destroy))
+
+    def _on_first_window(self, event):
+        """Runs once when the main window is first mapped: pre-warms dependencies in the background."""
+        if event.widget is not self.root or 'first_window' in self.startup_marks:
+            return
+        self._mark_startup('first_window')
+        chrome_path = UrlTestRunner.CHROME_PATH if os.path.exists(UrlTestRunner.CHROME_PATH) else None
+
+        def prewarmed(job):
+            self._mark_startup('prewarmed')
+            if self.startup_benchmark == "warm":
+                self.root.after(0, self.start_browser_thread)
+
+        self.automation.submit("Pre-warm", self.automation.warm_up, chrome_path, on_done=prewarmed)
+        if self.startup_benchmark and self.startup_benchmark != "warm":
+            self.root.after(0, self.start_browser_thread)
+
+    def _mark_startup(self, name):
+        """Records a startup milestone; printed as JSON in startup benchmark mode."""
+        if name in self.startup_marks:
+            return
+        self.startup_marks[name] = time.perf_counter() - _PROCESS_START
+        if self.startup_benchmark:
+            print(json.dumps({'startup_mark': name, 'seconds': round(self.startup_marks[name], 3), 'epoch': time.time()}), flush=True)
 
     def setup_top_controls(self, parent_frame):
         # URL Frame
@@ -99,6 +333,10 @@ class TaggingAutomationApp:
         manage_urls_button.pack(side=tk.LEFT)
         change_workspace_button = ttk.Button(url_frame, text="Change Workspace", command=self.change_workspace)
         change_workspace_button.pack(side=tk.LEFT, padx=5)
+        jobs_button = ttk.Button(url_frame, text="Jobs", command=self.open_jobs_window)
+        jobs_button.pack(side=tk.LEFT)
+        plan_button = ttk.Button(url_frame, text="Plan", command=self.open_run_plan)
+        plan_button.pack(side=tk.LEFT, padx=5)
 
         # Browser Control Frame
         browser_control_frame = ttk.Frame(parent_frame)
@@ -106,6 +344,9 @@ class TaggingAutomationApp:
         self.mode_var = tk.StringVar(value="Incognito")
         mode_menu = ttk.OptionMenu(browser_control_frame, self.mode_var, "Incognito", "Normal", "Incognito")
         mode_menu.pack(side=tk.LEFT)
+        self.gui_capture_var = tk.StringVar(value="Rendered Log")
+        gui_capture_menu = ttk.OptionMenu(browser_control_frame, self.gui_capture_var, "Rendered Log", "Rendered Log", "Screen Grab")
+        gui_capture_menu.pack(side=tk.LEFT, padx=(5, 0))
         self.browser_button = ttk.Button(browser_control_frame, text="Start Browser", command=self.toggle_browser)
         self.browser_button.pack(side=tk.LEFT, padx=5)
         self.test_button = ttk.Button(browser_control_frame, text="Test", command=self.start_test_thread)
@@ -118,6 +359,9 @@ class TaggingAutomationApp:
         self.screenshot_button.pack(side=tk.LEFT, padx=5)
         self.output_button = ttk.Button(browser_control_frame, text="Output", command=self.generate_excel_report)
         self.output_button.pack(side=tk.LEFT, padx=5)
+        self.report_format_var = tk.StringVar(value="Excel")
+        report_format_menu = ttk.OptionMenu(browser_control_frame, self.report_format_var, "Excel", *ReportBuilder.REPORT_FORMATS)
+        report_format_menu.pack(side=tk.LEFT)
         self.fast_test_button = ttk.Button(
             browser_control_frame,
             text="Fast Test!",
@@ -125,6 +369,48 @@ class TaggingAutomationApp:
             style="Highlight.TButton"
         )
         self.fast_test_button.pack(side=tk.LEFT, padx=(30, 5))
+        ttk.Label(browser_control_frame, text="Workers:").pack(side=tk.LEFT, padx=(5, 0))
+        self.worker_count_var = tk.StringVar(value="1")
+        worker_spinbox = ttk.Spinbox(browser_control_frame, from_=1, to=max(1, os.cpu_count() or 1), width=3, textvariable=self.worker_count_var)
+        worker_spinbox.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(browser_control_frame, text="Attempts:").pack(side=tk.LEFT, padx=(5, 0))
+        self.attempts_var = tk.StringVar(value="3")
+        attempts_spinbox = ttk.Spinbox(browser_control_frame, from_=1, to=10, width=3, textvariable=self.attempts_var)
+        attempts_spinbox.pack(side=tk.LEFT, padx=(2, 5))
+        self.incremental_var = tk.BooleanVar(value=False)
+        incremental_check = ttk.Checkbutton(browser_control_frame, text="Incremental", variable=self.incremental_var)
+        incremental_check.pack(side=tk.LEFT, padx=5)
+        self.trace_failures_var = tk.BooleanVar(value=False)
+        trace_check = ttk.Checkbutton(browser_control_frame, text="Trace Failures", variable=self.trace_failures_var)
+        trace_check.pack(side=tk.LEFT, padx=5)
+        self.batch_clicks_var = tk.BooleanVar(value=False)
+        batch_clicks_check = ttk.Checkbutton(browser_control_frame, text="Batch Clicks", variable=self.batch_clicks_var)
+        batch_clicks_check.pack(side=tk.LEFT, padx=5)
+
+        # Page Capture Frame
+        capture_frame = ttk.Frame(parent_frame)
+        capture_frame.pack(fill=tk.X, expand=True, pady=(5, 0))
+        ttk.Label(capture_frame, text="Page Capture:").pack(side=tk.LEFT)
+        self.page_capture_var = tk.StringVar(value="Viewport")
+        page_capture_menu = ttk.OptionMenu(capture_frame, self.page_capture_var, "Viewport", "Viewport", "Full Page")
+        page_capture_menu.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(capture_frame, text="Max Height (px, 0 = none):").pack(side=tk.LEFT, padx=(5, 0))
+        self.capture_max_height_var = tk.StringVar(value=str(TiledPageCapture.DEFAULT_MAX_HEIGHT))
+        max_height_spinbox = ttk.Spinbox(capture_frame, from_=0, to=200000, increment=5000, width=7, textvariable=self.capture_max_height_var)
+        max_height_spinbox.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(capture_frame, text="Scale:").pack(side=tk.LEFT, padx=(5, 0))
+        self.capture_scale_var = tk.StringVar(value="100%")
+        scale_combobox = ttk.Combobox(capture_frame, textvariable=self.capture_scale_var, values=list(TiledPageCapture.SCALES), width=5, state="readonly")
+        scale_combobox.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(capture_frame, text="Format:").pack(side=tk.LEFT, padx=(15, 0))
+        self.capture_format_var = tk.StringVar(value="PNG")
+        format_combobox = ttk.Combobox(capture_frame, textvariable=self.capture_format_var, values=list(ScreenshotEncoder.FORMATS), width=15, state="readonly")
+        format_combobox.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(capture_frame, text="Quality:").pack(side=tk.LEFT, padx=(5, 0))
+        self.capture_quality_var = tk.StringVar(value=str(ScreenshotEncoder.DEFAULT_QUALITY))
+        quality_spinbox = ttk.Spinbox(capture_frame, from_=1, to=100, width=4, textvariable=self.capture_quality_var)
+        quality_spinbox.pack(side=tk.LEFT, padx=(2, 5))
+        self.run_option_frames = (browser_control_frame, capture_frame) # Locked while a Fast Test runs
 
 
     def _setup_workspace_paths(self, parent_dir):
@@ -135,12 +421,18 @@ class TaggingAutomationApp:
         self.sessions_dir = self.base_dir / "Sessions"
         self.logs_dir = self.base_dir / "Logs"
         self.outputs_dir = self.base_dir / "Outputs"
+        self.runs_dir = self.base_dir / "Runs"
+        self.traces_dir = self.base_dir / "Traces" # Created when the first trace is kept
+        self.fingerprints_path = self.base_dir / "fingerprints.json.gz"
+        self.latency_history_path = self.base_dir / "latency_history.json"
+        self.retry_policy_path = self.base_dir / "retry_policy.json"
 
         # Create directories if they don't exist
         self.captures_dir.mkdir(parents=True, exist_ok=True)
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         self.outputs_dir.mkdir(parents=True, exist_ok=True)
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
 
     def change_workspace(self):
         """Opens a dialog to move the workspace to a new directory."""
@@ -259,6 +551,8 @@ class TaggingAutomationApp:
         self.root.bind("<Control-y>", self.redo_keywords)
         self.root.bind("<Command-y>", self.redo_keywords)
 
+        import_button = ttk.Button(parent_frame, text="Import Keywords (CSV/XLSX)", command=self.import_keywords_from_file)
+        import_button.pack(fill=tk.X, pady=(5, 0))
         remove_button = ttk.Button(parent_frame, text="Remove All", command=self.remove_all_keywords)
         remove_button.pack(fill=tk.X, pady=5)
 
@@ -270,12 +564,18 @@ class TaggingAutomationApp:
         load_button = ttk.Button(session_button_frame, text="Load Session", command=self.load_session)
         load_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(2,0))
 
+        run_button_frame = ttk.Frame(parent_frame)
+        run_button_frame.pack(fill=tk.X, pady=(5,0))
+        save_run_button = ttk.Button(run_button_frame, text="Save Run", command=self.save_run_archive)
+        save_run_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0,2))
+        load_run_button = ttk.Button(run_button_frame, text="Load Run", command=self.load_run_archive)
+        load_run_button.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(2,0))
+        compare_runs_button = ttk.Button(parent_frame, text="Compare Runs...", command=self.compare_runs)
+        compare_runs_button.pack(fill=tk.X, pady=(5,0))
+
         # --- Help/Shortcuts Section ---
         self.setup_shortcuts_pane(parent_frame)
 
-        # Save initial state for undo
-        self._save_keyword_state()
-
     def setup_shortcuts_pane(self, parent_frame):
         """Creates a collapsible pane for shortcuts and help text."""
         help_frame = ttk.Frame(parent_frame, padding=10, relief="groove", borderwidth=1)
@@ -293,7 +593,7 @@ class TaggingAutomationApp:
         help_label.pack(fill=tk.X)
 
     def setup_log_pane(self, parent_frame):
-        columns = ("name", "status", "method", "type", "size", "time", "url_hash")
+        columns = self.LOG_COLUMNS
         self.log_tree = ttk.Treeview(parent_frame, columns=columns, show="headings")
         
         self.log_tree.heading("name", text="Name", command=lambda: self.sort_treeview("name", False))
@@ -303,6 +603,8 @@ class TaggingAutomationApp:
         self.log_tree.heading("size", text="Size", command=lambda: self.sort_treeview("size", False))
         self.log_tree.heading("time", text="Time", command=lambda: self.sort_treeview("time", False))
         self.log_tree.heading("url_hash", text="URL Hash", command=lambda: self.sort_treeview("url_hash", False))
+        self.log_tree.heading("duration", text="Duration (ms)", command=lambda: self.sort_treeview("duration", False))
+        self.log_tree.heading("offset", text="Offset (ms)", command=lambda: self.sort_treeview("offset", False))
 
         for col in columns:
             self.log_tree.column(col, width=100, stretch=tk.YES)
@@ -312,6 +614,8 @@ class TaggingAutomationApp:
         self.log_tree.column("method", width=60)
         self.log_tree.column("time", width=150)
         self.log_tree.column("url_hash", width=90)
+        self.log_tree.column("duration", width=90)
+        self.log_tree.column("offset", width=90)
 
         scrollbar = ttk.Scrollbar(parent_frame, orient=tk.VERTICAL, command=self.log_tree.yview)
         self.log_tree.configure(yscroll=scrollbar.set)
@@ -319,46 +623,103 @@ class TaggingAutomationApp:
         self.log_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
     def export_logs(self):
-        if not self.all_logs:
+        """Exports current logs or run archives in the background, filtered and optionally compressed."""
+        dialog = LogExportDialog(self.root, len(self.all_logs), self.active_filter_keyword or "")
+        options = dialog.options
+        if options is None:
+            return # User cancelled
+
+        if options['source'] == "archives":
+            archive_paths = filedialog.askopenfilenames(
+                title="Select Run Archives",
+                initialdir=self.runs_dir,
+                filetypes=[("Run archives", f"*{RunArchive.EXTENSION}"), ("All files", "*.*")]
+            )
+            if not archive_paths:
+                return
+        elif not self.all_logs:
             messagebox.showwarning("No Data", "There is no log data to export.")
             return
 
-        default_filename = f"network_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        extension = LogExporter.FORMATS[options['format']]
+        default_filename = f"network_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
         filepath = filedialog.asksaveasfilename(
             title="Save Log As",
             initialdir=self.logs_dir,
             initialfile=default_filename,
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            defaultextension=extension,
+            filetypes=[(f"{options['format']} files", f"*{extension}"), ("All files", "*.*")]
         )
 
         if not filepath:
             return # User cancelled
 
-        try:
-            with open(filepath, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                # Write header
-                writer.writerow([self.log_tree.heading(c)["text"] for c in self.log_tree["columns"]])
-                # Write data
-                writer.writerows(self.all_logs)
-            
-            messagebox.showinfo("Success", f"Log successfully exported to {os.path.basename(filepath)}")
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export log: {e}")
+        headers = [self.log_tree.heading(c)["text"] for c in self.log_tree["columns"]]
+        if options['source'] == "archives":
+            chunks = LogExporter.archive_chunks(archive_paths)
+            headers = ["Run"] + headers
+        else:
+            chunks = LogExporter.memory_chunks(self.all_logs, len(self.all_logs)) # Rows captured so far
+        exporter = LogExporter(
+            filepath,
+            options['format'],
+            headers,
+            keyword=options['keyword'],
+            status=options['status'],
+            with_run=options['source'] == "archives"
+        )
+        self.update_status(f"Exporting logs to {os.path.basename(filepath)}...")
+
+        def run_export():
+            try:
+                count = exporter.export(chunks, progress=lambda n: self.update_status(f"Exporting logs... {n} rows written"))
+            except Exception as e:
+                print(f"Export Error: {e}")
+                self.update_status(f"Log export failed: {e}")
+                self.root.after(0, lambda e=e: messagebox.showerror("Export Error", f"Failed to export log: {e}"))
+                return
+            self.update_status(f"Exported {count} logs to {os.path.basename(filepath)}")
+            self.root.after(0, lambda: messagebox.showinfo("Success", f"{count} log rows exported to {os.path.basename(filepath)}"))
+
+        threading.Thread(target=run_export, daemon=True).start()
 
     def capture_and_stitch_thread(self):
         """Wrapper to run the async capture method from a sync button click."""
-        if not self.playwright_loop or not self.playwright_loop.is_running():
-            messagebox.showwarning("Not Ready", "The browser automation loop is not running.")
+        self.automation.submit("Screenshot", self.capture_and_stitch)
+
+    def open_jobs_window(self):
+        if self.jobs_window is not None and self.jobs_window.winfo_exists():
+            self.jobs_window.lift()
             return
-        asyncio.run_coroutine_threadsafe(self.capture_and_stitch(), self.playwright_loop)
+        self.jobs_window = AutomationJobsWindow(self.root, self.automation)
 
-    async def capture_and_stitch(self, output_path=None, show_success_message=True):
+    def open_run_plan(self):
+        """Compiles and shows the plan the next Fast Test would run."""
+        if not self.urls:
+            messagebox.showwarning("No URLs", "Please add at least one URL in Manage URLs.")
+            return
+        plan = RunPlan(self.urls, self._get_keyword_objects(), LatencyHistory.load(self.latency_history_path), self._get_worker_count())
+        RunPlanWindow(self.root, plan, self.outputs_dir)
+
+    async def capture_and_stitch(self, output_path=None, show_success_message=True, panel_data=None, page_capture=False, encoder=None):
+        """Saves the browser viewport (or the tiled full page) stitched to the log panel.
+
+        `panel_data` is an optional (keyword, status, rows) tuple for the rendered
+        panel; by default the keyword and rows currently shown in the GUI are used.
+        `page_capture` holds TiledPageCapture options, None for a viewport
+        capture; by default the Page Capture controls decide, as they do for
+        the `encoder`. Without a success message the capture is encoded in
+        the background and the future of ScreenshotEncoder.save is returned,
+        and errors are raised to the caller (the runner flags the report row)
+        instead of being shown.
+        """
         if not self.playwright_page or self.playwright_page.is_closed():
+            if not show_success_message:
+                raise RuntimeError("The browser page is closed")
             self.root.after(0, lambda: messagebox.showwarning("Browser Not Ready", "Please start the browser first."))
             return
 
+        from PIL import Image, ImageGrab
         loop = asyncio.get_running_loop()
         current_url = self.playwright_page.url
 
@@ -366,122 +727,143 @@ class TaggingAutomationApp:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             temp_dir = tempfile.gettempdir()
             browser_shot_path = os.path.join(temp_dir, f"temp_browser_{timestamp}.png")
-            gui_shot_path = os.path.join(temp_dir, f"temp_gui_{timestamp}.png")
             
+            encoder = encoder or self.ui_state['encoder']
             if output_path is None:
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                output_path = self.captures_dir / f"stitched_capture_{timestamp}.png"
+                output_path = self.captures_dir / f"stitched_capture_{timestamp}.{encoder.extension}"
 
-            # --- Capture Browser --- #
-            await self.playwright_page.bring_to_front()
-            await self.playwright_page.evaluate("window.scrollTo(0, 0)")
-            await asyncio.sleep(0.3) # Wait for focus and scroll
-            await self.playwright_page.screenshot(path=browser_shot_path)
+            screen_grab = self.ui_state['gui_capture'] == "Screen Grab"
+            if page_capture is False:
+                page_capture = self.ui_state['page_capture']
 
             # --- Capture GUI --- #
-            def grab_gui():
-                self.root.attributes("-topmost", True)
-                self.root.update_idletasks()
-                time.sleep(0.3) # Wait for window to come to front
-                x, y, width, height = self.root.winfo_rootx(), self.root.winfo_rooty(), self.root.winfo_width(), self.root.winfo_height()
-                ImageGrab.grab(bbox=(x, y, x + width, y + height)).save(gui_shot_path)
-                self.root.attributes("-topmost", False)
-            
-            await loop.run_in_executor(None, grab_gui)
+            # Taken first, so a full-page capture can be stitched straight into an image with room for it
+            gui_img = None
+            if screen_grab:
+                await self.run_on_ui(self._raise_window, True)
+                await asyncio.sleep(0.3) # Wait for window to come to front
+                try:
+                    bbox = await self.run_on_ui(self._window_bbox)
+                    gui_img = await loop.run_in_executor(None, lambda: ImageGrab.grab(bbox=bbox))
+                finally:
+                    await self.run_on_ui(self._raise_window, False)
+            else:
+                # Snapshot the log state now; the panel is rendered off the Tk thread while stitching
+                if panel_data is not None:
+                    filter_keyword, status, rows = panel_data
+                else:
+                    filter_keyword, status, rows = await self.run_on_ui(self._log_panel_snapshot)
+                if self.log_panel_renderer is None:
+                    self.log_panel_renderer = LogPanelRenderer()
+
+            # --- Capture Browser --- #
+            await self.playwright_page.bring_to_front()
+            page_img = None
+            if page_capture:
+                tiled_capture = TiledPageCapture(**page_capture)
+                page_img = await tiled_capture.capture(
+                    self.playwright_page,
+                    left_margin=gui_img.width if gui_img is not None else self.log_panel_renderer.width,
+                    min_height=gui_img.height if gui_img is not None else 0
+                )
+                if tiled_capture.truncated:
+                    print(f"Full-page capture of {current_url} cut off at {tiled_capture.max_height}px")
+            else:
+                await self.playwright_page.evaluate("window.scrollTo(0, 0)")
+                await asyncio.sleep(0.3 if screen_grab else 0.1) # Wait for focus and scroll
+                await self.playwright_page.screenshot(path=browser_shot_path)
 
             # --- Stitch Images --- #
             def stitch_images_with_url(url_text):
-                with Image.open(gui_shot_path) as gui_img, Image.open(browser_shot_path) as browser_img:
-                    total_width = gui_img.width + browser_img.width
-                    max_height = max(gui_img.height, browser_img.height)
+                if page_img is not None: # Already the stitched size, with the panel area left blank
+                    if gui_img is not None:
+                        page_img.paste(gui_img, (0, 0))
+                    else:
+                        self.log_panel_renderer.render(filter_keyword, status, rows, into=page_img)
+                    return page_img
+
+                with Image.open(browser_shot_path) as browser_img:
+                    panel_img = gui_img
+                    if panel_img is None:
+                        panel_img = self.log_panel_renderer.render(filter_keyword, status, rows, height=browser_img.height)
+
+                    total_width = panel_img.width + browser_img.width
+                    max_height = max(panel_img.height, browser_img.height)
                     
                     stitched_image = Image.new('RGB', (total_width, max_height), (255, 255, 255))
-                    stitched_image.paste(gui_img, (0, 0))
-                    stitched_image.paste(browser_img, (gui_img.width, 0))
-                    stitched_image.save(output_path)
+                    stitched_image.paste(panel_img, (0, 0))
+                    stitched_image.paste(browser_img, (panel_img.width, 0))
 
                 os.remove(browser_shot_path)
-                os.remove(gui_shot_path)
+                return stitched_image
             
-            await loop.run_in_executor(None, stitch_images_with_url, current_url)
+            stitched_image = await loop.run_in_executor(None, stitch_images_with_url, current_url)
+            pending_save = encoder.submit(stitched_image, output_path)
             
-            if show_success_message:
-                self.root.after(0, lambda: messagebox.showinfo("Success", f"Screenshot saved to {os.path.basename(output_path)}"))
-            else:
-                self.update_status(f"Screenshot saved: {os.path.basename(output_path)}")
+            if not show_success_message:
+                self.update_status(f"Screenshot captured: {os.path.basename(output_path)}")
+                return pending_save
+            _, _, saved_path = await pending_save
+            self.root.after(0, lambda: messagebox.showinfo("Success", f"Screenshot saved to {os.path.basename(saved_path)}"))
 
         except Exception as e:
+            if not show_success_message:
+                raise
             print(f"Capture Error: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Capture Error", f"An error occurred: {e}"))
+            self.root.after(0, lambda e=e: messagebox.showerror("Capture Error", f"An error occurred: {e}"))
+
+    def _raise_window(self, on_top):
+        self.root.attributes("-topmost", on_top)
+        self.root.update_idletasks()
+
+    def _window_bbox(self):
+        x, y = self.root.winfo_rootx(), self.root.winfo_rooty()
+        return (x, y, x + self.root.winfo_width(), y + self.root.winfo_height())
+
+    def _log_panel_snapshot(self):
+        """(keyword, status, rows) of the log view as currently filtered. Runs on the Tk thread."""
+        filter_keyword = self.active_filter_keyword
+        if filter_keyword:
+            indices = self.keyword_matches.get(filter_keyword, [])
+            return filter_keyword, self.all_logs.status_of(indices), self.all_logs.rows(indices)
+        return None, None, list(self.all_logs)
+
+    def _sort_report_data(self, report_data, keyword_objects=None, url_objects=None):
+        """Sorts report rows by keyword list order, then URL list order."""
+        if keyword_objects is None:
+            keyword_objects = self._get_keyword_objects()
+        if url_objects is None:
+            url_objects = self.urls
+        keyword_sort_map = {obj['text']: i for i, obj in enumerate(keyword_objects)}
+        url_sort_map = {u['url']: i for i, u in enumerate(url_objects)}
+
+        return sorted(
+            report_data,
+            key=lambda item: (
+                keyword_sort_map.get(item['keyword'], 999),
+                url_sort_map.get(item['url'], 999)
+            )
+        )
 
     def generate_excel_report(self):
-        """Generates and saves an Excel report from the collected report_data."""
+        """Generates and saves the report (Excel and/or HTML, per the report format) from the collected report_data."""
         if not self.report_data:
             messagebox.showwarning("No Data", "No report data found. Please run the Fast Test first.")
             return
 
-        self.update_status("Generating Excel report...")
+        self.update_status("Generating report...")
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Test Report"
-
-            # --- Sorting Data ---
-            keyword_objects_order = self._get_keyword_objects()
-            keyword_sort_map = {obj['text']: i for i, obj in enumerate(keyword_objects_order)}
-            url_order = [u['url'] for u in self.urls]
-            url_sort_map = {url: i for i, url in enumerate(url_order)}
-
-            sorted_report_data = sorted(
-                self.report_data,
-                key=lambda item: (
-                    keyword_sort_map.get(item['keyword'], 999),
-                    url_sort_map.get(item['url'], 999)
-                )
-            )
-
-            # --- Headers ---
-            headers = ["Keyword", "Language", "Status", "URL", "Screenshot"]
-            ws.append(headers)
-            for col_idx, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_idx)
-                cell.font = cell.font.copy(bold=True)
-            
-            ws.column_dimensions['A'].width = 30
-            ws.column_dimensions['B'].width = 10
-            ws.column_dimensions['C'].width = 15
-            ws.column_dimensions['D'].width = 40
-            ws.column_dimensions['E'].width = 80 # Approx 600px
-
-            # --- Populating Data ---
-            for row_idx, item in enumerate(sorted_report_data, 2):
-                ws.cell(row=row_idx, column=1, value=item['keyword'])
-                ws.cell(row=row_idx, column=2, value=item['lang'])
-                ws.cell(row=row_idx, column=3, value=item['status'])
-                ws.cell(row=row_idx, column=4, value=item['url'])
-
-                img_path = item['screenshot_path']
-                if os.path.exists(img_path):
-                    try:
-                        img = OpenpyxlImage(img_path)
-                        # Scale image to a fixed width, preserving aspect ratio
-                        scale_width = 600
-                        img.height = img.height * (scale_width / img.width)
-                        img.width = scale_width
-                        
-                        ws.add_image(img, f'E{row_idx}')
-                        ws.row_dimensions[row_idx].height = img.height * 0.75 # Convert pixels to points
-                    except Exception as img_e:
-                        ws.cell(row=row_idx, column=5, value=f"Error loading image: {img_e}")
-                else:
-                    ws.cell(row=row_idx, column=5, value="Image not found")
+            sorted_report_data = self._sort_report_data(self.report_data)
 
             # --- Save File ---
-            report_filename = f"Test_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            report_path = self.outputs_dir / report_filename
-            wb.save(report_path)
-            self.update_status(f"Report saved: {report_path}")
-            messagebox.showinfo("Success", f"Excel report saved as {report_path}")
+            report_base = self.outputs_dir / f"Test_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            performance_rows = [result['performance'] for result in self.url_results if result.get('performance')]
+            formats = ReportBuilder.REPORT_FORMATS.get(self.report_format_var.get(), ("xlsx",))
+            report_paths = ReportBuilder.write_reports(sorted_report_data, report_base, formats, performance_rows)
+            report_list = "\n".join(str(path) for path in report_paths)
+            self.update_status(f"Report saved: {report_list}")
+            messagebox.showinfo("Success", f"Report saved as {report_list}")
 
         except Exception as e:
             self.update_status(f"Error generating report: {e}")
@@ -494,13 +876,75 @@ class TaggingAutomationApp:
         """Thread-safe method to update the status bar."""
         self.root.after(0, lambda: self.status_var.set(message))
 
+    def _sync_ui_state(self, *args):
+        """Mirrors the Tk variables the Playwright threads need into `ui_state`. Runs on the Tk thread."""
+        current_url = self.url_var.get()
+        raw_url = self._parse_url_display_string(current_url)['url'] if current_url else ""
+        self.ui_state = {
+            'url': raw_url,
+            'url_hash': short_url_hash(raw_url) if raw_url else "N/A",
+            'gui_capture': self.gui_capture_var.get(),
+            'page_capture': self._page_capture_options(),
+            'encoder': self._screenshot_encoder(),
+        }
+
+    def _screenshot_encoder(self):
+        """A ScreenshotEncoder for the Format and Quality controls."""
+        try:
+            quality = int(self.capture_quality_var.get())
+        except ValueError:
+            quality = ScreenshotEncoder.DEFAULT_QUALITY
+        return ScreenshotEncoder(self.capture_format_var.get(), quality)
+
+    def _page_capture_options(self):
+        """TiledPageCapture options from the Page Capture controls, or None for viewport captures."""
+        if self.page_capture_var.get() != "Full Page":
+            return None
+        try:
+            max_height = max(0, int(self.capture_max_height_var.get()))
+        except ValueError:
+            max_height = TiledPageCapture.DEFAULT_MAX_HEIGHT
+        return {'max_height': max_height, 'scale': TiledPageCapture.SCALES.get(self.capture_scale_var.get(), 1.0)}
+
+    def run_on_ui(self, fn, *args):
+        """Schedules fn(*args) on the Tk thread and returns an asyncio future for its result.
+
+        Call from a coroutine: awaiting the future suspends only that coroutine,
+        so the event loop keeps handling network events while the GUI catches up.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(result, error):
+            if future.done(): # Cancelled while the GUI was busy
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        def call():
+            try:
+                result, error = fn(*args), None
+            except Exception as e:
+                result, error = None, e
+            try:
+                loop.call_soon_threadsafe(resolve, result, error)
+            except RuntimeError:
+                pass # The loop was closed in the meantime
+
+        self.root.after(0, call)
+        return future
+
     def toggle_controls(self, enabled):
         """Enable or disable all major UI controls."""
         state = tk.NORMAL if enabled else tk.DISABLED
-        # Toggle all buttons in the top control frame
-        for child in self.browser_button.master.winfo_children():
-            if isinstance(child, (ttk.Button, ttk.OptionMenu)):
-                child.config(state=state)
+        # Toggle all buttons and run options in the top control frames
+        run_option_widgets = (ttk.Button, ttk.OptionMenu, ttk.Checkbutton, ttk.Spinbox, ttk.Combobox)
+        for frame in self.run_option_frames:
+            for child in frame.winfo_children():
+                if isinstance(child, run_option_widgets):
+                    child.state(["!disabled"] if enabled else ["disabled"]) # Keeps read-only comboboxes read-only
         # Re-enable the fast test button specifically if it's the end
         self.fast_test_button.config(state=state)
         # Toggle keyword controls
@@ -519,160 +963,403 @@ class TaggingAutomationApp:
             messagebox.showwarning("No Keywords", "Please add at least one keyword.")
             return
 
+        self.worker_count = self._get_worker_count() # Read on the Tk thread
+        self.incremental_run = self.incremental_var.get()
+        self.trace_failures = self.trace_failures_var.get()
+        self.run_batch_clicks = self.batch_clicks_var.get()
+        self.run_incognito = self.mode_var.get() == "Incognito"
+        self.run_page_capture = self._page_capture_options()
+        self.run_encoder = self._screenshot_encoder()
+        try:
+            max_attempts = int(self.attempts_var.get())
+        except ValueError:
+            max_attempts = 1
+        self.retry_policy = RetryPolicy.load(self.retry_policy_path, max_attempts)
         self.toggle_controls(False)
-        self.update_status("Starting Fast Test...")
         self.report_data = [] # Clear previous report data
+        self.url_results = []
+        self.run_keywords = self._get_keyword_objects()
+        run_keywords, run_urls = self.run_keywords, list(self.urls)
+        self.report_builder = ReportBuilder(
+            self.outputs_dir,
+            sort_fn=lambda rows: self._sort_report_data(rows, run_keywords, run_urls),
+            formats=ReportBuilder.REPORT_FORMATS.get(self.report_format_var.get(), ("xlsx",))
+        )
+        self.update_status(f"Starting Fast Test... (report rows checkpointed to {self.report_builder.partial_path.name})")
+        self.run_metrics.reset(len(self.urls))
+        self.run_metrics.serve()
+        self._refresh_metrics_panel()
         
-        thread = threading.Thread(target=self.run_full_automation, daemon=True)
-        thread.start()
-
-    def run_full_automation(self):
-        """Sets up and runs the asyncio event loop for the automation."""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        self.playwright_loop = loop
+        self.automation.submit("Fast Test", self.run_full_automation)
+
+    def _refresh_metrics_panel(self):
+        """Shows throughput and ETA of the running Fast Test, refreshed every second while it runs."""
+        snapshot = self.run_metrics.snapshot()
+        eta = snapshot['eta_seconds']
+        eta_text = f"{int(eta // 60)}:{int(eta % 60):02d}" if eta is not None else "--:--"
+        self.metrics_var.set(
+            f"{snapshot['urls_done']}/{snapshot['urls_total']} URLs  |  {snapshot['urls_per_minute']:.1f} URLs/min  |  "
+            f"{snapshot['responses_per_second']:.1f} responses/s  |  queue {snapshot['queue_depth']}  |  "
+            f"browsers {snapshot['browsers']}  |  " + (f"ETA {eta_text}" if snapshot['running'] else f"took {snapshot['elapsed']:.0f}s")
+        )
+        if snapshot['running']:
+            self.root.after(1000, self._refresh_metrics_panel)
+
+    def _get_worker_count(self):
+        if threading.current_thread() is not threading.main_thread():
+            return self.worker_count
         try:
-            loop.run_until_complete(self._orchestrate_all_urls())
+            return max(1, int(self.worker_count_var.get()))
+        except (ValueError, tk.TclError):
+            return 1
+
+    async def run_full_automation(self):
+        """Runs a Fast Test as a job of the automation service. Blocking steps run in executors."""
+        loop = asyncio.get_running_loop()
+        try:
+            self.latency_history = await loop.run_in_executor(None, LatencyHistory.load, self.latency_history_path)
+            self.run_plan = RunPlan(self.urls, self.run_keywords, self.latency_history, self._get_worker_count())
+            print(f"Run plan: {self.run_plan.summary()}")
+            self.update_status(f"Plan: {self.run_plan.summary()}")
+            self.run_metrics.reset(len(self.run_plan.entries))
+            url_objects = self.run_plan.url_objects
+            if self.incremental_run:
+                url_objects = await loop.run_in_executor(None, self._reuse_unchanged_urls, url_objects)
+
+            worker_count = min(self._get_worker_count(), len(url_objects))
+            if worker_count > 1:
+                await self._run_sharded_fast_test(url_objects, worker_count)
+            elif url_objects:
+                await self._orchestrate_all_urls(url_objects)
+
+            # Put reused, retried and re-tested URLs back in session order for the run archive
+            url_order = {self._url_key(url_obj): i for i, url_obj in enumerate(self.urls)}
+            self.url_results.sort(key=lambda result: url_order.get(self._url_key(result), len(url_order)))
+
+            if self.trace_failures:
+                self._report_trace_summary()
+            self._report_encoding_summary()
+
+            failed_urls = [result['url'] for result in self.url_results if result.get('error')]
+            if failed_urls:
+                print(f"Failed URLs: {failed_urls}")
+                failed_list = "\n".join(failed_urls)
+                self.root.after(0, lambda: messagebox.showwarning("Fast Test", f"{len(failed_urls)} URL(s) could not be tested:\n{failed_list}"))
             self.update_status("Fast Test Completed Successfully!")
+        except asyncio.CancelledError:
+            self.update_status("Fast Test cancelled; saving the URLs finished so far...")
+            raise
         except Exception as e:
             print(f"Fast Test Error: {e}")
             self.update_status(f"Error: {e}")
-            messagebox.showerror("Fast Test Error", f"An error occurred: {e}")
+            self.root.after(0, lambda e=e: messagebox.showerror("Fast Test Error", f"An error occurred: {e}"))
         finally:
-            self.root.after(0, self.generate_excel_report)
-            self.root.after(0, lambda: self.toggle_controls(True))
-            self.root.after(0, lambda: self.browser_button.config(text="Start Browser")) # Reset button text
-            loop.close()
-            self.playwright_loop = None
-
-    async def _orchestrate_all_urls(self):
-        """Main async orchestrator to loop through URLs and run tests."""
-        num_urls = len(self.urls)
-        for i, url_obj in enumerate(self.urls):
-            self.root.after(0, self.clear_all) # Clear logs and UI for the new run
-            await asyncio.sleep(0.5) # Give a moment for UI to clear
-            self.update_status(f"URL {i+1}/{num_urls}: Starting test for {url_obj['url']}")
-            await self._automated_run_for_url(url_obj)
-
-    async def _automated_run_for_url(self, url_obj):
-        """Runs the full test-and-screenshot cycle for a single URL."""
-        url_str = url_obj['url']
-        url_lang = url_obj['lang']
-        user_data_dir = tempfile.mkdtemp()
-        clicked_button_ids_on_page = set()
-        try:
-            async with async_playwright() as p:
-                # 1. Launch Browser
-                self.update_status(f"Launching browser for {url_str}...")
-                
-                launch_options = {
-                    "headless": False,
-                    "args": ['--incognito'] if self.mode_var.get() == "Incognito" else [],
-                }
-                if sys.platform == "darwin": # macOS
-                    chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-                    if os.path.exists(chrome_path):
-                        launch_options["executable_path"] = chrome_path
-
-                context = await p.chromium.launch_persistent_context(
-                    user_data_dir,
-                    **launch_options
-                )
-                self.browser_context = context
-                page = context.pages[0] if context.pages else await context.new_page()
-                self.playwright_page = page
-                page.on("response", self.handle_response)
-
-                await page.goto(url_str, wait_until="domcontentloaded")
-
-                # 2. Wait for initial page load to settle
-                await self.wait_for_network_idle()
-
-                # 3. Element test is now done per keyword if a button_id is present.
-
-                # 5. Screenshot per relevant keyword
-                all_keyword_objects = self._get_keyword_objects()
-                relevant_keywords = [ 
-                    kw for kw in all_keyword_objects 
-                    if kw['lang'] == url_lang and kw.get('num', 1) == url_obj.get('num', 1)
-                ]
-                num_keywords = len(relevant_keywords)
-
-                for i, keyword_obj in enumerate(relevant_keywords):
-                    keyword_text = keyword_obj['text']
-                    keyword_lang = keyword_obj['lang']
-                    button_id = keyword_obj.get('button_id', '')
-
-                    self.update_status(f"Processing keyword {i+1}/{num_keywords}: '{keyword_text}'...")
+            await loop.run_in_executor(None, self._finish_fast_test)
+
+    def _finish_fast_test(self):
+        """Writes the report, stores and run archive of a finished or cancelled Fast Test."""
+        self._finish_report_builder()
+        self._save_fingerprint_store()
+        self._save_latency_history()
+        self._autosave_run_archive()
+        self.run_metrics.finish()
+        self.root.after(0, self._refresh_metrics_panel)
+        self.root.after(0, lambda: self.toggle_controls(True))
+        self.root.after(0, lambda: self.browser_button.config(text="Start Browser")) # Reset button text
+
+    def _finish_report_builder(self):
+        """Closes the streaming report of the current run. Runs on the automation thread."""
+        builder, self.report_builder = self.report_builder, None
+        if builder is None:
+            return
 
-                    if button_id and button_id not in clicked_button_ids_on_page:
-                        await self.click_button_by_id(button_id)
-                        clicked_button_ids_on_page.add(button_id)
-                        await self.wait_for_network_idle()
+        self.update_status("Finalizing report...")
+        try:
+            report_paths = builder.finish()
+        except Exception as e:
+            print(f"Report Error: {e}")
+            self.update_status(f"Error generating report: {e}")
+            partial_note = f"\nThe report rows were kept at {builder.partial_path}" if builder.partial_path.exists() else ""
+            self.root.after(0, lambda e=e: messagebox.showerror("Report Error", f"Failed to generate report: {e}{partial_note}"))
+            return
 
-                    self.update_status(f"Capturing keyword {i+1}/{num_keywords}: '{keyword_text}' for URL lang '{url_lang}'...")
-                    
-                    select_keyword_event = threading.Event()
-                    self.root.after(0, self._select_keyword_programmatically, keyword_text, select_keyword_event)
-                    select_keyword_event.wait()
-                    await asyncio.sleep(0.5)
+        if report_paths is None:
+            self.root.after(0, lambda: messagebox.showwarning("No Data", "No report data found. Please run the Fast Test first."))
+            return
+        report_list = "\n".join(str(path) for path in report_paths)
+        self.update_status(f"Report saved: {report_list}")
+        self.root.after(0, lambda: messagebox.showinfo("Success", f"Report saved as {report_list}"))
 
-                    sanitized_url = url_str.split('//')[-1].split('/')[0].replace('.', '_')
-                    sanitized_keyword = keyword_text.replace(' ', '_').replace('/', '_')
-                    filename = f"capture_{sanitized_url}_{sanitized_keyword}_{datetime.now().strftime('%Y%m%d%H%M%S')}.png"
-                    output_path = self.captures_dir / filename
+    def _autosave_run_archive(self):
+        """Stores the finished Fast Test as a run archive in the workspace."""
+        if not self.report_data and not self.url_results:
+            return
+        archive_path = self.runs_dir / f"Run_{datetime.now().strftime('%Y%m%d_%H%M%S')}{RunArchive.EXTENSION}"
+        try:
+            RunArchive.write(archive_path, **self._collect_run_archive_data(self.run_keywords))
+            print(f"Run archived to {archive_path}")
+        except Exception as e:
+            print(f"Run archive error: {e}")
+
+    # --- Incremental Runs --- #
+    @staticmethod
+    def _url_key(url_obj):
+        return (url_obj['url'], url_obj['lang'], url_obj.get('num', 1))
+
+    def _reuse_unchanged_urls(self, url_objects):
+        """Reuses stored results for unchanged pages and returns the URLs that need a fresh test."""
+        self.fingerprint_store = FingerprintStore.load(self.fingerprints_path)
+        self.run_fingerprints = {}
+        self.update_status(f"Incremental: checking {len(url_objects)} URL(s) for changes...")
+
+        def probe(url_obj):
+            return FingerprintStore.probe(url_obj['url'], self.fingerprint_store.get(url_obj))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            fingerprints = list(executor.map(probe, url_objects))
+
+        to_test = []
+        for url_obj, fingerprint in zip(url_objects, fingerprints):
+            keyword_hash = FingerprintStore.keyword_hash(self.run_plan.keywords_for(url_obj))
+            stored_result = self.fingerprint_store.reusable_result(url_obj, fingerprint, keyword_hash)
+            if stored_result is not None:
+                self._record_url_result(stored_result, reused=True)
+                continue
+            if fingerprint is not None:
+                self.run_fingerprints[self._url_key(url_obj)] = dict(fingerprint, keyword_hash=keyword_hash)
+            to_test.append(url_obj)
+
+        reused = len(url_objects) - len(to_test)
+        self.run_metrics.set_load(queue_depth=len(to_test))
+        self.update_status(f"Incremental: {reused} unchanged URL(s) reused, {len(to_test)} to test")
+        print(f"Incremental run: reused {reused}, re-testing {len(to_test)} of {len(url_objects)} URL(s)")
+        return to_test
+
+    def _save_fingerprint_store(self):
+        store, self.fingerprint_store = self.fingerprint_store, None
+        self.run_fingerprints = {}
+        if store is None:
+            return
+        try:
+            store.save(self.fingerprints_path)
+        except Exception as e:
+            print(f"Fingerprint store error: {e}")
+
+    def _report_trace_summary(self):
+        """Adds tracing overhead and retained trace bytes of this run to the report and the console."""
+        traces = [result['trace'] for result in self.url_results if result.get('trace')]
+        kept = [trace for trace in traces if trace.get('path')]
+        summary = {
+            "Traced URLs": len(traces),
+            "Traces kept": len(kept),
+            "Trace bytes kept": sum(trace['bytes'] for trace in kept),
+            "Tracing start/stop time (s)": round(sum(trace['seconds'] for trace in traces), 2),
+        }
+        print(f"Tracing: {summary}")
+        if self.report_builder:
+            self.report_builder.run_summary.update(summary)
+
+    def _report_encoding_summary(self):
+        """Adds the screenshot format and the bytes it saved over default PNG to the report and the console."""
+        stats = ScreenshotEncoder.new_stats()
+        for result in self.url_results:
+            encoding = result.get('encoding')
+            if encoding:
+                for key in stats:
+                    stats[key] += encoding[key]
+        if not stats['count']:
+            return
+        summary = {
+            "Screenshot format": f"{self.run_encoder.format_name} (quality {self.run_encoder.quality})"
+                                 if 'quality' in self.run_encoder.options else self.run_encoder.format_name,
+            "Screenshots encoded": stats['count'],
+            "Screenshot bytes": stats['bytes'],
+            "Bytes saved vs PNG (estimated)": ScreenshotEncoder.estimated_savings(stats),
+        }
+        print(f"Screenshots: {summary}")
+        if self.report_builder:
+            self.report_builder.run_summary.update(summary)
 
-                    await self.capture_and_stitch(output_path=output_path, show_success_message=False)
+    def _save_latency_history(self):
+        history, self.latency_history = self.latency_history, None
+        if history is None:
+            return
+        try:
+            history.save(self.latency_history_path)
+        except Exception as e:
+            print(f"Latency history error: {e}")
 
-                    current_logs = self.keyword_matches.get(keyword_text, [])
-                    status = self._get_status_for_keyword(current_logs)
+    def _timeouts_for(self, url_obj):
+        return self.latency_history.timeouts_for(url_obj['url']) if self.latency_history else None
 
-                    self.report_data.append({
-                        'keyword': keyword_text,
-                        'lang': keyword_lang,
-                        'url': url_str,
-                        'status': status or 'N/A',
-                        'screenshot_path': output_path
-                    })
+    async def _orchestrate_all_urls(self, url_objects):
+        """Main async orchestrator to loop through URLs and run tests.
 
-                # 6. Close browser
-                self.update_status(f"Finished with {url_str}. Closing browser.")
-                await context.close()
-                self.browser_context = None
-                self.playwright_page = None
+        A failed URL does not stop the run: retryable failures go to the end of
+        the queue with a backoff delay, the others are reported as failed.
+        """
+        policy = self.retry_policy
+        num_urls = len(url_objects)
+        pending = deque((i, url_obj, 1, 0.0) for i, url_obj in enumerate(url_objects)) # (index, url, attempt, not before)
+        retired_traces = {} # index -> trace stats of attempts that were retried
+        while pending:
+            task = next((task for task in pending if task[3] <= time.monotonic()), None)
+            if task is None:
+                wait = min(task[3] for task in pending) - time.monotonic()
+                self.update_status(f"Waiting {wait:.0f}s before retrying {len(pending)} URL(s)...")
+                await asyncio.sleep(wait)
+                continue
+            pending.remove(task)
+            i, url_obj, attempt, _ = task
+
+            await self.run_on_ui(self.clear_logs) # Clear logs and UI for the new run
+            attempt_note = f" (attempt {attempt}/{policy.max_attempts})" if attempt > 1 else ""
+            self.update_status(f"URL {i+1}/{num_urls}: Starting test for {url_obj['url']}{attempt_note}")
+            self.run_metrics.set_load(queue_depth=len(pending), browsers=1)
+            try:
+                await self._automated_run_for_url(url_obj, attempt, retired_traces.pop(i, None))
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                trace = combine_traces(getattr(e, 'retired_trace', None), getattr(e, 'trace', None), keep=False)
+                if policy.should_retry(error, attempt):
+                    delay = policy.delay(attempt)
+                    print(f"URL {url_obj['url']} failed ({error}); retrying in {delay:.0f}s")
+                    retired_traces[i] = trace
+                    pending.append((i, url_obj, attempt + 1, time.monotonic() + delay))
+                else:
+                    print(f"URL {url_obj['url']} failed after {attempt} attempt(s): {error}")
+                    self._record_url_result(failed_url_result(
+                        url_obj, None, error, attempt,
+                        combine_traces(getattr(e, 'retired_trace', None), getattr(e, 'trace', None)),
+                        keywords=self.run_plan.keywords_for(url_obj)
+                    ))
 
-        finally:
-            if os.path.exists(user_data_dir):
-                try:
-                    shutil.rmtree(user_data_dir)
-                except Exception as e:
-                    print(f"Failed to clean up temp dir: {e}")
+    async def _automated_run_for_url(self, url_obj, attempt=1, retired_trace=None):
+        """Runs the full test-and-screenshot cycle for a single URL, mirrored in the GUI.
 
-    def _select_keyword_programmatically(self, keyword_to_select, event_to_set):
-        """Selects a keyword and forces the log view to filter. Must be called from main thread."""
+        `retired_trace` is the trace stats of earlier attempts at this URL (see combine_traces).
+        """
+        runner = UrlTestRunner(
+            url_obj,
+            None,
+            self.captures_dir,
+            keywords=self.run_plan.keywords_for(url_obj),
+            incognito=self.run_incognito,
+            timeouts=self._timeouts_for(url_obj),
+            trace_dir=self.traces_dir if self.trace_failures else None,
+            encoder=self.run_encoder,
+            batch_clicks=self.run_batch_clicks,
+            on_status=self.update_status,
+            on_log=lambda record: self.root.after(0, self.insert_log, record),
+            on_page=self._set_automation_page,
+            before_capture=self._show_keyword_capture,
+            capture=self._capture_keyword,
+        )
+        playwright = await self.automation.playwright()
         try:
-            all_keyword_texts = self._get_raw_keywords()
-            if keyword_to_select in all_keyword_texts:
-                idx = all_keyword_texts.index(keyword_to_select)
-                
-                # Directly set the active filter and update the view
-                self.active_filter_keyword = keyword_to_select
-                self.keyword_listbox.selection_clear(0, tk.END)
-                self.keyword_listbox.selection_set(idx)
-                self._refresh_log_view() # This now shows only the filtered logs
-        finally:
-            event_to_set.set()
+            result = await runner.run(playwright)
+        except Exception as e:
+            e.trace, e.retired_trace = runner.trace, retired_trace # Kept and linked only if the URL finally fails
+            raise
+        result['trace'] = combine_traces(retired_trace, result['trace'])
+        self._record_url_result(mark_attempts(result, attempt))
+
+    def _set_automation_page(self, context, page):
+        """Exposes the runner's browser to the manual controls (Screenshot, Test)."""
+        self.browser_context = context
+        self.playwright_page = page
+
+    async def _show_keyword_capture(self, keyword_text):
+        """Filters the log view to the keyword about to be captured."""
+        await self.run_on_ui(self._select_keyword_programmatically, keyword_text)
+        if self.ui_state['gui_capture'] == "Screen Grab":
+            await asyncio.sleep(0.5) # Let the window repaint before it is grabbed
+
+    async def _capture_keyword(self, page, output_path, keyword_text, status, matched_logs):
+        return await self.capture_and_stitch(
+            output_path=output_path,
+            show_success_message=False,
+            panel_data=(keyword_text, status, matched_logs),
+            page_capture=self.run_page_capture,
+            encoder=self.run_encoder
+        )
 
+    def _record_url_result(self, result, add_to_report=True, reused=False):
+        """Adds a finished URL's report rows and logs to the current run."""
+        if add_to_report: # Sharded runs count results as workers deliver them
+            self.run_metrics.record_result(result, reused)
+        for report_row in result['report_rows']:
+            self.report_data.append(report_row)
+            if add_to_report and self.report_builder:
+                self.report_builder.add_row(report_row)
+        if add_to_report and self.report_builder and result.get('performance'):
+            self.report_builder.add_performance(result['performance'])
+        self.url_results.append({
+            key: result[key] for key in ('url', 'lang', 'num', 'logs', 'statuses', 'performance', 'attempts', 'error', 'trace', 'encoding')
+            if key in result
+        })
+
+        if self.latency_history is not None and result.get('latency'):
+            self.latency_history.record(result['url'], result['latency'])
+
+        fingerprint = self.run_fingerprints.pop(self._url_key(result), None)
+        if self.fingerprint_store is not None and fingerprint is not None and not result.get('error'):
+            self.fingerprint_store.put(result, fingerprint)
+
+    async def _run_sharded_fast_test(self, url_objects, worker_count):
+        """Runs Fast Test across worker processes and merges their results in URL order.
+
+        The coordinator blocks, so it runs in an executor; cancelling the job
+        stops handing out URLs and keeps the results finished so far.
+        """
+        def on_result(task_index, result):
+            # Stream rows to the live report as soon as any worker finishes a URL
+            self.run_metrics.record_result(result)
+            if self.report_builder:
+                for report_row in result['report_rows']:
+                    self.report_builder.add_row(report_row)
+                if result.get('performance'):
+                    self.report_builder.add_performance(result['performance'])
+
+        coordinator = FastTestCoordinator(
+            url_objects,
+            self.run_plan.keyword_objects,
+            self.captures_dir,
+            worker_count=worker_count,
+            retry_policy=self.retry_policy,
+            trace_dir=self.traces_dir if self.trace_failures else None,
+            page_capture=self.run_page_capture,
+            encoder=self.run_encoder,
+            batch_clicks=self.run_batch_clicks,
+            metrics=self.run_metrics,
+            incognito=self.run_incognito,
+            timeouts={url_obj['url']: self._timeouts_for(url_obj) for url_obj in url_objects},
+            on_status=self.update_status,
+            on_result=on_result,
+        )
+        coordinator_run = asyncio.get_running_loop().run_in_executor(None, coordinator.run)
+        try:
+            results = await asyncio.shield(coordinator_run)
+        except asyncio.CancelledError:
+            coordinator.cancel()
+            for result in await coordinator_run:
+                self._record_url_result(result, add_to_report=False)
+            raise
+        for result in results:
+            self._record_url_result(result, add_to_report=False)
+
+    def _select_keyword_programmatically(self, keyword_to_select):
+        """Selects a keyword and forces the log view to filter. Must be called from main thread."""
+        all_keyword_texts = self._get_raw_keywords()
+        if keyword_to_select in all_keyword_texts:
+            idx = all_keyword_texts.index(keyword_to_select)
+            
+            # Directly set the active filter and update the view
+            self.active_filter_keyword = keyword_to_select
+            self.keyword_listbox.selection_clear(0, tk.END)
+            self.keyword_listbox.selection_set(idx)
+            self._refresh_log_view() # This now shows only the filtered logs
 
-    async def wait_for_network_idle(self, idle_duration=3):
-        """Waits until no new logs have been added for `idle_duration` seconds."""
-        self.update_status("Waiting for network to become idle...")
-        while True:
-            last_log_count = len(self.all_logs)
-            await asyncio.sleep(idle_duration)
-            if len(self.all_logs) == last_log_count:
-                self.update_status("Network is idle. Proceeding...")
-                break
 
     def start_test_thread(self):
         if not self.playwright_page or self.playwright_page.is_closed():
@@ -680,17 +1367,11 @@ class TaggingAutomationApp:
             return
 
         self.test_button.config(state=tk.DISABLED)
-        thread = threading.Thread(target=self.run_element_test, daemon=True)
-        thread.start()
-
-    def run_element_test(self):
-        try:
-            future = asyncio.run_coroutine_threadsafe(self.async_run_test(), self.playwright_loop)
-            future.result() # Wait for the async test to complete
-        except Exception as e:
-            print(f"Error during element test: {e}")
-        finally:
-            self.root.after(0, lambda: self.test_button.config(state=tk.NORMAL))
+        self.automation.submit(
+            "Element Test",
+            self.async_run_test,
+            on_done=lambda job: self.root.after(0, lambda: self.test_button.config(state=tk.NORMAL))
+        )
     
     async def async_run_test(self):
         page = self.playwright_page
@@ -742,36 +1423,21 @@ class TaggingAutomationApp:
             for p in pages_to_close:
                 await p.close()
 
-    async def click_button_by_id(self, button_id):
-        if not self.playwright_page or self.playwright_page.is_closed():
-            return
-
-        try:
-            button_selector = f"#{button_id}"
-            element = self.playwright_page.locator(button_selector).first
-            
-            if await element.count() == 0:
-                return
-
-            if not await element.is_visible():
-                return
-
-            if not await element.is_enabled():
-                return
-
-            await element.click(timeout=5000)
-
-        except Exception as e:
-            print(f"Error clicking element with ID '{button_id}': {e}")
+    def clear_logs(self):
+        """Clears the captured logs and keyword matches, keeping the keyword list."""
+        self.log_load_generation += 1 # Stops loading the logs of a run archive
+        self.all_logs = LogTable()
+        self.keyword_matches = {}
+        self.active_filter_keyword = None
+        self._perform_matching_and_update_list()
+        self._refresh_log_view()
 
     def clear_all(self):
         """Clears all logs and keywords."""
-        self.all_logs = []
+        removed_keywords = self._get_keyword_objects()
         self.keyword_listbox.delete(0, tk.END)
-        self.keyword_matches = {}
-        self.active_filter_keyword = None
-        self._refresh_log_view()
-        self._save_keyword_state()
+        self.clear_logs()
+        self._record_keyword_edit(("delete", 0, removed_keywords))
 
     def _on_keyword_click(self, event):
         """Handles clicking on a keyword to load it for editing and toggle filtering."""
@@ -809,34 +1475,70 @@ class TaggingAutomationApp:
 
 
     def _refresh_log_view(self):
-        """Refreshes the main log tree based on the active filter."""
-        for item in self.log_tree.get_children():
-            self.log_tree.delete(item)
-        
-        logs_to_display = []
+        """Refreshes the main log tree based on the active filter and sort order."""
+        children = self.log_tree.get_children()
+        if children:
+            self.log_tree.delete(*children)
+
+        # The view is kept in ascending key order (or arrival order when unsorted)
         if self.active_filter_keyword:
-            logs_to_display = self.keyword_matches.get(self.active_filter_keyword, [])
+            view_indices = list(self.keyword_matches.get(self.active_filter_keyword, []))
         else:
-            logs_to_display = self.all_logs
-        
-        for log in logs_to_display:
-            self.log_tree.insert("", tk.END, values=log)
+            view_indices = list(range(len(self.all_logs)))
+        if self.log_sort:
+            key_fn = self._log_sort_key_fn(self.log_sort[0])
+            keys = [key_fn(index) for index in view_indices]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._view_sort_keys = [keys[i] for i in order]
+            self._view_logs = [view_indices[i] for i in order]
+        else:
+            self._view_sort_keys = []
+            self._view_logs = view_indices
+
+        display_logs = reversed(self._view_logs) if self.log_sort and self.log_sort[1] else self._view_logs
+        row = self.all_logs.row
+        self._view_items = [self.log_tree.insert("", tk.END, values=row(index)) for index in display_logs]
+        if self.log_sort and self.log_sort[1]:
+            self._view_items.reverse()
         
-        if not self.active_filter_keyword:
+        if not self.active_filter_keyword and not self.log_sort:
             self.log_tree.yview_moveto(1)
 
+    def _log_sort_key_fn(self, col):
+        """Returns a sort key function (row index -> key) for one log column, read from the typed columns."""
+        return self.all_logs.sort_key_fn(col)
+
+    def _insert_log_into_view(self, index):
+        """Adds one log row to the visible tree, keeping the active sort order."""
+        values = self.all_logs.row(index)
+        if not self.log_sort:
+            self._view_logs.append(index)
+            self._view_items.append(self.log_tree.insert("", tk.END, values=values))
+            self.log_tree.yview_moveto(1)
+            return
+
+        col, reverse = self.log_sort
+        key = self._log_sort_key_fn(col)(index)
+        pos = bisect.bisect_right(self._view_sort_keys, key)
+        self._view_sort_keys.insert(pos, key)
+        self._view_logs.insert(pos, index)
+        tree_index = len(self._view_logs) - 1 - pos if reverse else pos
+        self._view_items.insert(pos, self.log_tree.insert("", tree_index, values=values))
+
     def sort_treeview(self, col, reverse):
-        """Sorts the treeview columns."""
+        """Sorts the log view by a column using the log data, then reorders the tree in one call."""
         try:
-            data = [(self.log_tree.set(item, col), item) for item in self.log_tree.get_children('')]
-            # Attempt to sort numerically if possible
-            try:
-                data.sort(key=lambda t: float(t[0]), reverse=reverse)
-            except ValueError:
-                data.sort(key=lambda t: t[0], reverse=reverse)
+            key_fn = self._log_sort_key_fn(col)
+            keys = [key_fn(index) for index in self._view_logs]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+
+            self._view_sort_keys = [keys[i] for i in order]
+            self._view_logs = [self._view_logs[i] for i in order]
+            self._view_items = [self._view_items[i] for i in order]
+            self.log_sort = (col, reverse)
 
-            for index, (val, item) in enumerate(data):
-                self.log_tree.move(item, '', index)
+            display_items = self._view_items[::-1] if reverse else self._view_items
+            self.log_tree.set_children("", *display_items)
 
             self.log_tree.heading(col, command=lambda: self.sort_treeview(col, not reverse))
         except Exception as e:
@@ -850,11 +1552,7 @@ class TaggingAutomationApp:
 
     def close_browser(self):
         if self.playwright_page and not self.playwright_page.is_closed():
-             # Thread safe close
-             try:
-                self.playwright_loop.call_soon_threadsafe(lambda: asyncio.create_task(self.playwright_page.close()))
-             except Exception as e:
-                 print(f"Error closing browser: {e}")
+            self.automation.submit("Close Browser", self.playwright_page.close)
 
     def start_browser_thread(self):
         display_url = self.url_var.get().strip()
@@ -879,113 +1577,99 @@ class TaggingAutomationApp:
         
         self.browser_button.config(text="Close Browser")
         
-        thread = threading.Thread(target=self.run_playwright, args=(url_to_run, mode), daemon=True)
-        thread.start()
+        self.automation.submit("Browser", self.run_playwright, url_to_run, mode)
 
-    def run_playwright(self, url, mode):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        self.playwright_loop = loop
+    async def run_playwright(self, url, mode):
         try:
-            loop.run_until_complete(self.async_playwright_main(url, mode))
+            await self.async_playwright_main(url, mode)
         except Exception as e:
             print(f"Playwright Error: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Browser Error: {e}"))
+            self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Browser Error: {e}"))
         finally:
             self.root.after(0, self.reset_button)
-            loop.close()
 
     def reset_button(self):
         self.browser_button.config(text="Start Browser", state=tk.NORMAL)
         self.playwright_page = None
+        if self.startup_benchmark:
+            self.on_close()
 
     async def async_playwright_main(self, url, mode):
         # Create a temporary directory for user data
         user_data_dir = tempfile.mkdtemp()
         
-        async with async_playwright() as p:
-            # Determine executable path
-            chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            launch_options = {
-                "headless": False,
-                "args": [],
-            }
-            
-            if os.path.exists(chrome_path):
-                launch_options["executable_path"] = chrome_path
-            else:
-                print("Custom Chrome path not found, using default Chromium.")
+        p = await self.automation.playwright()
+        # Determine executable path
+        chrome_path = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+        launch_options = {
+            "headless": False,
+            "args": [],
+        }
+        
+        if os.path.exists(chrome_path):
+            launch_options["executable_path"] = chrome_path
+        else:
+            print("Custom Chrome path not found, using default Chromium.")
 
-            if mode == "Incognito":
-                launch_options["args"].append("--incognito")
+        if mode == "Incognito":
+            launch_options["args"].append("--incognito")
 
-            # Launch Persistent Context
-            # This is key: launch_persistent_context behaves more like a real user launch
-            context = await p.chromium.launch_persistent_context(user_data_dir, **launch_options)
-            self.browser_context = context
-            
-            # Get the default page or create new if none
-            page = context.pages[0] if context.pages else await context.new_page()
-            self.playwright_page = page
+        # Launch Persistent Context
+        # This is key: launch_persistent_context behaves more like a real user launch
+        context = await p.chromium.launch_persistent_context(user_data_dir, **launch_options)
+        self.browser_context = context
+        
+        # Get the default page or create new if none
+        page = context.pages[0] if context.pages else await context.new_page()
+        self.playwright_page = page
 
-            # Setup Network Interception
-            page.on("response", lambda response: self.handle_response(response))
+        # Setup Network Interception (logged once the response body is done, with timing and sizes)
+        page.on("requestfinished", self.handle_request_done)
+        page.on("requestfailed", self.handle_request_done)
 
+        try:
+            print(f"Navigating to {url}")
+            self.navigation_start = LogTable.now()
+            await page.goto(url)
+            self._mark_startup('first_navigation')
+            
+            # Keep the browser open until closed by user
+            # We monitor the close event
+            close_event = asyncio.Event()
+            page.on("close", lambda: close_event.set())
+            if self.startup_benchmark:
+                await page.close() # Benchmark run ends after the first navigation
+            
+            # Wait until the page is closed
+            await close_event.wait()
+            
+        except Exception as e:
+            print(f"Navigation/Runtime Error: {e}")
+        finally:
+            await context.close()
+            # Clean up temporary user data dir
             try:
-                print(f"Navigating to {url}")
-                await page.goto(url)
-                
-                # Keep the browser open until closed by user
-                # We monitor the close event
-                close_event = asyncio.Event()
-                page.on("close", lambda: close_event.set())
-                
-                # Wait until the page is closed
-                await close_event.wait()
-                
-            except Exception as e:
-                print(f"Navigation/Runtime Error: {e}")
-            finally:
-                await context.close()
-                # Clean up temporary user data dir
-                try:
-                    shutil.rmtree(user_data_dir)
-                except Exception as cleanup_error:
-                    print(f"Failed to clean up temp dir: {cleanup_error}")
+                shutil.rmtree(user_data_dir)
+            except Exception as cleanup_error:
+                print(f"Failed to clean up temp dir: {cleanup_error}")
 
-    def handle_response(self, response):
+    async def handle_request_done(self, request):
+        """Logs a finished or failed request of the manually started browser."""
         try:
-            # Extract relevant data
-            url = response.url
-            name = url.split('/')[-1]
-            if not name:
-                name = url
-
-            status = response.status
-            method = response.request.method
-            resource_type = response.request.resource_type
-            size = response.headers.get('content-length', 'N/A')
-            timestamp = datetime.now().strftime("%H:%M:%S %d/%m/%Y")
-
-            # Get current URL from the main app and hash it
-            current_url = self.url_var.get()
-            url_hash = str(hash(current_url))[-8:] if current_url else "N/A"
-
+            record = await request_log_record(request, self.navigation_start, self.ui_state['url_hash'])
             # Schedule GUI update on main thread
-            # Columns: "name", "status", "method", "type", "size", "time", "url_hash"
-            log_values = (name, status, method, resource_type, size, timestamp, url_hash)
-            self.root.after(0, self.insert_log, log_values)
+            self.root.after(0, self.insert_log, record)
 
         except Exception as e:
             print(f"Error handling response: {e}")
 
-    def insert_log(self, values):
-        self.all_logs.append(values)
+    def insert_log(self, record):
+        """Appends a LogTable record (typed values, see LogTable.append) to the log."""
+        index = self.all_logs.append(*record)
         
         # If no filter is active, or if the new log matches the active filter, add it to the view
-        if not self.active_filter_keyword or self.active_filter_keyword in values[0]:
-            self.log_tree.insert("", tk.END, values=values)
-            self.log_tree.yview_moveto(1)
+        if not self.active_filter_keyword or self.active_filter_keyword in str(record[0]):
+            self._insert_log_into_view(index)
 
         # Debounce the keyword match analysis
         if self.update_timer:
@@ -1022,19 +1706,16 @@ class TaggingAutomationApp:
             return
 
         # Check for duplicates (text, lang, num) excluding the item being edited
-        all_keyword_objects = self._get_keyword_objects()
-        for i, obj in enumerate(all_keyword_objects):
-            if i != selected_index and \
-               obj['text'] == new_text and \
-               obj['lang'] == new_lang_short and \
-               obj.get('num', 1) == int(new_num):
-                messagebox.showwarning("Duplicate Keyword", f"The keyword with this text, lang, and num already exists.")
-                # Revert to original text
-                self.is_updating_ui = True
-                original_obj = self._parse_keyword_display_string(self.keyword_listbox.get(selected_index))
-                self.keyword_text_var.set(original_obj['text'])
-                self.is_updating_ui = False
-                return
+        original_obj = self._parse_keyword_display_string(self.keyword_listbox.get(selected_index))
+        new_key = (new_text, new_lang_short, int(new_num))
+        own_count = 1 if self._keyword_key(original_obj) == new_key else 0
+        if self.keyword_keys[new_key] - own_count > 0:
+            messagebox.showwarning("Duplicate Keyword", f"The keyword with this text, lang, and num already exists.")
+            # Revert to original text
+            self.is_updating_ui = True
+            self.keyword_text_var.set(original_obj['text'])
+            self.is_updating_ui = False
+            return
         
         # Update the listbox item
         self.is_updating_ui = True # Prevent re-triggering
@@ -1053,7 +1734,9 @@ class TaggingAutomationApp:
         self.is_updating_ui = False
 
         self._perform_matching_and_update_list()
-        self._save_keyword_state()
+        new_obj = self._parse_keyword_display_string(new_display_string)
+        if new_obj != original_obj:
+            self._record_keyword_edit(("update", selected_index, original_obj, new_obj))
 
     def add_keyword(self):
         """Adds a single keyword from the entry box with its language attribute."""
@@ -1067,16 +1750,15 @@ class TaggingAutomationApp:
             return
 
         # Prevent duplicates based on text, lang, and num
-        new_keyword_obj = {'text': keyword_text, 'lang': keyword_lang_short, 'num': int(keyword_num)}
-        all_keyword_objects = self._get_keyword_objects()
-        for obj in all_keyword_objects:
-            if obj['text'] == new_keyword_obj['text'] and obj['lang'] == new_keyword_obj['lang'] and obj.get('num', 1) == new_keyword_obj['num']:
-                messagebox.showwarning("Duplicate", "This exact keyword (text, lang, num) already exists.")
-                return
+        if self.keyword_keys[(keyword_text, keyword_lang_short, int(keyword_num))]:
+            messagebox.showwarning("Duplicate", "This exact keyword (text, lang, num) already exists.")
+            return
 
         id_part = f" {{{button_id}}}" if button_id else ""
         display_string = f"[{keyword_num}] [{keyword_lang_short}] {keyword_text}{id_part}"
+        insert_index = self.keyword_listbox.size()
         self.keyword_listbox.insert(tk.END, display_string)
+        self._record_keyword_edit(("insert", insert_index, [self._parse_keyword_display_string(display_string)]))
         
         # Clear inputs for next entry
         self.is_updating_ui = True
@@ -1084,32 +1766,84 @@ class TaggingAutomationApp:
         self.is_updating_ui = False
         
         self._perform_matching_and_update_list()
-        self._save_keyword_state()
 
     def bulk_add_from_clipboard(self):
-        """Adds multiple keywords from clipboard, using the selected language."""
+        """Adds multiple keywords from clipboard, using the selected language and num."""
         try:
             clipboard_content = self.root.clipboard_get()
         except tk.TclError:
             messagebox.showwarning("Paste Error", "Could not read text from clipboard.")
             return
         
-        keywords_to_add = clipboard_content.splitlines()
-        existing_keywords_text = self._get_raw_keywords()
-        selected_lang = self.lang_var.get()
-        
-        added_count = 0
-        for keyword_text in keywords_to_add:
-            keyword_text = keyword_text.strip()
-            if keyword_text and keyword_text not in existing_keywords_text:
-                display_string = f"[{selected_lang}] {keyword_text}"
-                self.keyword_listbox.insert(tk.END, display_string)
-                existing_keywords_text.append(keyword_text) # Prevent re-adding from same paste
-                added_count += 1
-        
-        if added_count > 0:
-            self._perform_matching_and_update_list()
-            self._save_keyword_state()
+        selected_lang = self.LANG_MAP.get(self.lang_var.get(), "tc")
+        try:
+            selected_num = int(self.keyword_num_var.get().strip())
+        except ValueError:
+            selected_num = 1
+
+        self._add_keywords_batch(
+            {'text': line.strip(), 'lang': selected_lang, 'num': selected_num, 'button_id': ''}
+            for line in clipboard_content.splitlines() if line.strip()
+        )
+
+    def import_keywords_from_file(self):
+        """Imports keywords from a CSV or XLSX tagging spec with a column mapping step."""
+        file_path = filedialog.askopenfilename(
+            title="Import Keywords",
+            initialdir=self.sessions_dir,
+            filetypes=[("Spreadsheets", "*.csv *.xlsx"), ("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        try:
+            importer = KeywordImporter(file_path, self.LANG_MAP)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Failed to read {os.path.basename(file_path)}: {e}")
+            return
+        if not importer.headers:
+            messagebox.showwarning("Import Error", "The file has no header row.")
+            return
+
+        dialog = KeywordImportDialog(self.root, importer)
+        if dialog.column_map is None:
+            return # User cancelled
+
+        default_lang = self.LANG_MAP.get(self.lang_var.get(), "tc")
+        try:
+            default_num = int(self.keyword_num_var.get().strip())
+        except ValueError:
+            default_num = 1
+
+        start_time = time.perf_counter()
+        keyword_objects = importer.iter_keywords(dialog.column_map, default_lang, default_num)
+        added_count = self._add_keywords_batch(keyword_objects)
+        elapsed = time.perf_counter() - start_time
+        skipped_count = importer.row_count - added_count
+        self.update_status(
+            f"Imported {added_count} keywords from {os.path.basename(file_path)} "
+            f"({skipped_count} skipped as empty or duplicate) in {elapsed:.2f}s"
+        )
+
+    def _add_keywords_batch(self, keyword_objects):
+        """Appends keywords in a single listbox insert, skipping (text, lang, num) duplicates. Returns the added count."""
+        batch_keys = set()
+        new_keywords = []
+        for obj in keyword_objects:
+            key = self._keyword_key(obj)
+            if key in batch_keys or self.keyword_keys[key]:
+                continue
+            batch_keys.add(key)
+            new_keywords.append(obj)
+
+        if not new_keywords:
+            return 0
+
+        insert_index = self.keyword_listbox.size()
+        self.keyword_listbox.insert(tk.END, *[self._format_keyword_display_string(obj) for obj in new_keywords])
+        self._record_keyword_edit(("insert", insert_index, new_keywords))
+        self._perform_matching_and_update_list()
+        return len(new_keywords)
 
     def remove_selected_keyword_event(self, event=None):
         """Wrapper for keyboard-based deletion of selected keyword."""
@@ -1121,13 +1855,15 @@ class TaggingAutomationApp:
         if not selected_indices:
             return
         
+        delete_ops = []
         for i in sorted(selected_indices, reverse=True):
+            delete_ops.append(("delete", i, [self._parse_keyword_display_string(self.keyword_listbox.get(i))]))
             self.keyword_listbox.delete(i)
+        self._record_keyword_edit(*delete_ops)
         
         self.active_filter_keyword = None
         self._perform_matching_and_update_list()
         self._refresh_log_view()
-        self._save_keyword_state()
 
     def remove_all_keywords(self, confirmed=False):
         """Removes all keywords from the list after confirmation."""
@@ -1135,11 +1871,12 @@ class TaggingAutomationApp:
             return
         
         if confirmed or messagebox.askyesno("Confirm", "Are you sure you want to remove all keywords?"):
+            removed_keywords = self._get_keyword_objects()
             self.keyword_listbox.delete(0, tk.END)
+            self._record_keyword_edit(("delete", 0, removed_keywords))
             self.active_filter_keyword = None
             self._perform_matching_and_update_list()
             self._refresh_log_view()
-            self._save_keyword_state()
 
     def _parse_keyword_display_string(self, display_string):
         """Parses '[num] [lang] text {button_id} (status)' into a dictionary."""
@@ -1192,70 +1929,63 @@ class TaggingAutomationApp:
             url = url_part
             return {'url': url.strip(), 'lang': lang.strip(), 'num': num}
         except (ValueError, IndexError):
-            return {'url': display_string, 'lang': 'tc', 'num': 1}
-
-    def _save_keyword_state(self):
-        """Saves the current keyword object list to the undo stack."""
-        current_state = self._get_keyword_objects()
-        if not self.undo_stack or self.undo_stack[-1] != current_state:
-            self.undo_stack.append(current_state)
-            self.redo_stack.clear()
-
-    def _restore_keyword_state(self, state):
-        """Restores the keyword listbox from a given state of keyword objects."""
-        self.keyword_listbox.delete(0, tk.END)
-        for keyword_obj in state:
-            id_part = f" {{{keyword_obj['button_id']}}}" if keyword_obj.get('button_id') else ""
-            display_string = f"[{keyword_obj.get('num', 1)}] [{keyword_obj['lang']}] {keyword_obj['text']}{id_part}"
-            self.keyword_listbox.insert(tk.END, display_string)
-        self._perform_matching_and_update_list()
-        self._refresh_log_view()
+            return {'url': display_string.strip(), 'lang': 'tc', 'num': 1}
+
+    def _format_keyword_display_string(self, keyword_obj):
+        """Formats a keyword object as '[num] [lang] text {button_id}'."""
+        id_part = f" {{{keyword_obj['button_id']}}}" if keyword_obj.get('button_id') else ""
+        return f"[{keyword_obj.get('num', 1)}] [{keyword_obj['lang']}] {keyword_obj['text']}{id_part}"
+
+    def _keyword_key(self, keyword_obj):
+        return (keyword_obj['text'], keyword_obj['lang'], keyword_obj.get('num', 1))
+
+    def _index_keyword_edit(self, op):
+        """Keeps `keyword_keys` in sync with one EditHistory operation."""
+        kind = op[0]
+        if kind == "insert":
+            removed, added = (), op[2]
+        elif kind == "delete":
+            removed, added = op[2], ()
+        else:
+            removed, added = (op[2],), (op[3],)
+
+        for obj in removed:
+            key = self._keyword_key(obj)
+            self.keyword_keys[key] -= 1
+            if self.keyword_keys[key] <= 0:
+                del self.keyword_keys[key]
+        for obj in added:
+            self.keyword_keys[self._keyword_key(obj)] += 1
+
+    def _record_keyword_edit(self, *ops):
+        """Records an edit that was just made to the keyword listbox."""
+        for op in ops:
+            self._index_keyword_edit(op)
+        self.keyword_history.record(*ops)
+
+    def _apply_keyword_edit(self, op):
+        """Applies one EditHistory operation to the keyword listbox."""
+        self._index_keyword_edit(op)
+        kind, index = op[0], op[1]
+        if kind == "insert":
+            self.keyword_listbox.insert(index, *[self._format_keyword_display_string(obj) for obj in op[2]])
+        elif kind == "delete":
+            self.keyword_listbox.delete(index, index + len(op[2]) - 1)
+        else:
+            self.keyword_listbox.delete(index)
+            self.keyword_listbox.insert(index, self._format_keyword_display_string(op[3]))
 
     def undo_keywords(self, event=None):
         """Undoes the last keyword change."""
-        if len(self.undo_stack) <= 1: # Can't undo past the initial state
-            return
-
-        state_for_redo = self.undo_stack.pop()
-        self.redo_stack.append(state_for_redo)
-
-        state_to_restore = self.undo_stack[-1]
-        self._restore_keyword_state(state_to_restore)
+        if self.keyword_history.undo(self._apply_keyword_edit):
+            self._perform_matching_and_update_list()
+            self._refresh_log_view()
 
     def redo_keywords(self, event=None):
         """Redoes the last undone keyword change."""
-        if not self.redo_stack:
-            return
-
-        state_to_restore = self.redo_stack.pop()
-        self.undo_stack.append(state_to_restore)
-        self._restore_keyword_state(state_to_restore)
-
-    def _get_status_for_keyword(self, logs):
-        """Determines the status (PASS, FAILED) for a given list of logs."""
-        if not logs:
-            return "STANDBY"
-
-        has_failed = False
-        all_pass = True
-
-        for log in logs:
-            try:
-                status_code = int(log[1]) # Status is the second item
-                if 400 <= status_code < 500:
-                    return "FAILED" # Immediate failure
-                elif not (200 <= status_code < 400):
-                    # It's a number but not a 2xx or 3xx code (e.g. 5xx).
-                    all_pass = False
-            except (ValueError, IndexError):
-                # Status is not a valid integer or log format is unexpected.
-                all_pass = False
-
-        if all_pass:
-            return "PASS"
-        else:
-            # Not a FAILED state, but not a clear PASS state either.
-            return None
+        if self.keyword_history.redo(self._apply_keyword_edit):
+            self._perform_matching_and_update_list()
+            self._refresh_log_view()
 
     def _perform_matching_and_update_list(self):
         """Core function to match logs against keywords and update the listbox UI."""
@@ -1270,7 +2000,7 @@ class TaggingAutomationApp:
 
         for obj in keyword_objects:
             keyword_text = obj['text']
-            self.keyword_matches[keyword_text] = [log for log in self.all_logs if keyword_text in str(log[0])]
+            self.keyword_matches[keyword_text] = self.all_logs.match(keyword_text)
 
         self.keyword_listbox.delete(0, tk.END)
         
@@ -1280,8 +2010,7 @@ class TaggingAutomationApp:
             keyword_num = obj.get('num', 1)
             button_id = obj.get('button_id', '')
             
-            matched_logs = self.keyword_matches.get(keyword_text, [])
-            status = self._get_status_for_keyword(matched_logs)
+            status = self.all_logs.status_of(self.keyword_matches.get(keyword_text, []))
 
             id_part = f" {{{button_id}}}" if button_id else ""
             display_string = f"[{keyword_num}] [{keyword_lang}] {keyword_text}{id_part}"
@@ -1350,10 +2079,11 @@ class TaggingAutomationApp:
                         loaded_urls.append({'url': item, 'lang': 'tc', 'num': 1}) # Old format
             elif 'url' in session_data: # Even older format
                 loaded_urls.append({'url': session_data['url'], 'lang': 'tc', 'num': 1})
-            self.update_urls(loaded_urls)
+            self.update_urls(URLStore(loaded_urls).records) # Canonicalize and drop duplicate pages
             
             # --- Load Keywords (with backward compatibility) ---
             if 'keywords' in session_data and isinstance(session_data['keywords'], list):
+                previous_keywords = self._get_keyword_objects()
                 self.keyword_listbox.delete(0, tk.END)
                 for item in session_data['keywords']:
                     if isinstance(item, dict) and 'text' in item and 'lang' in item:
@@ -1366,13 +2096,205 @@ class TaggingAutomationApp:
                         display_string = f"[1] [tc] {item.strip()}"
                         self.keyword_listbox.insert(tk.END, display_string)
                 
+                self._record_keyword_edit(
+                    ("delete", 0, previous_keywords),
+                    ("insert", 0, self._get_keyword_objects())
+                )
                 self._perform_matching_and_update_list()
-                self._save_keyword_state()
                 self.update_status(f"Session loaded from {os.path.basename(file_path)}")
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load session: {e}")
 
+    # --- Run Archives --- #
+
+    def _aggregate_keyword_statuses(self, report_data):
+        """Worst status per keyword across all URLs: FAILED, then N/A, then PASS."""
+        severity = {"PASS": 0, "STANDBY": 1, "N/A": 2, "FAILED": 3}
+        statuses = {}
+        for item in report_data:
+            current = statuses.get(item['keyword'])
+            if current is None or severity.get(item['status'], 2) > severity.get(current, 2):
+                statuses[item['keyword']] = item['status']
+        return statuses
+
+    def _collect_run_archive_data(self, keyword_objects):
+        """Gathers everything a run archive stores. Must not touch Tk widgets."""
+        url_results = self.url_results
+        if not url_results and self.all_logs:
+            # Manual browsing session: archive the current logs as a single result
+            url_results = [{
+                'url': self.ui_state.get('url', ""),
+                'lang': "", 'num': 1,
+                'logs': self.all_logs,
+                'statuses': {text: self.all_logs.status_of(indices) or 'N/A' for text, indices in self.keyword_matches.items()},
+            }]
+
+        keyword_statuses = self._aggregate_keyword_statuses(self.report_data)
+        if not keyword_statuses:
+            keyword_statuses = {text: self.all_logs.status_of(indices) for text, indices in self.keyword_matches.items()}
+
+        return {
+            'session': {'urls': list(self.urls), 'keywords': list(keyword_objects)},
+            'keyword_statuses': keyword_statuses,
+            'report_data': list(self.report_data),
+            'url_results': url_results,
+        }
+
+    def save_run_archive(self):
+        """Saves the session, logs, statuses and report rows of the current run."""
+        if not self.all_logs and not self.report_data and not self.url_results:
+            messagebox.showinfo("Info", "There is no run data to save.")
+            return
+
+        file_path = filedialog.asksaveasfilename(
+            initialdir=self.runs_dir,
+            initialfile=f"Run_{datetime.now().strftime('%Y%m%d_%H%M%S')}{RunArchive.EXTENSION}",
+            defaultextension=RunArchive.EXTENSION,
+            filetypes=[("Run archives", f"*{RunArchive.EXTENSION}"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        archive_data = self._collect_run_archive_data(self._get_keyword_objects())
+        self.update_status("Saving run archive...")
+
+        def write_archive():
+            try:
+                RunArchive.write(file_path, **archive_data)
+                self.update_status(f"Run saved to {os.path.basename(file_path)}")
+            except Exception as e:
+                self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to save run: {e}"))
+
+        threading.Thread(target=write_archive, daemon=True).start()
+
+    def load_run_archive(self):
+        """Opens a run archive: session and statuses at once, logs streamed in the background."""
+        file_path = filedialog.askopenfilename(
+            initialdir=self.runs_dir,
+            filetypes=[("Run archives", f"*{RunArchive.EXTENSION}"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+
+        try:
+            archive = RunArchive(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load run: {e}")
+            return
+
+        # --- Session, statuses and report rows (manifest only) ---
+        session = archive.session
+        self.update_urls(URLStore(session.get('urls', [])).records)
+        previous_keywords = self._get_keyword_objects()
+        loaded_keywords = session.get('keywords', [])
+        display_strings = []
+        for keyword_obj in loaded_keywords:
+            display_string = self._format_keyword_display_string(keyword_obj)
+            status = archive.keyword_statuses.get(keyword_obj['text'])
+            if status in ("PASS", "FAILED"):
+                display_string += f" ({status})"
+            display_strings.append(display_string)
+        self.keyword_listbox.delete(0, tk.END)
+        if display_strings:
+            self.keyword_listbox.insert(tk.END, *display_strings)
+        self._record_keyword_edit(("delete", 0, previous_keywords), ("insert", 0, loaded_keywords))
+
+        self.report_data = archive.report_data
+        self.all_logs = LogTable()
+        self.keyword_matches = {}
+        self.active_filter_keyword = None
+        self.log_load_generation += 1
+        self._refresh_log_view()
+        self.update_status(f"Run loaded from {os.path.basename(file_path)}: loading {archive.total_logs} logs...")
+
+        # --- Logs and matches (one chunk at a time, read off the Tk thread) ---
+        keyword_texts = [obj['text'] for obj in loaded_keywords]
+        generation = self.log_load_generation
+        archive_name = os.path.basename(file_path)
+
+        def load_logs():
+            url_results = [dict(summary, logs=LogTable()) for summary in archive.url_summaries()]
+            offset = 0 # Index in all_logs of the chunk's first row
+            try:
+                for url_index, logs in archive.iter_log_chunks(with_url_index=True):
+                    if generation != self.log_load_generation:
+                        return # Cleared or replaced while loading
+                    chunk = LogTable.from_rows(logs)
+                    matches = {text: array('I', (offset + index for index in chunk.match(text))) for text in keyword_texts}
+                    offset += len(chunk)
+                    self.root.after(0, self._append_loaded_run_logs, generation, url_results[url_index], chunk, matches, archive.total_logs)
+            except Exception as e:
+                self.update_status(f"Error loading run logs: {e}")
+                return
+            finally:
+                archive.close()
+            self.root.after(0, self._finish_loaded_run_logs, generation, url_results, archive_name)
+
+        threading.Thread(target=load_logs, daemon=True).start()
+
+    def compare_runs(self):
+        """Diffs two run archives and writes a regression report of the changed rows."""
+        old_path = filedialog.askopenfilename(
+            title="Select the OLDER run",
+            initialdir=self.runs_dir,
+            filetypes=[("Run archives", f"*{RunArchive.EXTENSION}"), ("All files", "*.*")]
+        )
+        if not old_path:
+            return
+        new_path = filedialog.askopenfilename(
+            title="Select the NEWER run",
+            initialdir=self.runs_dir,
+            filetypes=[("Run archives", f"*{RunArchive.EXTENSION}"), ("All files", "*.*")]
+        )
+        if not new_path:
+            return
+
+        report_path = self.outputs_dir / f"Diff_Report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        self.update_status("Comparing runs...")
+
+        def run_diff():
+            try:
+                diff = RunDiff.from_archives(old_path, new_path)
+                self.update_status(f"Writing diff report ({len(diff.changes)} changed rows)...")
+                diff.write_workbook(report_path)
+            except Exception as e:
+                print(f"Run diff error: {e}")
+                self.update_status(f"Error comparing runs: {e}")
+                self.root.after(0, lambda e=e: messagebox.showerror("Error", f"Failed to compare runs: {e}"))
+                return
+
+            counts = diff.counts
+            summary = ", ".join(f"{counts[kind]} {RunDiff.LABELS[kind].lower()}" for kind in RunDiff.KINDS)
+            self.update_status(f"Diff report saved: {report_path}")
+            self.root.after(0, lambda: messagebox.showinfo("Run Comparison", f"{summary}\n\nDiff report saved as {report_path}"))
+
+        threading.Thread(target=run_diff, daemon=True).start()
+
+    def _append_loaded_run_logs(self, generation, url_result, chunk, matches, total_logs):
+        """Adds one chunk of logs read from a run archive to the view. Keeps the archived keyword statuses."""
+        if generation != self.log_load_generation:
+            return
+        start = len(self.all_logs)
+        url_result['logs'].extend(chunk)
+        self.all_logs.extend(chunk)
+        for text, indices in matches.items():
+            self.keyword_matches.setdefault(text, array('I')).extend(indices)
+
+        if self.active_filter_keyword:
+            new_indices = matches.get(self.active_filter_keyword, ())
+        else:
+            new_indices = range(start, len(self.all_logs))
+        for index in new_indices:
+            self._insert_log_into_view(index)
+        self.update_status(f"Loading run logs: {len(self.all_logs)}/{total_logs}...")
+
+    def _finish_loaded_run_logs(self, generation, url_results, archive_name):
+        if generation != self.log_load_generation:
+            return
+        self.url_results = url_results
+        self.update_status(f"Run loaded from {archive_name}: {len(self.all_logs)} logs")
+
 
 class URLManager(tk.Toplevel):
     def __init__(self, parent, app, urls, callback): # Added app parameter
@@ -1380,12 +2302,14 @@ class URLManager(tk.Toplevel):
         self.app = app # parent is the main app instance
         self.transient(parent)
         self.title("URL Manager")
-        self.geometry("700x450")
+        self.geometry("760x520")
         self.callback = callback
 
         self.is_updating_ui = False
-        self.undo_stack = deque(maxlen=10)
-        self.redo_stack = deque()
+        self.history = EditHistory(max_steps=500)
+        self.store = URLStore(urls)
+        self.view_indices = [] # Store index of every row shown in the listbox
+        self.filter_timer = None
 
         main_frame = ttk.Frame(self, padding=10)
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -1411,8 +2335,28 @@ class URLManager(tk.Toplevel):
         self.lang_combobox = ttk.Combobox(top_row, textvariable=self.url_lang_var, values=lang_options, state="readonly", width=20)
         self.lang_combobox.pack(side=tk.LEFT, padx=5)
 
-        add_button = ttk.Button(input_frame, text="Add URL", command=self.add_url)
-        add_button.pack(fill=tk.X, expand=True, pady=(5, 0))
+        add_row = ttk.Frame(input_frame)
+        add_row.pack(fill=tk.X, pady=(5, 0))
+        add_button = ttk.Button(add_row, text="Add URL", command=self.add_url)
+        add_button.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        import_file_button = ttk.Button(add_row, text="Import File...", command=self.import_urls_from_file)
+        import_file_button.pack(side=tk.LEFT, padx=(5, 0))
+        import_sitemap_button = ttk.Button(add_row, text="Import Sitemap URL...", command=self.import_urls_from_sitemap_url)
+        import_sitemap_button.pack(side=tk.LEFT, padx=(5, 0))
+
+        # --- Search Frame ---
+        search_frame = ttk.Frame(main_frame)
+        search_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.filter_lang_var = tk.StringVar(value="All")
+        filter_lang_combobox = ttk.Combobox(
+            search_frame, textvariable=self.filter_lang_var,
+            values=["All"] + list(self.app.LANG_MAP.values()), state="readonly", width=6
+        )
+        filter_lang_combobox.pack(side=tk.LEFT, padx=5)
 
         # --- Listbox Frame ---
         list_frame = ttk.Frame(main_frame)
@@ -1422,13 +2366,14 @@ class URLManager(tk.Toplevel):
         scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.url_listbox.yview)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.url_listbox.config(yscrollcommand=scrollbar.set)
-        for url_obj in urls:
-            self.url_listbox.insert(tk.END, f"[{url_obj.get('num', 1)}] [{url_obj['lang']}] {url_obj['url']}")
 
         # --- Bindings ---
         self.url_listbox.bind("<ButtonRelease-1>", self._on_url_click)
         self.url_text_var.trace_add("write", self._handle_url_update)
         self.url_lang_var.trace_add("write", self._handle_url_update)
+        self.url_num_var.trace_add("write", self._handle_url_update)
+        self.search_var.trace_add("write", self._schedule_filter)
+        self.filter_lang_var.trace_add("write", self._schedule_filter)
         self.bind("<Control-z>", self.undo_urls)
         self.bind("<Command-z>", self.undo_urls)
         self.bind("<Control-y>", self.redo_urls)
@@ -1447,35 +2392,67 @@ class URLManager(tk.Toplevel):
         button_frame.pack(fill=tk.X)
         remove_button = ttk.Button(button_frame, text="Remove Selected", command=self.remove_url)
         remove_button.pack(side=tk.LEFT)
+        self.count_var = tk.StringVar()
+        ttk.Label(button_frame, textvariable=self.count_var, foreground="gray").pack(side=tk.LEFT, padx=10)
         save_close_button = ttk.Button(button_frame, text="Save & Close", command=self.save_and_close)
         save_close_button.pack(side=tk.RIGHT)
 
-        self._save_url_state() # Initial state for undo
+        self._refresh_view()
+        if self.store.skipped_count:
+            self.count_var.set(f"{self.count_var.get()} - {self.store.skipped_count} duplicate URLs merged")
+
         self.grab_set()
         self.protocol("WM_DELETE_WINDOW", self.cancel)
         self.wait_window(self)
 
-    def _parse_url_string(self, display_string):
+    def _get_url_objects(self):
+        return list(self.store.records)
+
+    def _selected_store_index(self):
+        """Maps the listbox selection to its index in the store, or None."""
+        selection_indices = self.url_listbox.curselection()
+        if not selection_indices or selection_indices[0] >= len(self.view_indices):
+            return None
+        return self.view_indices[selection_indices[0]]
+
+    def _current_lang_and_num(self):
+        lang = self.app.LANG_MAP.get(self.url_lang_var.get(), "tc")
         try:
-            num_part, rest = display_string.split('] [', 1)
-            num = int(num_part[1:])
-            lang_part, url_part = rest.split('] ', 1)
-            lang = lang_part
-            url = url_part
-            return {'url': url.strip(), 'lang': lang.strip(), 'num': num}
-        except (ValueError, IndexError):
-            # Fallback for old format or direct input
-            return {'url': display_string, 'lang': 'tc', 'num': 1}
+            num = int(self.url_num_var.get().strip())
+        except ValueError:
+            num = 1
+        return lang, num
+
+    # --- Search & Filter --- #
+
+    def _schedule_filter(self, *args):
+        """Debounces search typing so large lists are filtered once per pause."""
+        if self.filter_timer:
+            self.after_cancel(self.filter_timer)
+        self.filter_timer = self.after(150, self._refresh_view)
+
+    def _refresh_view(self):
+        """Rebuilds the listbox from the store in one batch, applying the search filter."""
+        self.filter_timer = None
+        lang_filter = self.filter_lang_var.get()
+        self.view_indices = self.store.search(self.search_var.get(), None if lang_filter == "All" else lang_filter)
+        self.url_listbox.delete(0, tk.END)
+        if self.view_indices:
+            self.url_listbox.insert(tk.END, *[self._format_url_string(self.store[i]) for i in self.view_indices])
 
-    def _get_url_objects(self):
-        return [self._parse_url_string(self.url_listbox.get(i)) for i in range(self.url_listbox.size())]
+        total = len(self.store)
+        if len(self.view_indices) == total:
+            self.count_var.set(f"{total} URLs")
+        else:
+            self.count_var.set(f"{len(self.view_indices)} of {total} URLs shown")
+
+    # --- Editing --- #
 
     def _on_url_click(self, event):
         self.is_updating_ui = True
-        selection_indices = self.url_listbox.curselection()
-        if selection_indices:
-            display_string = self.url_listbox.get(selection_indices[0])
-            url_obj = self._parse_url_string(display_string)
+        store_index = self._selected_store_index()
+        if store_index is not None:
+            url_obj = self.store[store_index]
             self.url_text_var.set(url_obj['url'])
             self.url_lang_var.set(self.app.LANG_MAP_INV.get(url_obj['lang'], "Traditional Chinese"))
             self.url_num_var.set(str(url_obj.get('num', 1)))
@@ -1484,36 +2461,117 @@ class URLManager(tk.Toplevel):
     def _handle_url_update(self, *args):
         if self.is_updating_ui:
             return
-        selection_indices = self.url_listbox.curselection()
-        if not selection_indices:
+        store_index = self._selected_store_index()
+        if store_index is None:
             return
 
-        selected_index = selection_indices[0]
         new_url = self.url_text_var.get().strip()
-        new_lang = self.app.LANG_MAP.get(self.url_lang_var.get(), "tc")
-        new_num = self.url_num_var.get().strip()
-
         if not new_url:
             return # Don't update if URL is empty
+        new_lang, new_num = self._current_lang_and_num()
 
-        new_display_string = f"[{new_num}] [{new_lang}] {new_url}"
-        self.url_listbox.delete(selected_index)
-        self.url_listbox.insert(selected_index, new_display_string)
-        self.url_listbox.selection_set(selected_index)
-        self._save_url_state()
+        # Edits are stored as typed; canonical form is applied on save
+        new_obj = {'url': new_url, 'lang': new_lang, 'num': new_num}
+        original_obj = self.store[store_index]
+        if new_obj == original_obj:
+            return
+        self.store.update(store_index, new_obj)
+        self.history.record(("update", store_index, original_obj, new_obj))
+
+        view_index = self.url_listbox.curselection()[0]
+        self.url_listbox.delete(view_index)
+        self.url_listbox.insert(view_index, self._format_url_string(new_obj))
+        self.url_listbox.selection_set(view_index)
+
+    def _add_url_objects(self, url_objects):
+        """Appends new URLs in one batch, skipping canonical duplicates. Returns (added, skipped)."""
+        insert_index = len(self.store)
+        added, skipped = self.store.add_many(url_objects)
+        if added:
+            self.history.record(("insert", insert_index, added))
+            self._refresh_view()
+        return len(added), skipped
 
     def add_url(self):
         url = self.url_text_var.get().strip()
-        lang = self.app.LANG_MAP.get(self.url_lang_var.get(), "tc")
-        num = self.url_num_var.get().strip()
-        num = self.url_num_var.get().strip()
-        if url:
-            display_string = f"[{num}] [{lang}] {url}"
-            self.url_listbox.insert(tk.END, display_string)
-            self.url_text_var.set("")
-            self._save_url_state()
+        if not url:
+            return
+        lang, num = self._current_lang_and_num()
+        added_count, _ = self._add_url_objects([{'url': url, 'lang': lang, 'num': num}])
+        if not added_count:
+            messagebox.showwarning("Duplicate", "This URL (lang, num) is already in the list.", parent=self)
+            return
+        self.is_updating_ui = True
+        self.url_text_var.set("")
+        self.is_updating_ui = False
+
+    def _report_import(self, source_name, added_count, skipped_count):
+        self.count_var.set(f"{self.count_var.get()} - added {added_count} from {source_name}, {skipped_count} duplicates skipped")
+
+    def import_urls_from_file(self):
+        """Imports URLs from a text, CSV, XLSX or sitemap XML file."""
+        file_path = filedialog.askopenfilename(
+            parent=self,
+            title="Import URLs",
+            initialdir=self.app.sessions_dir,
+            filetypes=[
+                ("URL lists", "*.txt *.csv *.xlsx *.xml *.xml.gz"),
+                ("Sitemaps", "*.xml *.xml.gz"), ("All files", "*.*")
+            ]
+        )
+        if not file_path:
+            return
+
+        lang, num = self._current_lang_and_num()
+        try:
+            if file_path.lower().endswith((".xml", ".xml.gz")):
+                url_objects = [{'url': url, 'lang': lang, 'num': num} for url in URLImporter.read_sitemap(file_path)]
+            else:
+                url_objects = URLImporter(file_path, self.app.LANG_MAP).iter_urls(lang, num)
+            added_count, skipped_count = self._add_url_objects(url_objects)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Failed to import {os.path.basename(file_path)}: {e}", parent=self)
+            return
+        self._report_import(os.path.basename(file_path), added_count, skipped_count)
+
+    def import_urls_from_sitemap_url(self):
+        """Downloads a sitemap (or sitemap index) in the background and imports every page URL in it."""
+        sitemap_url = simpledialog.askstring("Import Sitemap", "Sitemap URL:", parent=self)
+        if not sitemap_url or not sitemap_url.strip():
+            return
+
+        lang, num = self._current_lang_and_num()
+        self.config(cursor="watch")
+        self.count_var.set(f"{self.count_var.get()} - downloading sitemap...")
+
+        def download():
+            try:
+                urls = URLImporter.read_sitemap(sitemap_url.strip())
+            except Exception as e:
+                self.after(0, lambda e=e: self._finish_sitemap_import(None, lang, num, e))
+                return
+            self.after(0, lambda: self._finish_sitemap_import(urls, lang, num))
+
+        threading.Thread(target=download, daemon=True).start()
+
+    def _finish_sitemap_import(self, urls, lang, num, error=None):
+        if not self.winfo_exists():
+            return # Window closed while downloading
+        self.config(cursor="")
+        self._refresh_view() # Drop the "downloading" note
+        if error is None:
+            try:
+                added_count, skipped_count = self._add_url_objects({'url': url, 'lang': lang, 'num': num} for url in urls)
+            except Exception as e:
+                error = e
+        if error is not None:
+            messagebox.showerror("Import Error", f"Failed to read sitemap: {error}", parent=self)
+            return
+        self._report_import("sitemap", added_count, skipped_count)
 
     def remove_url_event(self, event=None):
+        if event is not None and event.widget in (self.search_entry, self.url_entry, self.num_entry):
+            return # Let the entry handle the key
         self.remove_url()
 
     def save_and_close_event(self, event=None):
@@ -1522,72 +2580,3278 @@ class URLManager(tk.Toplevel):
 
     def copy_selected_url_event(self, event=None):
         """Copies the selected URL to the clipboard."""
-        selection_indices = self.url_listbox.curselection()
-        if not selection_indices:
+        store_index = self._selected_store_index()
+        if store_index is None:
             return
 
-        selected_url_obj = self._get_url_objects()[selection_indices[0]]
         self.clipboard_clear()
-        self.clipboard_append(selected_url_obj['url'])
+        self.clipboard_append(self.store[store_index]['url'])
 
     def paste_urls_event(self, event=None):
-        """Pastes URLs from clipboard into the listbox."""
+        """Pastes URLs from clipboard into the list."""
+        if event is not None and event.widget is self.search_entry:
+            return # Pasting a search term, not URLs
         try:
             clipboard_content = self.clipboard_get()
         except tk.TclError:
             return # Clipboard is empty or doesn't contain text
 
-        current_urls = {obj['url'] for obj in self._get_url_objects()}
-        lang = self.app.LANG_MAP.get(self.url_lang_var.get(), "tc")
-        added = False
-        for line in clipboard_content.splitlines():
-            url = line.strip()
-            if url and url not in current_urls:
-                display_string = f"[{num}] [{lang}] {url}"
-                self.url_listbox.insert(tk.END, display_string)
-                current_urls.add(url) # Avoid duplicates within the same paste
-                added = True
-        
-        if added:
-            self._save_url_state()
+        lang, num = self._current_lang_and_num()
+        self._add_url_objects(
+            {'url': line.strip(), 'lang': lang, 'num': num}
+            for line in clipboard_content.splitlines() if line.strip()
+        )
 
     def remove_url(self):
-        selection_indices = self.url_listbox.curselection()
-        if selection_indices:
-            self.url_listbox.delete(selection_indices[0])
-            self._save_url_state()
+        store_index = self._selected_store_index()
+        if store_index is not None:
+            removed = self.store.delete(store_index)
+            self.history.record(("delete", store_index, removed))
+            self._refresh_view()
 
     def save_and_close(self):
-        self.callback(self._get_url_objects())
+        self.callback(URLStore(self.store.records).records)
         self.destroy()
 
     def cancel(self):
         self.destroy()
 
-    def _save_url_state(self):
-        current_state = self._get_url_objects()
-        if not self.undo_stack or self.undo_stack[-1] != current_state:
-            self.undo_stack.append(current_state)
-            self.redo_stack.clear()
+    def _format_url_string(self, url_obj):
+        return f"[{url_obj.get('num', 1)}] [{url_obj['lang']}] {url_obj['url']}"
 
-    def _restore_url_state(self, state):
-        self.url_listbox.delete(0, tk.END)
-        for url_obj in state:
-            self.url_listbox.insert(tk.END, f"[{url_obj['lang']}] {url_obj['url']}")
-        self._save_url_state()
+    def _apply_url_edit(self, op):
+        """Applies one EditHistory operation to the URL store."""
+        kind, index = op[0], op[1]
+        if kind == "insert":
+            self.store.insert(index, op[2])
+        elif kind == "delete":
+            self.store.delete(index, len(op[2]))
+        else:
+            self.store.update(index, op[3])
 
     def undo_urls(self, event=None):
-        if len(self.undo_stack) > 1:
-            self.redo_stack.append(self.undo_stack.pop())
-            self._restore_url_state(self.undo_stack[-1])
+        if self.history.undo(self._apply_url_edit):
+            self._refresh_view()
 
     def redo_urls(self, event=None):
-        if self.redo_stack:
-            state = self.redo_stack.pop()
-            self.undo_stack.append(state)
-            self._restore_url_state(state)
+        if self.history.redo(self._apply_url_edit):
+            self._refresh_view()
+
+
+class URLStore:
+    """Ordered list of URL records ({'url', 'lang', 'num'}) with a hash index.
+
+    Records are keyed by (canonical url, lang, num) so the same page is only
+    tested once per keyword group, and every record keeps a lowercase search
+    string so filtering tens of thousands of entries is a single pass. The
+    canonical form is only the key: records keep the URL as it was entered
+    (with https:// added when it has no scheme).
+    """
+
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+
+    def __init__(self, records=()):
+        self.records = []
+        self._search_text = [] # Parallel to records
+        self._keys = Counter()
+        added, self.skipped_count = self.add_many(records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    @classmethod
+    def normalize_url(cls, url):
+        """Returns the canonical form of a URL: lowercase scheme/host, no default port.
+
+        The fragment is kept, as single-page apps route on it (#/cart, #/checkout).
+        """
+        url = url.strip()
+        if not url:
+            return url
+        if "://" not in url:
+            url = "https://" + url
+
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        path = parts.path or "/"
+        try:
+            port = parts.port
+        except ValueError: # Port out of range; keep the host as typed
+            return urlunsplit((scheme, parts.netloc, path, parts.query, parts.fragment))
+        host = (parts.hostname or "").lower()
+        if ":" in host:
+            host = f"[{host}]" # IPv6 literal
+        if port and port != cls.DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+        if parts.username:
+            credentials = parts.username + (f":{parts.password}" if parts.password else "")
+            host = f"{credentials}@{host}"
+        return urlunsplit((scheme, host, path, parts.query, parts.fragment))
+
+    @classmethod
+    def key(cls, record):
+        return (cls.normalize_url(record['url']), record['lang'], record.get('num', 1))
+
+    def _make_record(self, record):
+        url = record['url'].strip()
+        if "://" not in url:
+            url = "https://" + url
+        return {'url': url, 'lang': record['lang'], 'num': int(record.get('num', 1))}
+
+    def _search_string(self, record):
+        return f"{record['url']} {record['lang']} {record['num']}".lower()
+
+    def contains(self, record):
+        return self._keys[self.key(record)] > 0
+
+    def add_many(self, records):
+        """Appends canonicalized records that are not already present. Returns (added records, skipped count)."""
+        added, skipped = [], 0
+        for record in records:
+            if not record.get('url', '').strip():
+                continue
+            record = self._make_record(record)
+            key = self.key(record)
+            if self._keys[key]:
+                skipped += 1
+                continue
+            self._keys[key] += 1
+            self.records.append(record)
+            self._search_text.append(self._search_string(record))
+            added.append(record)
+        return added, skipped
+
+    def insert(self, index, records):
+        records = list(records)
+        self.records[index:index] = records
+        self._search_text[index:index] = [self._search_string(r) for r in records]
+        for record in records:
+            self._keys[self.key(record)] += 1
+
+    def delete(self, index, count=1):
+        """Removes `count` records starting at `index` and returns them."""
+        removed = self.records[index:index + count]
+        del self.records[index:index + count]
+        del self._search_text[index:index + count]
+        for record in removed:
+            self._unindex(record)
+        return removed
+
+    def update(self, index, record):
+        old_record = self.records[index]
+        self._unindex(old_record)
+        self.records[index] = record
+        self._search_text[index] = self._search_string(record)
+        self._keys[self.key(record)] += 1
+        return old_record
+
+    def _unindex(self, record):
+        key = self.key(record)
+        self._keys[key] -= 1
+        if self._keys[key] <= 0:
+            del self._keys[key]
+
+    def search(self, query, lang=None):
+        """Returns the indices of records whose text contains every word of `query`."""
+        terms = query.lower().split()
+        return [
+            i for i, text in enumerate(self._search_text)
+            if (lang is None or self.records[i]['lang'] == lang) and all(term in text for term in terms)
+        ]
+
+
+class KeywordImportDialog(tk.Toplevel):
+    """Lets the user map spreadsheet columns to keyword fields before an import."""
+
+    NONE_OPTION = "(none)"
+    FIELD_LABELS = (("text", "Keyword"), ("lang", "Language"), ("num", "Num"), ("button_id", "Button ID"))
+
+    def __init__(self, parent, importer):
+        super().__init__(parent)
+        self.transient(parent)
+        self.title("Import Keywords")
+        self.importer = importer
+        self.column_map = None # Stays None if the dialog is cancelled
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(
+            main_frame,
+            text=f"{os.path.basename(importer.file_path)}: {importer.row_count} rows",
+            font=("Helvetica", 12, "bold")
+        ).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+
+        detected = importer.detect_columns()
+        options = [self.NONE_OPTION] + importer.headers
+        self.field_vars = {}
+        for row, (field, label) in enumerate(self.FIELD_LABELS, 1):
+            ttk.Label(main_frame, text=f"{label}:").grid(row=row, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+            column_index = detected.get(field)
+            var = tk.StringVar(value=options[column_index + 1] if column_index is not None else self.NONE_OPTION)
+            ttk.Combobox(main_frame, textvariable=var, values=options, state="readonly", width=30).grid(row=row, column=1, pady=2)
+            self.field_vars[field] = var
+
+        ttk.Label(
+            main_frame,
+            text="Rows without a language or num use the values selected in the keyword pane.",
+            foreground="gray"
+        ).grid(row=len(self.FIELD_LABELS) + 1, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=len(self.FIELD_LABELS) + 2, column=0, columnspan=2, sticky=tk.EW, pady=(10, 0))
+        ttk.Button(button_frame, text="Cancel", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Import", command=self.confirm).pack(side=tk.RIGHT, padx=5)
+
+        self.bind("<Return>", lambda event: self.confirm())
+        self.bind("<Escape>", lambda event: self.destroy())
+        self.grab_set()
+        self.wait_window(self)
+
+    def confirm(self):
+        column_map = {}
+        for field, var in self.field_vars.items():
+            header = var.get()
+            column_map[field] = self.importer.headers.index(header) if header != self.NONE_OPTION else None
+
+        if column_map['text'] is None:
+            messagebox.showwarning("Column Mapping", "Please choose the column that holds the keyword text.", parent=self)
+            return
+        self.column_map = column_map
+        self.destroy()
+
+
+class LogTable:
+    """Append-only, array-backed table of captured responses.
+
+    Names, methods, resource types and URL hashes are interned into one
+    string pool and stored as ids; status and size are integers (-1 when
+    unknown) and times are floats from a monotonic clock, formatted only
+    when a row is displayed. Indexing and iteration still yield the display
+    tuples (name, status, method, type, size, time, url_hash, duration,
+    offset), so archives, exports and reports read a table like a list of
+    rows. Duration and offset are in ms, "N/A" when unknown.
+    """
+
+    TIME_FORMAT = "%H:%M:%S %d/%m/%Y"
+    UNKNOWN = -1
+    _WALL_ANCHOR = time.time()
+    _MONO_ANCHOR = time.monotonic()
+    _parsed_times = {} # Formatted time -> seconds, shared by all tables
+
+    def __init__(self):
+        self._strings = [] # Interned string pool, id -> text
+        self._string_ids = {}
+        self._time_text = {} # Whole second -> formatted time
+        self.statuses = array('i')
+        self.methods = array('I')
+        self.types = array('I')
+        self.sizes = array('q')
+        self.times = array('d')
+        self.url_hashes = array('I')
+        self.durations = array('d') # ms from request start to response end
+        self.offsets = array('d') # ms from navigation start to request start
+        self.names = array('I') # Appended last: its length is the table length
+
+    @classmethod
+    def now(cls):
+        """Wall-clock seconds for a new log, taken from the monotonic clock."""
+        return cls._WALL_ANCHOR + (time.monotonic() - cls._MONO_ANCHOR)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_string_ids'], state['_time_text'] # Rebuilt on unpickle
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._string_ids = {text: string_id for string_id, text in enumerate(self._strings)}
+        self._time_text = {}
+
+    def _intern(self, text):
+        string_id = self._string_ids.get(text)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(text)
+            self._string_ids[text] = string_id
+        return string_id
+
+    @classmethod
+    def _to_int(cls, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return cls.UNKNOWN
+
+    @classmethod
+    def _to_float(cls, value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return float(cls.UNKNOWN)
+
+    def append(self, name, status, method, resource_type, size, timestamp, url_hash, duration=-1, offset=-1):
+        """Appends one log and returns its row index. `timestamp` is in seconds, see `now()`."""
+        intern = self._intern
+        self.statuses.append(self._to_int(status))
+        self.methods.append(intern(str(method)))
+        self.types.append(intern(str(resource_type)))
+        self.sizes.append(self._to_int(size))
+        self.times.append(timestamp)
+        self.url_hashes.append(intern(str(url_hash)))
+        self.durations.append(self._to_float(duration))
+        self.offsets.append(self._to_float(offset))
+        self.names.append(intern(str(name)))
+        return len(self.names) - 1
+
+    @classmethod
+    def _parse_time(cls, text):
+        """Seconds for a formatted time; archives repeat the same second many times, so results are cached."""
+        seconds = cls._parsed_times.get(text)
+        if seconds is None:
+            try:
+                seconds = datetime.strptime(text, cls.TIME_FORMAT).timestamp()
+            except (TypeError, ValueError):
+                seconds = 0.0
+            if len(cls._parsed_times) > 100000:
+                cls._parsed_times.clear()
+            cls._parsed_times[text] = seconds
+        return seconds
+
+    def append_row(self, values):
+        """Appends a display tuple, e.g. a row read from a run archive (older archives have no timing columns)."""
+        name, status, method, resource_type, size, time_text, url_hash, duration, offset = (tuple(values) + ("N/A", "N/A"))[:9]
+        return self.append(name, status, method, resource_type, size, self._parse_time(time_text), url_hash, duration, offset)
+
+    @classmethod
+    def from_rows(cls, rows):
+        if isinstance(rows, cls):
+            return rows
+        table = cls()
+        for values in rows:
+            table.append_row(values)
+        return table
+
+    def extend(self, other):
+        """Appends all rows of another table."""
+        strings = other._strings
+        for i in range(len(other)):
+            self.append(strings[other.names[i]], other.statuses[i], strings[other.methods[i]], strings[other.types[i]],
+                        other.sizes[i], other.times[i], strings[other.url_hashes[i]], other.durations[i], other.offsets[i])
+
+    def __len__(self):
+        return len(self.names)
+
+    def format_time(self, seconds):
+        second = int(seconds)
+        text = self._time_text.get(second)
+        if text is None:
+            text = datetime.fromtimestamp(second).strftime(self.TIME_FORMAT)
+            self._time_text[second] = text
+        return text
+
+    def name(self, index):
+        return self._strings[self.names[index]]
+
+    def row(self, index):
+        """Returns the display tuple of one row."""
+        strings = self._strings
+        status, size = self.statuses[index], self.sizes[index]
+        duration, offset = self.durations[index], self.offsets[index]
+        return (
+            strings[self.names[index]],
+            status if status != self.UNKNOWN else "N/A",
+            strings[self.methods[index]],
+            strings[self.types[index]],
+            str(size) if size != self.UNKNOWN else "N/A",
+            self.format_time(self.times[index]),
+            strings[self.url_hashes[index]],
+            f"{duration:.0f}" if duration >= 0 else "N/A",
+            f"{offset:.0f}" if offset >= 0 else "N/A",
+        )
+
+    def rows(self, indices):
+        return [self.row(index) for index in indices]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.rows(range(*index.indices(len(self))))
+        return self.row(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def match(self, text):
+        """Row indices whose name contains `text`. Each distinct name is tested once."""
+        matching_ids = {string_id for string_id, string in enumerate(self._strings) if text in string}
+        if not matching_ids:
+            return array('I')
+        return array('I', (index for index, name_id in enumerate(self.names) if name_id in matching_ids))
+
+    def status_of(self, indices):
+        """keyword_status() of the given rows, read from the integer status column."""
+        statuses = self.statuses
+        return status_from_codes(statuses[index] for index in indices)
+
+    def tag_performance(self, indices):
+        """Summary of the given (tag) requests: count, bytes, time to first tag and p95 latency."""
+        sizes = [self.sizes[i] for i in indices if self.sizes[i] >= 0]
+        offsets = [self.offsets[i] for i in indices if self.offsets[i] >= 0]
+        durations = sorted(self.durations[i] for i in indices if self.durations[i] >= 0)
+        p95 = durations[max(0, -(-len(durations) * 95 // 100) - 1)] if durations else None # Nearest rank
+        return {
+            'tag_requests': len(indices),
+            'total_bytes': sum(sizes),
+            'first_tag_ms': round(min(offsets)) if offsets else None,
+            'p95_latency_ms': round(p95) if p95 is not None else None,
+        }
+
+    def sort_key_fn(self, col):
+        """Returns a sort key function (row index -> key) for a LOG_COLUMNS column."""
+        strings = self._strings
+        if col in ("status", "size", "duration", "offset"):
+            column = {"status": self.statuses, "size": self.sizes, "duration": self.durations, "offset": self.offsets}[col]
+            # Numbers sort before unknown values
+            return lambda index: (column[index] == self.UNKNOWN, column[index])
+        if col == "time":
+            return self.times.__getitem__
+        column = {"name": self.names, "method": self.methods, "type": self.types, "url_hash": self.url_hashes}[col]
+        return lambda index: strings[column[index]]
+
+
+class AutomationJobsWindow(tk.Toplevel):
+    """Lists the jobs of the automation service with their status and timings."""
+
+    COLUMNS = (("id", "#", 40), ("name", "Job", 140), ("status", "Status", 80),
+               ("start", "Start latency (ms)", 120), ("run", "Run time (s)", 90), ("error", "Error", 260))
+
+    def __init__(self, parent, service):
+        super().__init__(parent)
+        self.title("Automation Jobs")
+        self.service = service
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(main_frame, columns=[key for key, _, _ in self.COLUMNS], show="headings", height=12)
+        for key, heading, width in self.COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor=tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Cancel Job", command=self.cancel_selected).pack(side=tk.RIGHT, padx=5)
+
+        self.bind("<Escape>", lambda event: self.destroy())
+        self.refresh()
+
+    def refresh(self):
+        """Redraws the job list; repeats every 500 ms while the window is open."""
+        if not self.winfo_exists():
+            return
+        selection = self.tree.selection()
+        self.tree.delete(*self.tree.get_children())
+        for job in reversed(list(self.service.jobs)):
+            start = "" if job.start_latency_ms is None else f"{job.start_latency_ms:.0f}"
+            run = "" if job.run_seconds is None else f"{job.run_seconds:.1f}"
+            self.tree.insert("", tk.END, iid=str(job.id), values=(job.id, job.name, job.status, start, run, job.error))
+        self.tree.selection_set([item for item in selection if self.tree.exists(item)])
+        self.after(500, self.refresh)
+
+    def cancel_selected(self):
+        selected_ids = {int(item) for item in self.tree.selection()}
+        for job in list(self.service.jobs):
+            if job.id in selected_ids and job.active:
+                job.cancel()
+
+
+class RunPlanWindow(tk.Toplevel):
+    """Shows the execution plan the next Fast Test would run, and exports it."""
+
+    def __init__(self, parent, plan, export_dir):
+        super().__init__(parent)
+        self.title("Run Plan")
+        self.plan = plan
+        self.export_dir = export_dir
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(main_frame, text=plan.summary(), wraplength=760).pack(fill=tk.X, pady=(0, 10))
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        columns = [key for key, _ in RunPlan.EXPORT_COLUMNS]
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=18)
+        widths = {'order': 40, 'url': 300, 'host': 140, 'estimate_source': 90}
+        for key, heading in RunPlan.EXPORT_COLUMNS:
+            tree.heading(key, text=heading)
+            tree.column(key, width=widths.get(key, 70), anchor=tk.W)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        for entry in plan.entries:
+            tree.insert("", tk.END, values=[entry[key] for key in columns])
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Export...", command=self.export).pack(side=tk.RIGHT, padx=5)
+
+        self.bind("<Escape>", lambda event: self.destroy())
+
+    def export(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self,
+            title="Export Run Plan",
+            initialdir=self.export_dir,
+            initialfile=f"Run_Plan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        try:
+            self.plan.export_csv(file_path)
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to export the run plan: {e}", parent=self)
+
+
+class LogExportDialog(tk.Toplevel):
+    """Asks for the source, format and filters of a log export."""
+
+    SOURCES = (("memory", "Current logs"), ("archives", "Run archives..."))
+
+    def __init__(self, parent, current_count, keyword=""):
+        super().__init__(parent)
+        self.transient(parent)
+        self.title("Export Log")
+        self.options = None # Stays None if the dialog is cancelled
+
+        main_frame = ttk.Frame(self, padding=10)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+
+        source_labels = [f"{label} ({current_count})" if key == "memory" else label for key, label in self.SOURCES]
+        self.source_keys = dict(zip(source_labels, (key for key, _ in self.SOURCES)))
+        self.source_var = tk.StringVar(value=source_labels[0] if current_count else source_labels[1])
+        self.format_var = tk.StringVar(value="csv")
+        self.keyword_var = tk.StringVar(value=keyword)
+        self.status_var = tk.StringVar(value=LogExporter.STATUS_FILTERS[0])
+
+        fields = (
+            ("Source:", ttk.Combobox(main_frame, textvariable=self.source_var, values=source_labels, state="readonly", width=30)),
+            ("Format:", ttk.Combobox(main_frame, textvariable=self.format_var, values=list(LogExporter.FORMATS), state="readonly", width=30)),
+            ("Name contains:", ttk.Entry(main_frame, textvariable=self.keyword_var, width=32)),
+            ("Status:", ttk.Combobox(main_frame, textvariable=self.status_var, values=LogExporter.STATUS_FILTERS, width=30)),
+        )
+        for row, (label, widget) in enumerate(fields):
+            ttk.Label(main_frame, text=label).grid(row=row, column=0, sticky=tk.W, padx=(0, 10), pady=2)
+            widget.grid(row=row, column=1, pady=2)
+
+        ttk.Label(
+            main_frame,
+            text="Status accepts a class (4xx) or an exact code (404). Parquet needs pyarrow.",
+            foreground="gray"
+        ).grid(row=len(fields), column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=len(fields) + 1, column=0, columnspan=2, sticky=tk.EW, pady=(10, 0))
+        ttk.Button(button_frame, text="Cancel", command=self.destroy).pack(side=tk.RIGHT)
+        ttk.Button(button_frame, text="Export", command=self.confirm).pack(side=tk.RIGHT, padx=5)
+
+        self.bind("<Return>", lambda event: self.confirm())
+        self.bind("<Escape>", lambda event: self.destroy())
+        self.grab_set()
+        self.wait_window(self)
+
+    def confirm(self):
+        status = self.status_var.get().strip() or LogExporter.STATUS_FILTERS[0]
+        if LogExporter.status_matcher(status) is None:
+            messagebox.showwarning("Status Filter", f"Unknown status filter '{status}'.", parent=self)
+            return
+        self.options = {
+            'source': self.source_keys[self.source_var.get()],
+            'format': self.format_var.get(),
+            'keyword': self.keyword_var.get().strip(),
+            'status': status,
+        }
+        self.destroy()
+
+
+class LogExporter:
+    """Streams log rows to CSV, gzip CSV, gzip JSONL or Parquet.
+
+    Rows arrive as (run_name, rows) chunks and are filtered and written one
+    chunk at a time, so exporting run archives never loads them whole.
+    """
+
+    FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "jsonl.gz": ".jsonl.gz", "parquet": ".parquet"}
+    STATUS_FILTERS = ("All", "2xx", "3xx", "4xx", "5xx", "4xx/5xx")
+    CHUNK_SIZE = 5000
+    INT_COLUMNS = {"status", "size"} # Typed as integers in Parquet
+    FLOAT_COLUMNS = {"duration", "offset"}
+
+    def __init__(self, path, fmt, headers, keyword="", status="All", with_run=False):
+        self.path = Path(path)
+        self.format = fmt
+        self.headers = headers
+        self.columns = (["run"] if with_run else []) + list(TaggingAutomationApp.LOG_COLUMNS)
+        self.keyword = keyword
+        self.status_match = self.status_matcher(status)
+        self.with_run = with_run
+
+    @staticmethod
+    def status_matcher(spec):
+        """Returns a predicate for a status filter ("All", "4xx", "4xx/5xx", "404"), or None if invalid."""
+        spec = spec.strip().lower()
+        if spec == "all":
+            return lambda status: True
+
+        classes, codes = set(), set()
+        for part in spec.split("/"):
+            part = part.strip()
+            if len(part) == 3 and part[0].isdigit() and part[1:] == "xx":
+                classes.add(int(part[0]))
+            elif part.isdigit():
+                codes.add(int(part))
+            else:
+                return None
+
+        def match(status):
+            try:
+                code = int(status)
+            except (TypeError, ValueError):
+                return False
+            return code in codes or code // 100 in classes
+        return match
+
+    @classmethod
+    def memory_chunks(cls, logs, count=None, run_name=""):
+        """Yields the first `count` rows of a list or LogTable in chunks."""
+        count = len(logs) if count is None else count
+        for start in range(0, count, cls.CHUNK_SIZE):
+            yield run_name, logs[start:min(start + cls.CHUNK_SIZE, count)]
+
+    @staticmethod
+    def archive_chunks(archive_paths):
+        """Yields log chunks from run archives one at a time, tagged with the archive name."""
+        for archive_path in archive_paths:
+            archive = RunArchive(archive_path)
+            try:
+                run_name = Path(archive_path).name[:-len(RunArchive.EXTENSION)]
+                for chunk in archive.iter_log_chunks():
+                    yield run_name, chunk
+            finally:
+                archive.close()
+
+    def _filtered_rows(self, run_name, rows):
+        keyword, status_match = self.keyword, self.status_match
+        for row in rows:
+            if keyword and keyword not in str(row[0]):
+                continue
+            if not status_match(row[1]):
+                continue
+            yield (run_name,) + tuple(row) if self.with_run else tuple(row)
+
+    def export(self, chunks, progress=None):
+        """Writes all matching rows to the target file and returns how many were written."""
+        writer = {
+            "csv": self._write_csv,
+            "csv.gz": self._write_csv,
+            "jsonl.gz": self._write_jsonl,
+            "parquet": self._write_parquet,
+        }[self.format]
+
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            count = writer(temp_path, chunks, progress)
+            os.replace(temp_path, self.path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return count
+
+    def _open_text(self, path):
+        if self.format.endswith(".gz"):
+            return gzip.open(path, 'wt', newline='', encoding='utf-8', compresslevel=6)
+        return open(path, 'w', newline='', encoding='utf-8')
+
+    def _write_csv(self, path, chunks, progress):
+        count = 0
+        with self._open_text(path) as f:
+            writer = csv.writer(f)
+            writer.writerow(self.headers)
+            for run_name, rows in chunks:
+                before = count
+                for row in self._filtered_rows(run_name, rows):
+                    writer.writerow(row)
+                    count += 1
+                if progress and count != before:
+                    progress(count)
+        return count
+
+    def _write_jsonl(self, path, chunks, progress):
+        count = 0
+        columns = self.columns
+        with self._open_text(path) as f:
+            for run_name, rows in chunks:
+                lines = [json.dumps(dict(zip(columns, row)), ensure_ascii=False) for row in self._filtered_rows(run_name, rows)]
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                    count += len(lines)
+                    if progress:
+                        progress(count)
+        return count
+
+    @staticmethod
+    def _to_int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _to_float(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _write_parquet(self, path, chunks, progress):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export needs the optional 'pyarrow' package (pip install pyarrow).")
+
+        def column_type(column):
+            if column in self.INT_COLUMNS:
+                return pa.int64()
+            if column in self.FLOAT_COLUMNS:
+                return pa.float64()
+            return pa.string()
+
+        schema = pa.schema([(column, column_type(column)) for column in self.columns])
+        count = 0
+        with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+            for run_name, rows in chunks:
+                rows = list(self._filtered_rows(run_name, rows))
+                if not rows:
+                    continue
+                columns = list(zip(*rows))
+                arrays = []
+                for column, values in zip(self.columns, columns):
+                    if column in self.INT_COLUMNS:
+                        arrays.append(pa.array([self._to_int(v) for v in values], type=pa.int64()))
+                    elif column in self.FLOAT_COLUMNS:
+                        arrays.append(pa.array([self._to_float(v) for v in values], type=pa.float64()))
+                    else:
+                        arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                count += len(rows)
+                if progress:
+                    progress(count)
+        return count
+
+
+class SpreadsheetImporter:
+    """Reads rows from a CSV, XLSX or plain text file for bulk imports.
+
+    The first non-empty row is the header unless `_is_data_row` says it is
+    already data. Subclasses define HEADER_ALIASES (field -> header names) and
+    PRIMARY_FIELD, the column that must be present.
+    """
+
+    HEADER_ALIASES = {}
+    PRIMARY_FIELD = None
+    LANG_ALIASES = {
+        "zh-hk": "tc", "zh-tw": "tc", "zh-hant": "tc",
+        "zh-cn": "sc", "zh-hans": "sc",
+    }
+
+    def __init__(self, file_path, lang_map):
+        self.file_path = str(file_path)
+        self.lang_lookup = dict(self.LANG_ALIASES)
+        for display_name, code in lang_map.items():
+            self.lang_lookup[display_name.lower()] = code
+            self.lang_lookup[code.lower()] = code
+        self.headers, self.rows = self._read_rows()
+        self.row_count = len(self.rows)
+
+    def _read_rows(self):
+        if self.file_path.lower().endswith(".xlsx"):
+            from openpyxl import load_workbook
+            wb = load_workbook(self.file_path, read_only=True, data_only=True)
+            try:
+                all_rows = list(wb.active.iter_rows(values_only=True))
+            finally:
+                wb.close()
+        elif self.file_path.lower().endswith(".txt"):
+            with open(self.file_path, encoding='utf-8-sig') as f:
+                all_rows = [[line.strip()] for line in f]
+        else:
+            with open(self.file_path, newline='', encoding='utf-8-sig') as f:
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+                except csv.Error:
+                    dialect = csv.excel
+                all_rows = list(csv.reader(f, dialect))
+
+        for header_idx, row in enumerate(all_rows):
+            if any(cell not in (None, "") for cell in row):
+                headers = [str(cell).strip() if cell not in (None, "") else f"Column {i + 1}" for i, cell in enumerate(row)]
+                if self._is_data_row(row):
+                    return [f"Column {i + 1}" for i in range(len(row))], all_rows[header_idx:]
+                return headers, all_rows[header_idx + 1:]
+        return [], []
+
+    def _is_data_row(self, row):
+        """Whether the first non-empty row is data rather than a header."""
+        return False
+
+    def detect_columns(self):
+        """Guesses the field -> column index mapping from the header names."""
+        normalized = [header.strip().lower() for header in self.headers]
+        column_map = {}
+        for field, aliases in self.HEADER_ALIASES.items():
+            column_map[field] = next(
+                (i for i, header in enumerate(normalized) if header in aliases and i not in column_map.values()),
+                None
+            )
+        if column_map.get(self.PRIMARY_FIELD) is None and self.headers:
+            column_map[self.PRIMARY_FIELD] = 0
+        return column_map
+
+    @staticmethod
+    def _cell(row, idx):
+        if idx is None or idx >= len(row) or row[idx] is None:
+            return ""
+        return str(row[idx]).strip()
+
+    def _lang(self, row, idx, default_lang):
+        return self.lang_lookup.get(self._cell(row, idx).lower(), default_lang)
+
+    def _num(self, row, idx, default_num):
+        try:
+            return int(float(self._cell(row, idx)))
+        except (ValueError, OverflowError): # Not a number, NaN or inf
+            return default_num
+
+
+class KeywordImporter(SpreadsheetImporter):
+    """Reads keyword rows from a CSV or XLSX tagging spec."""
+
+    HEADER_ALIASES = {
+        "text": ("text", "keyword", "keywords", "tag", "tagging", "tag name", "event"),
+        "lang": ("lang", "language", "locale"),
+        "num": ("num", "number", "no", "page", "group"),
+        "button_id": ("button_id", "button id", "buttonid", "button", "id", "element id", "element_id"),
+    }
+    PRIMARY_FIELD = "text"
+
+    def iter_keywords(self, column_map, default_lang, default_num):
+        """Yields keyword objects for every row that has keyword text."""
+        text_idx, lang_idx = column_map['text'], column_map.get('lang')
+        num_idx, button_idx = column_map.get('num'), column_map.get('button_id')
+
+        for row in self.rows:
+            text = self._cell(row, text_idx)
+            if not text:
+                continue
+            yield {
+                'text': text,
+                'lang': self._lang(row, lang_idx, default_lang),
+                'num': self._num(row, num_idx, default_num),
+                'button_id': self._cell(row, button_idx),
+            }
+
+
+class URLImporter(SpreadsheetImporter):
+    """Reads URL rows from text, CSV or XLSX files, and page URLs from sitemaps."""
+
+    HEADER_ALIASES = {
+        "url": ("url", "urls", "link", "page", "page url", "address", "loc"),
+        "lang": ("lang", "language", "locale"),
+        "num": ("num", "number", "no", "group"),
+    }
+    PRIMARY_FIELD = "url"
+    SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+    MAX_SITEMAPS = 200 # Upper bound when following a sitemap index
+
+    def _is_data_row(self, row):
+        return any("://" in str(cell) or str(cell).startswith("www.") for cell in row if cell)
+
+    def iter_urls(self, default_lang, default_num):
+        """Yields URL objects for every row that has a URL."""
+        column_map = self.detect_columns()
+        url_idx, lang_idx, num_idx = column_map['url'], column_map.get('lang'), column_map.get('num')
+        for row in self.rows:
+            url = self._cell(row, url_idx)
+            if url:
+                yield {'url': url, 'lang': self._lang(row, lang_idx, default_lang), 'num': self._num(row, num_idx, default_num)}
+
+    @classmethod
+    def _open_sitemap(cls, source):
+        if "://" in source and not source.startswith("file://"):
+            request = urllib.request.Request(source, headers={"User-Agent": "Tag-QA-Tool"})
+            data = urllib.request.urlopen(request, timeout=30).read()
+        else:
+            with open(source.replace("file://", "", 1), 'rb') as f:
+                data = f.read()
+        if data[:2] == b"\x1f\x8b": # gzip magic number
+            data = gzip.decompress(data)
+        return io.BytesIO(data)
+
+    @classmethod
+    def read_sitemap(cls, source):
+        """Returns the page URLs of a sitemap, following sitemap index files."""
+        page_urls, pending, visited = [], [source], set()
+        while pending and len(visited) < cls.MAX_SITEMAPS:
+            sitemap = pending.pop(0)
+            if sitemap in visited:
+                continue
+            visited.add(sitemap)
+
+            for _, element in ElementTree.iterparse(cls._open_sitemap(sitemap)):
+                tag = element.tag.replace(cls.SITEMAP_NS, "")
+                if tag == "sitemap":
+                    loc = element.findtext(f"{cls.SITEMAP_NS}loc") or element.findtext("loc")
+                    if loc:
+                        pending.append(loc.strip())
+                elif tag == "url":
+                    loc = element.findtext(f"{cls.SITEMAP_NS}loc") or element.findtext("loc")
+                    if loc:
+                        page_urls.append(loc.strip())
+                    element.clear() # Keep memory flat on very large sitemaps
+        return page_urls
+
+
+class EditHistory:
+    """Undo/redo log of list edits.
+
+    Each step is a tuple of operations instead of a copy of the whole list:
+    ("insert", index, items), ("delete", index, items) or
+    ("update", index, old_item, new_item). Recording an edit and undoing it
+    costs the size of that edit, not the size of the list.
+    """
+
+    def __init__(self, max_steps=500):
+        self.undo_stack = deque(maxlen=max_steps)
+        self.redo_stack = deque()
+
+    def record(self, *ops):
+        """Records one undoable step made of one or more operations."""
+        ops = tuple(op for op in ops if op[0] == "update" or op[2])
+        if not ops:
+            return
+        self.undo_stack.append(ops)
+        self.redo_stack.clear()
+
+    @staticmethod
+    def _inverse(op):
+        kind, index = op[0], op[1]
+        if kind == "insert":
+            return ("delete", index, op[2])
+        if kind == "delete":
+            return ("insert", index, op[2])
+        return ("update", index, op[3], op[2])
+
+    def undo(self, apply_op):
+        """Applies the inverse of the last step through `apply_op`. Returns False if there is nothing to undo."""
+        if not self.undo_stack:
+            return False
+        ops = self.undo_stack.pop()
+        for op in reversed(ops):
+            apply_op(self._inverse(op))
+        self.redo_stack.append(ops)
+        return True
+
+    def redo(self, apply_op):
+        """Re-applies the last undone step through `apply_op`. Returns False if there is nothing to redo."""
+        if not self.redo_stack:
+            return False
+        ops = self.redo_stack.pop()
+        for op in ops:
+            apply_op(op)
+        self.undo_stack.append(ops)
+        return True
+
+
+class ReportBuilder:
+    """Collects report rows on a background thread while a Fast Test is running.
+
+    Every captured keyword is queued with `add_row`. The consumer thread
+    appends it to a `_partial.jsonl` side file for crash recovery: if the run
+    dies, the rows can be recovered from it. `finish` sorts the rows and
+    writes the report(s), loading each screenshot from its path as the row is
+    laid out, then deletes the side file.
+    """
+
+    HEADERS = ["Keyword", "Language", "Status", "URL", "Screenshot", "Attempts", "Error", "Trace"]
+    COLUMN_WIDTHS = {'A': 30, 'B': 10, 'C': 15, 'D': 40, 'E': 80, 'F': 10, 'G': 50, 'H': 14} # E is approx 600px
+    IMAGE_WIDTH = 600
+    PERFORMANCE_COLUMNS = (
+        ("url", "URL", 50), ("lang", "Language", 10), ("tag_requests", "Tag Requests", 14),
+        ("total_bytes", "Total Bytes", 14), ("first_tag_ms", "Time to First Tag (ms)", 22),
+        ("p95_latency_ms", "p95 Latency (ms)", 18),
+    )
+
+    REPORT_FORMATS = {"Excel": ("xlsx",), "HTML": ("html",), "Excel + HTML": ("xlsx", "html")}
+
+    def __init__(self, outputs_dir, sort_fn=None, formats=("xlsx",)):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.report_base = Path(outputs_dir) / f"Test_Report_{timestamp}"
+        self.report_path = self.report_base.with_suffix(".xlsx")
+        self.partial_path = Path(outputs_dir) / f"Test_Report_{timestamp}_partial.jsonl"
+        self.formats = tuple(formats)
+        self.sort_fn = sort_fn
+        self.rows = []
+        self.performance_rows = [] # Per-URL tag performance, written as a second sheet on finish
+        self.run_summary = {} # Label -> value, written as a "Run Summary" sheet on finish
+        self.error = None
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def _new_workbook(cls):
+        from openpyxl import Workbook
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Test Report"
+
+        # --- Headers ---
+        ws.append(cls.HEADERS)
+        for col_idx in range(1, len(cls.HEADERS) + 1):
+            cell = ws.cell(row=1, column=col_idx)
+            cell.font = cell.font.copy(bold=True)
+        for column, width in cls.COLUMN_WIDTHS.items():
+            ws.column_dimensions[column].width = width
+        return wb, ws
+
+    @classmethod
+    def _load_image(cls, item):
+        """The row's screenshot scaled to IMAGE_WIDTH, or the text to show when it cannot be embedded."""
+        img_path = item['screenshot_path']
+        if not os.path.exists(img_path):
+            return "Image not found"
+        try:
+            img = cls._embeddable_image(img_path)
+            # Scale image to a fixed width, preserving aspect ratio
+            img.height = img.height * (cls.IMAGE_WIDTH / img.width)
+            img.width = cls.IMAGE_WIDTH
+            return img
+        except Exception as img_e:
+            return f"Error loading image: {img_e}"
+
+    @classmethod
+    def _write_row(cls, ws, row_idx, item):
+        image = cls._load_image(item)
+        ws.cell(row=row_idx, column=1, value=item['keyword'])
+        ws.cell(row=row_idx, column=2, value=item['lang'])
+        ws.cell(row=row_idx, column=3, value=item['status'])
+        ws.cell(row=row_idx, column=4, value=item['url'])
+        ws.cell(row=row_idx, column=6, value=item.get('attempts', 1))
+        ws.cell(row=row_idx, column=7, value=item.get('error', ''))
+        if item.get('trace_path'):
+            trace_cell = ws.cell(row=row_idx, column=8, value="Open trace")
+            trace_cell.hyperlink = Path(item['trace_path']).resolve().as_uri()
+            trace_cell.style = "Hyperlink"
+
+        if isinstance(image, str):
+            ws.cell(row=row_idx, column=5, value=image)
+        else:
+            ws.add_image(image, f'E{row_idx}')
+            ws.row_dimensions[row_idx].height = image.height * 0.75 # Convert pixels to points
+
+    @staticmethod
+    def _embeddable_image(img_path):
+        """openpyxl embeds PNG, JPEG and GIF files as they are; others (WebP) are converted to JPEG in memory."""
+        from openpyxl.drawing.image import Image as OpenpyxlImage
+        img = OpenpyxlImage(img_path)
+        if img.format in ('png', 'jpeg', 'gif'):
+            return img
+        from PIL import Image
+        buffer = io.BytesIO()
+        with Image.open(img_path) as source:
+            source.convert('RGB').save(buffer, format='JPEG', quality=90)
+        return OpenpyxlImage(buffer)
+
+    @classmethod
+    def _write_performance_sheet(cls, wb, performance_rows):
+        ws = wb.create_sheet("Tag Performance")
+        ws.append([header for _, header, _ in cls.PERFORMANCE_COLUMNS])
+        for col_idx, (_, _, width) in enumerate(cls.PERFORMANCE_COLUMNS, 1):
+            cell = ws.cell(row=1, column=col_idx)
+            cell.font = cell.font.copy(bold=True)
+            ws.column_dimensions[cell.column_letter].width = width
+        for item in performance_rows:
+            ws.append([item.get(key) if item.get(key) is not None else "N/A" for key, _, _ in cls.PERFORMANCE_COLUMNS])
+
+    @classmethod
+    def write_workbook(cls, rows, report_path, performance_rows=None, run_summary=None):
+        """Writes already-sorted report rows (and optional per-URL tag performance and run summary) to an .xlsx file."""
+        wb, ws = cls._new_workbook()
+        for row_idx, item in enumerate(rows, 2):
+            cls._write_row(ws, row_idx, item)
+        if performance_rows:
+            cls._write_performance_sheet(wb, performance_rows)
+        if run_summary:
+            summary_ws = wb.create_sheet("Run Summary")
+            for label, value in run_summary.items():
+                summary_ws.append([label, value])
+            summary_ws.column_dimensions['A'].width = 30
+            summary_ws.column_dimensions['B'].width = 20
+        wb.save(report_path)
+
+    def add_row(self, item):
+        """Queues a finished report row. Safe to call from any thread."""
+        self._queue.put(dict(item))
+
+    def add_performance(self, item):
+        """Adds one URL's tag performance summary. Safe to call from any thread."""
+        self.performance_rows.append(dict(item))
+
+    def _consume(self):
+        try:
+            partial_file = open(self.partial_path, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"Report checkpoint error: {e}")
+            partial_file = None
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self.rows.append(item)
+            if partial_file:
+                try:
+                    partial_file.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+                    partial_file.flush()
+                except Exception as e:
+                    print(f"Report checkpoint error: {e}")
+
+        if partial_file:
+            partial_file.close()
+
+    @classmethod
+    def write_reports(cls, rows, report_base, formats, performance_rows=None, run_summary=None):
+        """Writes already-sorted rows in each of `formats` ("xlsx", "html") next to `report_base`. Returns the paths."""
+        paths = []
+        for report_format in formats:
+            report_path = Path(report_base).with_suffix(f".{report_format}")
+            if report_format == "html":
+                HtmlReportWriter.write(rows, report_path, performance_rows, run_summary)
+            else:
+                cls.write_workbook(rows, report_path, performance_rows, run_summary)
+            paths.append(report_path)
+        return paths
+
+    def finish(self):
+        """Drains the queue, writes the sorted report(s) and returns their paths, or None without rows."""
+        self._queue.put(None)
+        self._thread.join()
+        if not self.rows:
+            return None
+
+        rows = self.sort_fn(self.rows) if self.sort_fn else self.rows
+        paths = self.write_reports(rows, self.report_base, self.formats, self.performance_rows, self.run_summary)
+        if self.partial_path.exists():
+            os.remove(self.partial_path)
+        return paths
+
+
+class HtmlReportWriter:
+    """Writes the test report as one static HTML file, an alternative to the xlsx for large runs.
+
+    Rows are embedded as JSON and rendered by the page a PAGE_SIZE chunk at a
+    time, with sorting and filtering done in the browser. Screenshots are not
+    embedded: they are linked relative to the report (so the report and the
+    workspace can be moved together) and load lazily as they scroll into view.
+    """
+
+    PAGE_SIZE = 100
+    COLUMNS = ["Keyword", "Language", "Status", "URL", "Screenshot", "Attempts", "Error", "Trace"]
+    TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { font-family: -apple-system, Helvetica, Arial, sans-serif; margin: 16px; color: #222; }
+h1 { font-size: 20px; }
+.controls { display: flex; gap: 8px; align-items: center; margin: 12px 0; flex-wrap: wrap; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; font-size: 13px; }
+th { background: #f3f3f3; position: sticky; top: 0; }
+#rows th { cursor: pointer; user-select: none; }
+#rows th.sorted-asc::after { content: " \\25B2"; }
+#rows th.sorted-desc::after { content: " \\25BC"; }
+td.url, td.error { word-break: break-all; max-width: 320px; }
+td img { width: 600px; min-height: 60px; background: #fafafa; }
+tr.status-FAILED td.status { color: #c00; font-weight: bold; }
+tr.status-PASS td.status { color: #080; font-weight: bold; }
+.muted { color: #888; }
+details { margin: 12px 0; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<div id="summary"></div>
+<div class="controls">
+  <input id="search" type="search" placeholder="Keyword, URL or error" size="40">
+  <select id="status"><option value="">All statuses</option></select>
+  <select id="lang"><option value="">All languages</option></select>
+  <button id="prev">&lt; Prev</button>
+  <span id="page-info"></span>
+  <button id="next">Next &gt;</button>
+</div>
+<table id="rows"><thead><tr></tr></thead><tbody></tbody></table>
+<script id="report-data" type="application/json">__DATA__</script>
+<script>
+(function () {
+  const data = JSON.parse(document.getElementById("report-data").textContent);
+  const rows = data.rows, pageSize = data.page_size;
+  const STATUS = 2, LANG = 1, SCREENSHOT = 4, ATTEMPTS = 5, TRACE = 7;
+  const $ = (id) => document.getElementById(id);
+  let view = rows.map((_, i) => i), sortColumn = null, sortDirection = 1, page = 0;
+
+  function element(tag, text, className) {
+    const node = document.createElement(tag);
+    if (text !== undefined && text !== null) node.textContent = text;
+    if (className) node.className = className;
+    return node;
+  }
+
+  function fillSelect(select, column) {
+    [...new Set(rows.map((row) => row[column]))].sort().forEach((value) => select.add(new Option(value, value)));
+  }
+
+  function renderSummary() {
+    const sections = [["Run Summary", data.summary], ["Tag Performance", data.performance]];
+    for (const [title, table] of sections) {
+      if (!table || !table.rows.length) continue;
+      const details = element("details"), tableNode = element("table"), header = element("tr");
+      details.appendChild(element("summary", title));
+      table.columns.forEach((column) => header.appendChild(element("th", column)));
+      tableNode.appendChild(header);
+      for (const row of table.rows) {
+        const tr = element("tr");
+        row.forEach((value) => tr.appendChild(element("td", value === null ? "N/A" : value)));
+        tableNode.appendChild(tr);
+      }
+      details.appendChild(tableNode);
+      $("summary").appendChild(details);
+    }
+  }
+
+  function applyFilters() {
+    const query = $("search").value.toLowerCase(), status = $("status").value, lang = $("lang").value;
+    view = [];
+    rows.forEach((row, i) => {
+      if (status && row[STATUS] !== status) return;
+      if (lang && row[LANG] !== lang) return;
+      if (query && !(row[0] + " " + row[3] + " " + row[6]).toLowerCase().includes(query)) return;
+      view.push(i);
+    });
+    sortView();
+    page = 0;
+    render();
+  }
+
+  function sortView() {
+    if (sortColumn === null) return;
+    view.sort((a, b) => {
+      const x = rows[a][sortColumn], y = rows[b][sortColumn];
+      return (x < y ? -1 : x > y ? 1 : 0) * sortDirection || a - b;
+    });
+  }
+
+  function render() {
+    const tbody = document.querySelector("#rows tbody");
+    const start = page * pageSize, pageRows = view.slice(start, start + pageSize);
+    tbody.replaceChildren();
+    for (const i of pageRows) {
+      const row = rows[i], tr = element("tr", null, "status-" + row[STATUS]);
+      row.forEach((value, column) => {
+        const td = element("td", null, ["keyword", "lang", "status", "url", "shot", "attempts", "error", "trace"][column]);
+        if (column === SCREENSHOT || column === TRACE) {
+          if (value) {
+            const link = element("a", column === TRACE ? "Open trace" : null);
+            link.href = value;
+            link.target = "_blank";
+            if (column === SCREENSHOT) {
+              const img = element("img");
+              img.loading = "lazy";
+              img.decoding = "async";
+              img.src = value;
+              link.appendChild(img);
+            }
+            td.appendChild(link);
+          } else if (column === SCREENSHOT) {
+            td.appendChild(element("span", "Image not found", "muted"));
+          }
+        } else {
+          td.textContent = value;
+        }
+        tr.appendChild(td);
+      });
+      tbody.appendChild(tr);
+    }
+    $("page-info").textContent = view.length
+      ? `Rows ${start + 1}-${start + pageRows.length} of ${view.length}` + (view.length < rows.length ? ` (filtered from ${rows.length})` : "")
+      : "No matching rows";
+    $("prev").disabled = page === 0;
+    $("next").disabled = start + pageSize >= view.length;
+    window.scrollTo(0, 0);
+  }
+
+  const headerRow = document.querySelector("#rows thead tr");
+  data.columns.forEach((column, i) => {
+    const th = element("th", column);
+    if (i !== SCREENSHOT && i !== TRACE) {
+      th.addEventListener("click", () => {
+        sortDirection = sortColumn === i ? -sortDirection : 1;
+        sortColumn = i;
+        headerRow.querySelectorAll("th").forEach((node) => node.className = "");
+        th.className = sortDirection === 1 ? "sorted-asc" : "sorted-desc";
+        sortView();
+        page = 0;
+        render();
+      });
+    }
+    headerRow.appendChild(th);
+  });
+  fillSelect($("status"), STATUS);
+  fillSelect($("lang"), LANG);
+  let searchTimer = null;
+  $("search").addEventListener("input", () => { clearTimeout(searchTimer); searchTimer = setTimeout(applyFilters, 200); });
+  $("status").addEventListener("change", applyFilters);
+  $("lang").addEventListener("change", applyFilters);
+  $("prev").addEventListener("click", () => { page -= 1; render(); });
+  $("next").addEventListener("click", () => { page += 1; render(); });
+  renderSummary();
+  render();
+})();
+</script>
+</body>
+</html>
+"""
+
+    @staticmethod
+    def _link(path, report_dir):
+        """A URL for `path` relative to the report, or a file URI if there is no relative path (other drive)."""
+        if not path or not os.path.exists(path):
+            return ""
+        try:
+            return quote(Path(os.path.relpath(path, report_dir)).as_posix())
+        except ValueError:
+            return Path(path).resolve().as_uri()
+
+    @classmethod
+    def write(cls, rows, report_path, performance_rows=None, run_summary=None):
+        """Writes already-sorted report rows (and optional tag performance and run summary) to an .html file."""
+        report_path = Path(report_path)
+        report_dir = report_path.parent
+        data = {
+            'columns': cls.COLUMNS,
+            'page_size': cls.PAGE_SIZE,
+            'rows': [[
+                item['keyword'], item['lang'], item['status'], item['url'],
+                cls._link(item.get('screenshot_path'), report_dir),
+                item.get('attempts', 1), item.get('error', ''),
+                cls._link(item.get('trace_path'), report_dir),
+            ] for item in rows],
+            'performance': {
+                'columns': [header for _, header, _ in ReportBuilder.PERFORMANCE_COLUMNS],
+                'rows': [[item.get(key) for key, _, _ in ReportBuilder.PERFORMANCE_COLUMNS] for item in performance_rows or []],
+            },
+            'summary': {'columns': ["", ""], 'rows': [[label, value] for label, value in (run_summary or {}).items()]},
+        }
+        # "</" cannot appear inside a <script> element
+        data_json = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace("</", "<\\/")
+        title = html.escape(report_path.stem)
+        page = cls.TEMPLATE.replace("__TITLE__", title).replace("__DATA__", data_json)
+        temp_path = report_path.with_name(report_path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        os.replace(temp_path, report_path)
+
+
+class RunArchive:
+    """Compressed, chunked archive of a run (a zip file with a .tqarun extension).
+
+    `manifest.json` holds the session, keyword statuses, report rows (with
+    screenshot paths) and per-URL summaries. Logs are stored separately in
+    chunks of CHUNK_SIZE rows, so opening an archive only reads the manifest
+    and logs can be streamed chunk by chunk afterwards.
+    """
+
+    VERSION = 1
+    EXTENSION = ".tqarun"
+    CHUNK_SIZE = 5000
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(self.path)
+        self.manifest = json.loads(self._zip.read("manifest.json"))
+        if self.manifest.get('version', 0) > self.VERSION:
+            raise ValueError(f"Archive version {self.manifest.get('version')} is newer than this app supports")
+
+    @property
+    def session(self):
+        return self.manifest.get('session', {})
+
+    @property
+    def keyword_statuses(self):
+        return self.manifest.get('keyword_statuses', {})
+
+    @property
+    def report_data(self):
+        return self.manifest.get('report_data', [])
+
+    @property
+    def total_logs(self):
+        return self.manifest.get('total_logs', 0)
+
+    @classmethod
+    def write(cls, path, session, keyword_statuses, report_data, url_results):
+        """Writes an archive atomically (temp file + rename)."""
+        path = Path(path)
+        temp_path = path.with_name(path.name + ".tmp")
+        chunks = []
+        result_summaries = []
+        with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+            for url_index, result in enumerate(url_results):
+                logs = result.get('logs', [])
+                for start in range(0, len(logs), cls.CHUNK_SIZE):
+                    name = f"logs/{len(chunks):05d}.json"
+                    zf.writestr(name, json.dumps([list(log) for log in logs[start:start + cls.CHUNK_SIZE]], separators=(',', ':')))
+                    chunks.append({'name': name, 'url_index': url_index, 'count': len(logs[start:start + cls.CHUNK_SIZE])})
+                summary = {key: value for key, value in result.items() if key != 'logs'}
+                summary['log_count'] = len(logs)
+                result_summaries.append(summary)
+
+            manifest = {
+                'version': cls.VERSION,
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'session': session,
+                'keyword_statuses': keyword_statuses,
+                'report_data': [{**item, 'screenshot_path': str(item.get('screenshot_path', ''))} for item in report_data],
+                'url_results': result_summaries,
+                'log_chunks': chunks,
+                'total_logs': sum(chunk['count'] for chunk in chunks),
+            }
+            zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, separators=(',', ':')))
+        os.replace(temp_path, path)
+
+    def iter_log_chunks(self, url_index=None, with_url_index=False):
+        """Yields lists of log tuples one chunk at a time, optionally for one URL only.
+
+        With `with_url_index`, yields (url index, logs) pairs.
+        """
+        for chunk in self.manifest.get('log_chunks', []):
+            if url_index is None or chunk['url_index'] == url_index:
+                logs = [tuple(log) for log in json.loads(self._zip.read(chunk['name']))]
+                yield (chunk['url_index'], logs) if with_url_index else logs
+
+    def url_summaries(self):
+        """The per-URL results without their logs."""
+        results = [dict(summary) for summary in self.manifest.get('url_results', [])]
+        for result in results:
+            result.pop('log_count', None)
+        return results
+
+    def close(self):
+        self._zip.close()
+
+
+class RunDiff:
+    """Row-level comparison of two runs, keyed by (keyword, lang, url).
+
+    Both runs are indexed into dicts once, so classifying is linear in the
+    number of rows. Rows are classified as new, missing, status_changed or
+    unchanged; `changes` lists all but the unchanged ones.
+    """
+
+    KINDS = ("status_changed", "new", "missing", "unchanged")
+    LABELS = {"status_changed": "Status Changed", "new": "New", "missing": "Missing", "unchanged": "Unchanged"}
+    HEADERS = ["Change", "Keyword", "Language", "URL", "Old Status", "New Status", "Old Screenshot", "New Screenshot"]
+    COLUMN_WIDTHS = {'A': 16, 'B': 30, 'C': 10, 'D': 40, 'E': 12, 'F': 12, 'G': 34, 'H': 34}
+    THUMBNAIL_WIDTH = 240
+
+    def __init__(self, old_rows, new_rows, old_name="Old", new_name="New"):
+        self.old_name = old_name
+        self.new_name = new_name
+        old_index = self._index(old_rows)
+        new_index = self._index(new_rows)
+
+        self.counts = Counter({kind: 0 for kind in self.KINDS})
+        self.changes = []
+        for key, new_row in new_index.items():
+            old_row = old_index.get(key)
+            if old_row is None:
+                kind = "new"
+            elif old_row.get('status') != new_row.get('status'):
+                kind = "status_changed"
+            else:
+                kind = "unchanged"
+            self.counts[kind] += 1
+            if kind != "unchanged":
+                self.changes.append((kind, key, old_row, new_row))
+        for key, old_row in old_index.items():
+            if key not in new_index:
+                self.counts["missing"] += 1
+                self.changes.append(("missing", key, old_row, None))
+
+        kind_order = {kind: i for i, kind in enumerate(self.KINDS)}
+        self.changes.sort(key=lambda change: (kind_order[change[0]], change[1][2], change[1][0]))
+
+    @staticmethod
+    def _index(rows):
+        return {(row['keyword'], row['lang'], row['url']): row for row in rows}
+
+    @classmethod
+    def from_archives(cls, old_path, new_path):
+        """Compares the report rows of two run archives (manifests only, logs are not read)."""
+        old_archive, new_archive = RunArchive(old_path), RunArchive(new_path)
+        try:
+            return cls(old_archive.report_data, new_archive.report_data,
+                       old_name=Path(old_path).name, new_name=Path(new_path).name)
+        finally:
+            old_archive.close()
+            new_archive.close()
+
+    @classmethod
+    def _thumbnail(cls, image_path):
+        """Returns a JPEG thumbnail as (BytesIO, width, height), or None if the image is unavailable."""
+        if not image_path or not os.path.exists(image_path):
+            return None
+        from PIL import Image
+        try:
+            with Image.open(image_path) as img:
+                img.thumbnail((cls.THUMBNAIL_WIDTH, cls.THUMBNAIL_WIDTH * 4))
+                buffer = io.BytesIO()
+                img.convert('RGB').save(buffer, format='JPEG', quality=80)
+                return buffer, img.width, img.height
+        except Exception as e:
+            print(f"Thumbnail error for {image_path}: {e}")
+            return None
+
+    def write_workbook(self, report_path):
+        """Writes a Summary sheet and a Changes sheet with old/new thumbnails side by side."""
+        from openpyxl import Workbook
+        from openpyxl.drawing.image import Image as OpenpyxlImage
+        wb = Workbook()
+        summary_ws = wb.active
+        summary_ws.title = "Summary"
+        summary_ws.append(["Old run", self.old_name])
+        summary_ws.append(["New run", self.new_name])
+        summary_ws.append([])
+        for kind in self.KINDS:
+            summary_ws.append([self.LABELS[kind], self.counts[kind]])
+        summary_ws.column_dimensions['A'].width = 18
+        summary_ws.column_dimensions['B'].width = 40
+
+        ws = wb.create_sheet("Changes")
+        ws.append(self.HEADERS)
+        for col_idx in range(1, len(self.HEADERS) + 1):
+            cell = ws.cell(row=1, column=col_idx)
+            cell.font = cell.font.copy(bold=True)
+        for column, width in self.COLUMN_WIDTHS.items():
+            ws.column_dimensions[column].width = width
+        ws.freeze_panes = "A2"
+
+        # Thumbnails are decoded and scaled in parallel; only changed rows get them
+        image_paths = []
+        for kind, key, old_row, new_row in self.changes:
+            image_paths.append(old_row.get('screenshot_path') if old_row else None)
+            image_paths.append(new_row.get('screenshot_path') if new_row else None)
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            thumbnails = list(executor.map(self._thumbnail, image_paths))
+
+        for i, (kind, (keyword, lang, url), old_row, new_row) in enumerate(self.changes):
+            row_idx = i + 2
+            ws.append([
+                self.LABELS[kind], keyword, lang, url,
+                old_row.get('status') if old_row else "",
+                new_row.get('status') if new_row else "",
+            ])
+            row_height = 0
+            for column, thumbnail in zip(("G", "H"), thumbnails[2 * i:2 * i + 2]):
+                if thumbnail is None:
+                    continue
+                buffer, width, height = thumbnail
+                img = OpenpyxlImage(buffer)
+                img.width, img.height = width, height
+                ws.add_image(img, f"{column}{row_idx}")
+                row_height = max(row_height, height)
+            if row_height:
+                ws.row_dimensions[row_idx].height = row_height * 0.75 # Convert pixels to points
+
+        wb.save(report_path)
+
+
+class RetryPolicy:
+    """Which Fast Test failures are retried, and after what delay.
+
+    Backoff and retryable error classes come from retry_policy.json in the
+    workspace (written with the defaults on first use); the number of
+    attempts comes from the main window. Errors are classified by the text
+    of "ExceptionType: message", which is also what worker processes report.
+    """
+
+    ERROR_CLASSES = {
+        'timeout': ("TimeoutError", "Timeout ", "timed out"),
+        'target_closed': ("TargetClosedError", "Target closed", "has been closed"),
+        'network': ("net::ERR_",),
+        'crash': ("Worker process crashed",),
+    }
+    DEFAULTS = {
+        'backoff_seconds': 5.0,
+        'backoff_factor': 2.0,
+        'max_backoff_seconds': 60.0,
+        'retry_on': ["timeout", "target_closed", "crash"],
+    }
+
+    def __init__(self, max_attempts=3, **settings):
+        self.max_attempts = max(1, max_attempts)
+        settings = dict(self.DEFAULTS, **{key: value for key, value in settings.items() if key in self.DEFAULTS})
+        self.backoff_seconds = float(settings['backoff_seconds'])
+        self.backoff_factor = float(settings['backoff_factor'])
+        self.max_backoff_seconds = float(settings['max_backoff_seconds'])
+        self.retry_on = set(settings['retry_on'])
+
+    @classmethod
+    def load(cls, path, max_attempts=3):
+        path = Path(path)
+        try:
+            if not path.exists():
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(cls.DEFAULTS, f, indent=4)
+                return cls(max_attempts)
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(max_attempts, **json.load(f))
+        except Exception as e:
+            print(f"Could not read retry policy {path}: {e}")
+            return cls(max_attempts)
+
+    def error_class(self, error):
+        """Returns the ERROR_CLASSES name of an error text, or None."""
+        for name, markers in self.ERROR_CLASSES.items():
+            if any(marker in error for marker in markers):
+                return name
+        return None
+
+    def should_retry(self, error, attempt):
+        return attempt < self.max_attempts and self.error_class(error) in self.retry_on
+
+    def delay(self, attempt):
+        """Exponential backoff before attempt number `attempt + 1`."""
+        return min(self.max_backoff_seconds, self.backoff_seconds * self.backoff_factor ** (attempt - 1))
+
+
+class LatencyHistory:
+    """Latency samples of previous runs per URL and per host, used to size waits and timeouts.
+
+    Samples: navigation_ms (page.goto), last_tag_ms (last tag request done,
+    after navigation start), click_ms (the click itself), click_settle_ms
+    (last request after a click) and url_ms (the whole URL). A URL with fewer than MIN_SAMPLES runs uses
+    its host's samples, and a host never seen uses DEFAULTS.
+    """
+
+    VERSION = 1
+    MAX_SAMPLES = 20
+    MIN_SAMPLES = 2
+    METRICS = ("navigation_ms", "last_tag_ms", "click_ms", "click_settle_ms", "url_ms")
+    DEFAULTS = {
+        'navigation_timeout_ms': 30000, # Playwright's default
+        'idle_seconds': 3.0,
+        'settle_seconds': 0.0,
+        'click_timeout_ms': 5000,
+        'click_idle_seconds': 3.0,
+    }
+    LEARNED_IDLE_SECONDS = 1.5 # Idle window once the usual settle time is known
+
+    def __init__(self, urls=None, hosts=None):
+        self.urls = urls or {} # url -> metric -> [samples]
+        self.hosts = hosts or {}
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == cls.VERSION:
+                return cls(data.get('urls'), data.get('hosts'))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Could not read latency history {path}: {e}")
+        return cls()
+
+    def save(self, path):
+        path = Path(path)
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'urls': self.urls, 'hosts': self.hosts}, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _host(url):
+        return urlsplit(url).netloc.lower()
+
+    def record(self, url, latency):
+        """Adds one run's latency dict (see UrlTestRunner.latency)."""
+        for samples_by_metric in (self.urls.setdefault(url, {}), self.hosts.setdefault(self._host(url), {})):
+            for metric in self.METRICS:
+                values = latency.get(metric)
+                values = values if isinstance(values, list) else [values]
+                samples = samples_by_metric.setdefault(metric, [])
+                samples.extend(value for value in values if value is not None)
+                del samples[:-self.MAX_SAMPLES]
+
+    @staticmethod
+    def _percentile(samples, percent):
+        ordered = sorted(samples)
+        return ordered[max(0, -(-len(ordered) * percent // 100) - 1)] # Nearest rank
+
+    def _samples(self, url, metric):
+        for samples_by_metric in (self.urls.get(url, {}), self.hosts.get(self._host(url), {})):
+            samples = samples_by_metric.get(metric, [])
+            if len(samples) >= self.MIN_SAMPLES:
+                return samples
+        return None
+
+    def median(self, url, metric):
+        """Median of a URL's (or its host's) samples of `metric`, or None without enough history."""
+        samples = self._samples(url, metric)
+        return self._percentile(samples, 50) if samples else None
+
+    def timeouts_for(self, url):
+        """Timeouts and idle windows for a URL, with safety margins over its history."""
+        timeouts = dict(self.DEFAULTS)
+        clamp = lambda value, low, high: max(low, min(high, value))
+
+        navigation = self._samples(url, 'navigation_ms')
+        if navigation:
+            timeouts['navigation_timeout_ms'] = round(clamp(self._percentile(navigation, 95) * 3 + 5000, 10000, 120000))
+        last_tag = self._samples(url, 'last_tag_ms')
+        if last_tag:
+            timeouts['settle_seconds'] = clamp(self._percentile(last_tag, 90) / 1000 * 1.25 + 0.5, 0.0, 60.0)
+            timeouts['idle_seconds'] = self.LEARNED_IDLE_SECONDS
+        clicks = self._samples(url, 'click_ms')
+        if clicks:
+            timeouts['click_timeout_ms'] = round(clamp(self._percentile(clicks, 95) * 3 + 1000, 2000, 15000))
+        click_settle = self._samples(url, 'click_settle_ms')
+        if click_settle:
+            timeouts['click_idle_seconds'] = clamp(self._percentile(click_settle, 90) / 1000 * 1.25 + 0.5, 1.0, 5.0)
+        return timeouts
+
+
+class RunPlan:
+    """Execution plan of a Fast Test, compiled from the session before the run.
+
+    Keywords are grouped once by (lang, num) instead of being filtered per URL,
+    and duplicate keywords (same text and button) are dropped; within a group,
+    keywords that click the same button are kept together. Duplicate URLs
+    (same canonical URL, lang and num) are tested once. URLs are ordered by
+    host, in order of first appearance, and by keyword group within a host so
+    pages of a site and pages clicking the same buttons run back to back.
+    Each entry's run time is estimated from LatencyHistory, falling back to a
+    model of the runner's waits for URLs without history.
+    """
+
+    BROWSER_SECONDS = 2.0 # Launching and closing a browser
+    CAPTURE_SECONDS = 1.0 # One keyword capture
+    NAVIGATION_SECONDS = 3.0 # page.goto without history
+    EXPORT_COLUMNS = (("order", "#"), ("url", "URL"), ("lang", "Language"), ("num", "Num"), ("host", "Host"),
+                      ("keywords", "Keywords"), ("buttons", "Button Clicks"), ("duplicates", "Duplicates Removed"),
+                      ("estimate_seconds", "Estimate (s)"), ("estimate_source", "Estimate From"))
+
+    def __init__(self, url_objects, keyword_objects, latency_history=None, worker_count=1):
+        self.worker_count = max(1, worker_count)
+        self.keyword_groups = self.group_keywords(keyword_objects)
+        self.duplicate_keywords = len(keyword_objects) - sum(len(group) for group in self.keyword_groups.values())
+        self.entries = self._compile_urls(url_objects, latency_history or LatencyHistory())
+        self.duplicate_urls = len(url_objects) - len(self.entries)
+
+    @staticmethod
+    def group_key(obj):
+        return (obj['lang'], obj.get('num', 1))
+
+    @classmethod
+    def group_keywords(cls, keyword_objects):
+        """(lang, num) -> that group's keywords, without duplicates and with keywords clicking the same button together."""
+        groups = {}
+        seen = set()
+        for kw in keyword_objects:
+            key = cls.group_key(kw) + (kw['text'], kw.get('button_id', ''))
+            if key in seen:
+                continue
+            seen.add(key)
+            groups.setdefault(cls.group_key(kw), []).append(kw)
+        for group_key, keywords in groups.items():
+            button_order = {}
+            for kw in keywords:
+                button_order.setdefault(kw.get('button_id', ''), len(button_order))
+            groups[group_key] = sorted(keywords, key=lambda kw: button_order[kw.get('button_id', '')]) # Stable
+        return groups
+
+    def _compile_urls(self, url_objects, latency_history):
+        entries = {}
+        for url_obj in url_objects:
+            key = URLStore.key(url_obj)
+            if key in entries:
+                entries[key]['duplicates'] += 1
+                continue
+            keywords = self.keywords_for(url_obj)
+            entries[key] = {
+                'url_obj': url_obj,
+                'url': url_obj['url'],
+                'lang': url_obj['lang'],
+                'num': url_obj.get('num', 1),
+                'host': urlsplit(key[0]).netloc,
+                'keywords': len(keywords),
+                'buttons': len({kw['button_id'] for kw in keywords if kw.get('button_id')}),
+                'duplicates': 0,
+            }
+
+        host_order, group_order = {}, {}
+        for entry in entries.values():
+            host_order.setdefault(entry['host'], len(host_order))
+            group_order.setdefault(self.group_key(entry), len(group_order))
+        ordered = sorted(entries.values(), key=lambda entry: (host_order[entry['host']], group_order[self.group_key(entry)]))
+        for order, entry in enumerate(ordered, 1):
+            entry['order'] = order
+            entry['estimate_seconds'], entry['estimate_source'] = self._estimate(entry, latency_history)
+        return ordered
+
+    def _estimate(self, entry, latency_history):
+        """Seconds a URL is expected to take, and whether that comes from its history or the model."""
+        url_ms = latency_history.median(entry['url'], 'url_ms')
+        if url_ms is not None:
+            return round(url_ms / 1000, 1), "history"
+        timeouts = latency_history.timeouts_for(entry['url'])
+        navigation_ms = latency_history.median(entry['url'], 'navigation_ms')
+        click_ms = latency_history.median(entry['url'], 'click_ms') or 0
+        seconds = (
+            self.BROWSER_SECONDS
+            + (navigation_ms / 1000 if navigation_ms is not None else self.NAVIGATION_SECONDS)
+            + max(timeouts['idle_seconds'], timeouts['settle_seconds'])
+            + entry['buttons'] * (click_ms / 1000 + timeouts['click_idle_seconds'])
+            + entry['keywords'] * self.CAPTURE_SECONDS
+        )
+        return round(seconds, 1), "model"
+
+    def keywords_for(self, url_obj):
+        """The keywords tested on a URL, like UrlTestRunner.keywords_for but without scanning every keyword."""
+        return self.keyword_groups.get(self.group_key(url_obj), [])
+
+    @property
+    def url_objects(self):
+        return [entry['url_obj'] for entry in self.entries]
+
+    @property
+    def keyword_objects(self):
+        return [kw for keywords in self.keyword_groups.values() for kw in keywords]
+
+    @property
+    def estimate_seconds(self):
+        """Expected wall time: the summed estimates spread over the workers, but never less than the slowest URL."""
+        total = sum(entry['estimate_seconds'] for entry in self.entries)
+        longest = max((entry['estimate_seconds'] for entry in self.entries), default=0)
+        return max(total / min(self.worker_count, len(self.entries) or 1), longest)
+
+    def summary(self):
+        estimate = self.estimate_seconds
+        return (
+            f"{len(self.entries)} URL(s) on {len({entry['host'] for entry in self.entries})} host(s), "
+            f"{len(self.keyword_groups)} keyword group(s); removed {self.duplicate_urls} duplicate URL(s) "
+            f"and {self.duplicate_keywords} duplicate keyword(s); estimated {int(estimate // 60)}:{int(estimate % 60):02d} "
+            f"with {self.worker_count} worker(s)"
+        )
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow([header for _, header in self.EXPORT_COLUMNS])
+            for entry in self.entries:
+                writer.writerow([entry[key] for key, _ in self.EXPORT_COLUMNS])
+
+
+class RunMetrics:
+    """Live counters of the current Fast Test, for the in-app panel and the /metrics endpoint.
+
+    Updated from the automation thread as URLs finish and read from the Tk
+    thread and the HTTP server thread, so every access holds the lock.
+    Stage latencies come from UrlTestRunner.latency and are kept as
+    Prometheus histograms with fixed buckets.
+    """
+
+    DEFAULT_PORT = 9464
+    STAGES = {'navigation': 'navigation_ms', 'tags_settled': 'last_tag_ms', 'click': 'click_ms',
+              'click_settle': 'click_settle_ms', 'url': 'url_ms'}
+    BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0) # Seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._server = None
+        self.reset()
+
+    def reset(self, urls_total=0):
+        with self._lock:
+            self.running = urls_total > 0
+            self.started = time.monotonic()
+            self.finished = None
+            self.urls_total = urls_total
+            self.urls_done = 0
+            self.urls_reused = 0
+            self.urls_failed = 0
+            self.keywords_captured = 0
+            self.responses = 0
+            self.queue_depth = urls_total
+            self.browsers = 0
+            self.histograms = {stage: [0] * (len(self.BUCKETS) + 1) for stage in self.STAGES} # Last bucket is +Inf
+            self.histogram_sums = dict.fromkeys(self.STAGES, 0.0)
+
+    def finish(self):
+        with self._lock:
+            self.running = False
+            self.finished = time.monotonic()
+            self.queue_depth = 0
+            self.browsers = 0
+
+    def set_load(self, queue_depth=None, browsers=None):
+        with self._lock:
+            if queue_depth is not None:
+                self.queue_depth = queue_depth
+            if browsers is not None:
+                self.browsers = browsers
+
+    def record_result(self, result, reused=False):
+        """Counts one finished URL result (see UrlTestRunner.result)."""
+        with self._lock:
+            self.urls_done += 1
+            self.urls_reused += reused
+            self.urls_failed += bool(result.get('error'))
+            self.keywords_captured += sum(1 for row in result['report_rows'] if row.get('screenshot_path'))
+            if reused:
+                return
+            self.responses += len(result['logs'])
+            latency = result.get('latency') or {}
+            for stage, key in self.STAGES.items():
+                values = latency.get(key)
+                for value in (values if isinstance(values, list) else [values]):
+                    if value is None:
+                        continue
+                    seconds = value / 1000
+                    self.histograms[stage][bisect.bisect_left(self.BUCKETS, seconds)] += 1
+                    self.histogram_sums[stage] += seconds
+
+    def snapshot(self):
+        """Throughput and ETA of the run so far. Reused URLs do not count towards the rate."""
+        with self._lock:
+            elapsed = max((self.finished or time.monotonic()) - self.started, 1e-6)
+            tested = self.urls_done - self.urls_reused
+            remaining = self.urls_total - self.urls_done
+            return {
+                'running': self.running,
+                'elapsed': elapsed,
+                'urls_done': self.urls_done,
+                'urls_total': self.urls_total,
+                'urls_per_minute': tested / elapsed * 60,
+                'responses_per_second': self.responses / elapsed,
+                'eta_seconds': remaining * elapsed / tested if tested and self.running else None,
+                'queue_depth': self.queue_depth,
+                'browsers': self.browsers,
+            }
+
+    def render(self):
+        """The metrics in Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, value, labels=""):
+            lines.extend([f"# HELP tagqa_{name} {help_text}", f"# TYPE tagqa_{name} {kind}", f"tagqa_{name}{labels} {value}"])
+
+        with self._lock:
+            metric("run_active", "gauge", "1 while a Fast Test is running.", int(self.running))
+            metric("urls_total", "gauge", "URLs in the current Fast Test.", self.urls_total)
+            metric("urls_done_total", "counter", "URLs finished in the current Fast Test.", self.urls_done)
+            metric("urls_reused_total", "counter", "URLs reused from a previous run.", self.urls_reused)
+            metric("urls_failed_total", "counter", "URLs that could not be tested.", self.urls_failed)
+            metric("keywords_captured_total", "counter", "Keyword screenshots captured.", self.keywords_captured)
+            metric("responses_total", "counter", "Network requests logged.", self.responses)
+            metric("queue_depth", "gauge", "URLs waiting to be tested.", self.queue_depth)
+            metric("browsers", "gauge", "Browsers currently open for the Fast Test.", self.browsers)
+            lines.append("# HELP tagqa_stage_seconds Latency of Fast Test stages per URL.")
+            lines.append("# TYPE tagqa_stage_seconds histogram")
+            for stage, counts in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f'tagqa_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'tagqa_stage_seconds_sum{{stage="{stage}"}} {self.histogram_sums[stage]:.3f}')
+                lines.append(f'tagqa_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+        metric("responses_per_second", "gauge", "Average network requests per second of the current run.", f"{snapshot['responses_per_second']:.3f}")
+        metric("eta_seconds", "gauge", "Estimated seconds until the current run finishes.", f"{snapshot['eta_seconds'] or 0:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=None):
+        """Serves /metrics on localhost from a daemon thread. Safe to call more than once."""
+        if self._server is not None:
+            return
+        if port is None:
+            try:
+                port = int(os.environ.get(METRICS_PORT_ENV, self.DEFAULT_PORT))
+            except ValueError:
+                port = self.DEFAULT_PORT
+        if port <= 0:
+            return
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Scrapes would flood the console
+
+        try:
+            self._server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            print(f"Metrics endpoint unavailable on port {port}: {e}")
+            return
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Metrics: http://127.0.0.1:{port}/metrics")
+
+
+class FingerprintStore:
+    """Per-URL page fingerprints and results of previous runs, for incremental Fast Tests.
+
+    A fingerprint holds the document's HTTP validators (ETag, Last-Modified),
+    a SHA-256 of the document body and a hash of the URL's keyword set. A
+    stored result is reused only when the page answers 304 Not Modified or
+    returns the same body, the keywords are unchanged and every screenshot
+    of the stored result is still on disk.
+    """
+
+    VERSION = 1
+    PROBE_TIMEOUT = 15
+    USER_AGENT = "Mozilla/5.0 (Tag QA ProMax incremental check)"
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    @staticmethod
+    def _entry_key(url_obj):
+        return f"{url_obj.get('num', 1)}|{url_obj['lang']}|{url_obj['url']}"
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == cls.VERSION:
+                return cls(data.get('entries', {}))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Could not read fingerprint store {path}: {e}")
+        return cls()
+
+    def save(self, path):
+        path = Path(path)
+        temp_path = path.with_name(path.name + ".tmp")
+        with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump({'version': self.VERSION, 'entries': self.entries}, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def get(self, url_obj):
+        entry = self.entries.get(self._entry_key(url_obj))
+        return entry['fingerprint'] if entry else None
+
+    @staticmethod
+    def keyword_hash(keyword_objects):
+        keyword_set = sorted((kw['text'], kw.get('button_id', '')) for kw in keyword_objects)
+        return hashlib.sha256(json.dumps(keyword_set, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def probe(cls, url, previous=None):
+        """Fetches the document, conditionally when validators are known.
+
+        Returns a fingerprint dict with `not_modified` set on a 304, or None if
+        the page could not be fetched (the URL is then simply re-tested).
+        """
+        headers = {'User-Agent': cls.USER_AGENT}
+        if previous:
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=cls.PROBE_TIMEOUT) as response:
+                digest = hashlib.sha256()
+                for block in iter(lambda: response.read(65536), b''):
+                    digest.update(block)
+                return {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'content_hash': digest.hexdigest(),
+                    'not_modified': False,
+                }
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and previous:
+                return dict(previous, not_modified=True)
+            print(f"Incremental check failed for {url}: HTTP {e.code}")
+        except Exception as e:
+            print(f"Incremental check failed for {url}: {e}")
+        return None
+
+    def reusable_result(self, url_obj, fingerprint, keyword_hash):
+        """Returns the stored result if the page and its keywords are unchanged, else None."""
+        entry = self.entries.get(self._entry_key(url_obj))
+        if not entry or fingerprint is None:
+            return None
+        stored = entry['fingerprint']
+        if stored.get('keyword_hash') != keyword_hash:
+            return None
+        if not fingerprint.get('not_modified') and fingerprint.get('content_hash') != stored.get('content_hash'):
+            return None
+
+        result = entry['result']
+        if not all(os.path.exists(row.get('screenshot_path', '')) for row in result['report_rows']):
+            return None
+        return dict(result, logs=[tuple(log) for log in result['logs']])
+
+    def put(self, result, fingerprint):
+        fingerprint = {key: value for key, value in fingerprint.items() if key != 'not_modified'}
+        self.entries[self._entry_key(result)] = {
+            'fingerprint': fingerprint,
+            'tested': datetime.now().isoformat(timespec='seconds'),
+            'result': {
+                'url': result['url'], 'lang': result['lang'], 'num': result.get('num', 1),
+                'logs': [list(log) for log in result['logs']],
+                'statuses': result['statuses'],
+                'report_rows': [{**row, 'screenshot_path': str(row.get('screenshot_path', ''))} for row in result['report_rows']],
+                'performance': result.get('performance'),
+            },
+        }
+
+
+class AutomationJob:
+    """A unit of work submitted to the AutomationService, with its status and timings."""
+
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+        self.status = "queued" # queued, running, done, failed or cancelled
+        self.error = ""
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.future = None # concurrent.futures.Future of the job's coroutine
+        self.task = None # asyncio.Task on the automation loop, once started
+
+    @property
+    def start_latency_ms(self):
+        """Time from submission until the automation loop started the job."""
+        return None if self.started is None else (self.started - self.submitted) * 1000
+
+    @property
+    def run_seconds(self):
+        return None if self.started is None else (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def cancel(self):
+        """Cancels the job; a running job gets CancelledError at its next await. Thread-safe."""
+        if self.task is not None:
+            # Cancel the task itself, so the job counts as finished only after its cleanup ran
+            self.task.get_loop().call_soon_threadsafe(self.task.cancel)
+        elif self.future is not None:
+            self.future.cancel()
+
+
+class AutomationService:
+    """One long-lived thread that owns the automation event loop and the Playwright driver.
+
+    GUI actions (manual browser, screenshots, element test, Fast Test) are
+    submitted as jobs and run concurrently on that loop, so they share one
+    driver and start without creating a new loop or driver each time. Jobs
+    can be cancelled, and each records how long it waited before starting
+    and how long it ran.
+    """
+
+    MAX_JOBS = 50 # Finished jobs kept for the Jobs window
+
+    def __init__(self):
+        self.loop = None
+        self.jobs = [] # Recent jobs, oldest first
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._playwright = None
+        self._playwright_lock = None # asyncio.Lock, created on the loop
+
+    def start(self):
+        """Starts the service thread. Safe to call more than once."""
+        with self._lock:
+            if self.loop is not None:
+                return
+            self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="automation", daemon=True).start()
+
+    async def playwright(self):
+        """The shared Playwright driver, started on first use."""
+        if self._playwright_lock is None:
+            self._playwright_lock = asyncio.Lock()
+        async with self._playwright_lock:
+            if self._playwright is None:
+                from playwright.async_api import async_playwright
+                started = time.perf_counter()
+                self._playwright = await async_playwright().start()
+                print(f"Playwright driver started in {time.perf_counter() - started:.2f}s")
+        return self._playwright
+
+    async def warm_up(self, executable_path=None):
+        """Imports the heavy dependencies, starts the driver and launches a browser once.
+
+        Submitted after the window is shown, so the first capture, report or
+        browser launch finds modules imported, the driver running and the
+        browser binaries in the OS file cache.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, prewarm_dependencies)
+        playwright = await self.playwright()
+        launch_options = {"headless": True}
+        if executable_path:
+            launch_options["executable_path"] = executable_path
+        browser = await playwright.chromium.launch(**launch_options)
+        await browser.close()
+
+    def submit(self, name, coro_fn, *args, on_done=None):
+        """Runs coro_fn(*args) as a job on the automation loop and returns its AutomationJob.
+
+        `on_done(job)` is called once the job has finished, failed or been
+        cancelled, from a thread that is not the Tk thread.
+        """
+        self.start()
+        with self._lock:
+            job = AutomationJob(self._next_id, name)
+            self._next_id += 1
+            self.jobs.append(job)
+            finished = [old_job for old_job in self.jobs if not old_job.active]
+            for old_job in finished[:-self.MAX_JOBS]:
+                self.jobs.remove(old_job)
+
+        async def run_job():
+            job.task = asyncio.current_task()
+            job.started = time.perf_counter()
+            job.status = "running"
+            try:
+                await coro_fn(*args)
+                job.status = "done"
+            except asyncio.CancelledError:
+                job.status = "cancelled"
+                raise
+            except Exception as e:
+                job.status = "failed"
+                job.error = f"{type(e).__name__}: {e}"
+                traceback.print_exc()
+            finally:
+                job.finished = time.perf_counter()
+
+        def finished_job(future):
+            if job.active: # Cancelled before the loop started it
+                job.status = "cancelled"
+                job.finished = time.perf_counter()
+            start_note = f", started after {job.start_latency_ms:.0f} ms" if job.started is not None else ""
+            print(f"Job {job.id} {job.name}: {job.status} in {job.run_seconds or 0:.2f}s{start_note}")
+            if on_done:
+                on_done(job)
+
+        job.future = asyncio.run_coroutine_threadsafe(run_job(), self.loop)
+        job.future.add_done_callback(finished_job)
+        return job
+
+    def active_jobs(self, name=None):
+        return [job for job in list(self.jobs) if job.active and (name is None or job.name == name)]
+
+    def stop(self, on_stopped=None, timeout=300):
+        """Cancels running jobs, stops the driver and the loop. Called when the app closes.
+
+        Does not block: cancelled jobs finish their cleanup (which may still
+        need the Tk thread, e.g. through run_on_ui) for up to `timeout`
+        seconds, then `on_stopped()` is called from the service thread.
+        """
+        if self.loop is None:
+            if on_stopped:
+                on_stopped()
+            return
+
+        async def shutdown():
+            try:
+                tasks = [job.task for job in self.jobs if job.active and job.task is not None]
+                for job in self.jobs:
+                    job.cancel()
+                if tasks:
+                    await asyncio.wait(tasks, timeout=timeout) # Let the jobs save results and close their browsers
+                if self._playwright is not None:
+                    await self._playwright.stop()
+            except Exception as e:
+                print(f"Automation shutdown error: {e}")
+            finally:
+                asyncio.get_running_loop().stop()
+                if on_stopped:
+                    on_stopped()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+
+
+class UrlTestRunner:
+    """Runs the test-and-screenshot cycle for a single URL.
+
+    The runner never touches Tk, so the same code drives the in-app Fast Test
+    and the worker processes of a sharded run. GUI integration goes through
+    the optional hooks:
+      on_status(message), on_log(values), on_page(context, page),
+      await before_capture(keyword_text),
+      await capture(page, output_path, keyword_text, status, matched_logs).
+    Without a `capture` hook the keyword panel is rendered with LogPanelRenderer.
+
+    With `batch_clicks`, all buttons of the page are clicked BATCH_CLICK_GAP
+    seconds apart before a single network idle wait, instead of waiting for
+    the network after every click. Each request is then attributed to the
+    click whose window it started in (redirects to the click of the request
+    that initiated the chain), and a keyword's status only counts the page
+    load and its own button's requests.
+    """
+
+    CHROME_PATH = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+    TRACE_STATUSES = ("FAILED", "N/A") # Keyword statuses that keep the page's trace
+    BATCH_CLICK_GAP = 0.3 # Seconds between batched clicks
+
+    def __init__(self, url_obj, keyword_objects, captures_dir, incognito=True, headless=False, timeouts=None, trace_dir=None,
+                 page_capture=None, encoder=None, batch_clicks=False, keywords=None,
+                 on_status=None, on_log=None, on_page=None, before_capture=None, capture=None):
+        self.url_obj = url_obj
+        self.timeouts = dict(LatencyHistory.DEFAULTS, **(timeouts or {}))
+        # `keywords`: the URL's keywords already grouped by a RunPlan; otherwise `keyword_objects` is filtered
+        self.keywords = list(keywords) if keywords is not None else self.keywords_for(url_obj, keyword_objects)
+        self.captures_dir = Path(captures_dir)
+        self.trace_dir = Path(trace_dir) if trace_dir else None
+        self.trace = None # {'path', 'bytes', 'seconds'} when tracing
+        self.page_capture = page_capture # TiledPageCapture options for full-page captures, or None for the viewport
+        self.encoder = encoder or ScreenshotEncoder()
+        self.encoding = ScreenshotEncoder.new_stats()
+        self._pending_saves = [] # Futures of captures still being encoded
+        self.batch_clicks = batch_clicks
+        self._click_starts = [] # Batched clicks in order: LogTable.now() at dispatch...
+        self._click_buttons = [] # ...and the button clicked
+        self.log_buttons = [] # Per log row, the button its request is attributed to ('' for the page load)
+        self._request_starts = {} # Request -> LogTable.now() when its "request" event arrived
+        self.incognito = incognito
+        self.headless = headless
+        self.on_status = on_status
+        self.on_log = on_log
+        self.on_page = on_page
+        self.before_capture = before_capture
+        self.capture = capture
+
+        self.url_hash = short_url_hash(url_obj['url'])
+        self.logs = LogTable()
+        self.navigation_start = None
+        self.latency = {'navigation_ms': None, 'last_tag_ms': None, 'click_ms': [], 'click_settle_ms': []}
+        self.report_rows = []
+        self.renderer = None
+
+    @staticmethod
+    def keywords_for(url_obj, keyword_objects):
+        """The keywords tested on a URL: those with the same language and number."""
+        return [
+            kw for kw in keyword_objects
+            if kw['lang'] == url_obj['lang'] and kw.get('num', 1) == url_obj.get('num', 1)
+        ]
+
+    def _status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def _handle_request(self, request):
+        if self.batch_clicks:
+            self._request_starts[request] = LogTable.now()
+
+    async def _handle_request_done(self, request):
+        try:
+            record = await request_log_record(request, self.navigation_start, self.url_hash)
+            if self.batch_clicks:
+                self.log_buttons.append(self._attributed_button(request))
+            self.logs.append(*record)
+            if self.on_log:
+                self.on_log(record)
+        except Exception as e:
+            print(f"Error handling response: {e}")
+
+    def _attributed_button(self, request):
+        """The batched click a request belongs to: the last click dispatched before its chain started.
+
+        Both sides are LogTable.now() readings; the browser's own request timing
+        is on a different clock and is not compared with the click marks.
+        """
+        while request.redirected_from is not None:
+            request = request.redirected_from
+        started = self._request_starts.get(request)
+        if started is None:
+            started = LogTable.now()
+        click_index = bisect.bisect_right(self._click_starts, started) - 1
+        return self._click_buttons[click_index] if click_index >= 0 else ""
+
+    def matched_logs(self, keyword_text, button_id=""):
+        indices = self.logs.match(keyword_text)
+        if self.batch_clicks:
+            indices = [index for index in indices if self.log_buttons[index] in ("", button_id)]
+        return self.logs.rows(indices)
+
+    async def wait_for_network_idle(self, idle_duration=3, settle_until=None):
+        """Waits until no new logs have been added for `idle_duration` seconds, and not before `settle_until`."""
+        self._status("Waiting for network to become idle...")
+        if settle_until is not None:
+            await asyncio.sleep(max(0.0, settle_until - LogTable.now()))
+        while True:
+            last_log_count = len(self.logs)
+            await asyncio.sleep(idle_duration)
+            if len(self.logs) == last_log_count:
+                self._status("Network is idle. Proceeding...")
+                break
+
+    async def click_button_by_id(self, page, button_id, timeout=5000, before_click=None):
+        """Clicks the element if it is visible and enabled. Returns True if it was clicked."""
+        try:
+            element = page.locator(f"#{button_id}").first
+            if await element.count() == 0:
+                return False
+            if not await element.is_visible():
+                return False
+            if not await element.is_enabled():
+                return False
+            if before_click:
+                before_click()
+            await element.click(timeout=timeout)
+            return True
+        except Exception as e:
+            print(f"Error clicking element with ID '{button_id}': {e}")
+            return False
+
+    async def _click_and_settle(self, page, button_id):
+        """Clicks a button, waits for the network and records click and settle latency."""
+        click_start = LogTable.now()
+        log_count = len(self.logs)
+        clicked = await self.click_button_by_id(page, button_id, timeout=self.timeouts['click_timeout_ms'])
+        if clicked:
+            self.latency['click_ms'].append(round((LogTable.now() - click_start) * 1000))
+        await self.wait_for_network_idle(self.timeouts['click_idle_seconds'])
+        if clicked:
+            # Settled when the last request caused by the click arrived
+            settle = self.logs.times[len(self.logs) - 1] - click_start if len(self.logs) > log_count else 0.0
+            self.latency['click_settle_ms'].append(round(settle * 1000))
+
+    async def _click_all(self, page, button_ids):
+        """Clicks every button in quick succession, then waits for the network once."""
+        def mark_click(button_id):
+            # Marked just before dispatch, so requests sent synchronously by the click handler count too
+            self._click_starts.append(LogTable.now())
+            self._click_buttons.append(button_id)
+
+        self._status(f"Clicking {len(button_ids)} button(s)...")
+        for button_id in button_ids:
+            click_start = LogTable.now()
+            marked_logs = len(self.log_buttons)
+            clicked = await self.click_button_by_id(
+                page, button_id, timeout=self.timeouts['click_timeout_ms'], before_click=lambda: mark_click(button_id)
+            )
+            if not clicked and self._click_buttons and self._click_buttons[-1] == button_id:
+                # The click failed after it was marked: drop its window and give its requests back to the previous click
+                self._click_starts.pop()
+                self._click_buttons.pop()
+                previous_button = self._click_buttons[-1] if self._click_buttons else ""
+                for index in range(marked_logs, len(self.log_buttons)):
+                    if self.log_buttons[index] == button_id:
+                        self.log_buttons[index] = previous_button
+            if clicked:
+                self.latency['click_ms'].append(round((LogTable.now() - click_start) * 1000))
+                await asyncio.sleep(self.BATCH_CLICK_GAP)
+        await self.wait_for_network_idle(self.timeouts['click_idle_seconds'])
+
+        # Settled when the last request attributed to each click arrived
+        last_log_times = {}
+        for index, button_id in enumerate(self.log_buttons):
+            if button_id:
+                last_log_times[button_id] = self.logs.times[index]
+        for click_start, button_id in zip(self._click_starts, self._click_buttons):
+            settle = last_log_times.get(button_id, click_start) - click_start
+            self.latency['click_settle_ms'].append(round(max(0.0, settle) * 1000))
+
+    async def capture_panel(self, page, output_path, keyword_text, status, matched_logs):
+        """Default capture: viewport (or tiled full-page) screenshot stitched to a rendered log panel."""
+        if self.renderer is None:
+            self.renderer = LogPanelRenderer()
+        if self.page_capture:
+            # The tiles are stitched straight into the final image, next to the panel
+            stitched_image = await TiledPageCapture(**self.page_capture).capture(page, left_margin=self.renderer.width)
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.renderer.render(keyword_text, status, matched_logs, into=stitched_image)
+            )
+            return self.encoder.submit(stitched_image, output_path)
+
+        await page.evaluate("window.scrollTo(0, 0)")
+        await asyncio.sleep(0.1)
+        browser_png = await page.screenshot()
+
+        def stitch():
+            from PIL import Image
+            with Image.open(io.BytesIO(browser_png)) as browser_img:
+                panel_img = self.renderer.render(keyword_text, status, matched_logs, height=browser_img.height)
+                stitched_image = Image.new('RGB', (panel_img.width + browser_img.width, max(panel_img.height, browser_img.height)), (255, 255, 255))
+                stitched_image.paste(panel_img, (0, 0))
+                stitched_image.paste(browser_img, (panel_img.width, 0))
+                return stitched_image
+
+        stitched_image = await asyncio.get_running_loop().run_in_executor(None, stitch)
+        return self.encoder.submit(stitched_image, output_path)
+
+    async def _track_save(self, save, report_row):
+        """Lets a capture encode in the background, waiting only if too many are queued."""
+        self._pending_saves.append((save, report_row))
+        while True:
+            encoding = [pending for pending, _ in self._pending_saves if not pending.done()]
+            if len(encoding) <= self.encoder.MAX_PENDING:
+                return
+            await asyncio.wait(encoding, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _finish_saves(self):
+        """Waits for the captures still being encoded, points their rows at the written files and adds their sizes to `self.encoding`."""
+        pending_saves, self._pending_saves = self._pending_saves, []
+        if pending_saves:
+            await asyncio.wait([save for save, _ in pending_saves])
+        for save, report_row in pending_saves:
+            try:
+                written, baseline, path = save.result()
+            except Exception as e:
+                print(f"Capture Error: {e}")
+                self._flag_failed_capture(report_row, e)
+                continue
+            report_row['screenshot_path'] = str(path)
+            ScreenshotEncoder.add_stats(self.encoding, written, baseline)
+
+    @staticmethod
+    def _flag_failed_capture(report_row, error):
+        report_row['screenshot_path'] = ''
+        report_row['error'] = f"Screenshot not saved: {error}"
+
+    async def _start_trace(self, context):
+        """Starts a lightweight trace (screenshots and network, no DOM snapshots) for this page."""
+        started = time.perf_counter()
+        try:
+            await context.tracing.start(screenshots=True, snapshots=False)
+            self.trace = {'path': None, 'bytes': 0, 'seconds': time.perf_counter() - started}
+        except Exception as e:
+            print(f"Trace error: {e}")
+
+    async def _finish_trace(self, context, keep):
+        """Stops tracing; the trace is written to disk only if `keep`, and linked from the failing rows."""
+        if self.trace is None:
+            return
+        started = time.perf_counter()
+        try:
+            if keep:
+                self.trace_dir.mkdir(parents=True, exist_ok=True)
+                sanitized_url = self.url_obj['url'].split('//')[-1].split('/')[0].replace('.', '_')
+                trace_path = self.trace_dir / f"trace_{sanitized_url}_{datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+                await context.tracing.stop(path=str(trace_path))
+                self.trace['path'] = str(trace_path)
+                self.trace['bytes'] = os.path.getsize(trace_path)
+                for row in self.report_rows:
+                    if row['status'] in self.TRACE_STATUSES:
+                        row['trace_path'] = str(trace_path)
+            else:
+                await context.tracing.stop() # Discards the trace
+        except Exception as e:
+            print(f"Trace error: {e}")
+        self.trace['seconds'] += time.perf_counter() - started
+
+    def _capture_path(self, keyword_text):
+        url_str = self.url_obj['url']
+        sanitized_url = url_str.split('//')[-1].split('/')[0].replace('.', '_')
+        sanitized_keyword = keyword_text.replace(' ', '_').replace('/', '_')
+        filename = f"capture_{sanitized_url}_{sanitized_keyword}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{self.encoder.extension}"
+        return self.captures_dir / filename
+
+    async def run(self, playwright):
+        """Tests the URL with its own browser and returns the result dict."""
+        url_str = self.url_obj['url']
+        run_start = LogTable.now()
+        user_data_dir = tempfile.mkdtemp()
+        try:
+            # 1. Launch Browser
+            self._status(f"Launching browser for {url_str}...")
+            launch_options = {
+                "headless": self.headless,
+                "args": ['--incognito'] if self.incognito else [],
+            }
+            if sys.platform == "darwin" and os.path.exists(self.CHROME_PATH): # macOS
+                launch_options["executable_path"] = self.CHROME_PATH
+
+            context = await playwright.chromium.launch_persistent_context(user_data_dir, **launch_options)
+            completed = False
+            try:
+                if self.trace_dir:
+                    await self._start_trace(context)
+                page = context.pages[0] if context.pages else await context.new_page()
+                page.on("request", self._handle_request)
+                page.on("requestfinished", self._handle_request_done)
+                page.on("requestfailed", self._handle_request_done)
+                if self.on_page:
+                    self.on_page(context, page)
+
+                self.navigation_start = LogTable.now()
+                await page.goto(url_str, wait_until="domcontentloaded", timeout=self.timeouts['navigation_timeout_ms'])
+                self.latency['navigation_ms'] = round((LogTable.now() - self.navigation_start) * 1000)
+
+                # 2. Wait for initial page load to settle, at least until tags usually finish on this URL
+                await self.wait_for_network_idle(
+                    self.timeouts['idle_seconds'],
+                    settle_until=self.navigation_start + self.timeouts['settle_seconds']
+                )
+
+                # 3. Screenshot per relevant keyword, clicking its button first if it has one
+                clicked_button_ids_on_page = set()
+                if self.batch_clicks:
+                    button_ids = list(dict.fromkeys(kw['button_id'] for kw in self.keywords if kw.get('button_id')))
+                    if button_ids:
+                        await self._click_all(page, button_ids)
+                    clicked_button_ids_on_page.update(button_ids)
+                num_keywords = len(self.keywords)
+                for i, keyword_obj in enumerate(self.keywords):
+                    keyword_text = keyword_obj['text']
+                    button_id = keyword_obj.get('button_id', '')
+
+                    self._status(f"Processing keyword {i+1}/{num_keywords}: '{keyword_text}'...")
+                    if button_id and button_id not in clicked_button_ids_on_page:
+                        await self._click_and_settle(page, button_id)
+                        clicked_button_ids_on_page.add(button_id)
+
+                    self._status(f"Capturing keyword {i+1}/{num_keywords}: '{keyword_text}' for URL lang '{self.url_obj['lang']}'...")
+                    if self.before_capture:
+                        await self.before_capture(keyword_text)
+
+                    matched_logs = self.matched_logs(keyword_text, button_id)
+                    status = keyword_status(matched_logs)
+                    output_path = self._capture_path(keyword_text)
+                    capture = self.capture or self.capture_panel
+                    report_row = {
+                        'keyword': keyword_text,
+                        'lang': keyword_obj['lang'],
+                        'url': url_str,
+                        'status': status or 'N/A',
+                        'screenshot_path': str(output_path)
+                    }
+                    self.report_rows.append(report_row)
+                    try:
+                        pending_save = await capture(page, output_path, keyword_text, status, matched_logs)
+                        if pending_save is not None:
+                            await self._track_save(pending_save, report_row)
+                    except Exception as e:
+                        print(f"Capture Error: {e}")
+                        self._flag_failed_capture(report_row, e)
+
+                await self._finish_saves()
+
+                # 4. Close browser
+                self._status(f"Finished with {url_str}. Closing browser.")
+                completed = True
+            finally:
+                keep_trace = not completed or any(row['status'] in self.TRACE_STATUSES for row in self.report_rows)
+                await self._finish_trace(context, keep_trace)
+                await context.close()
+                if self.on_page:
+                    self.on_page(None, None)
+        finally:
+            if os.path.exists(user_data_dir):
+                try:
+                    shutil.rmtree(user_data_dir)
+                except Exception as e:
+                    print(f"Failed to clean up temp dir: {e}")
+
+        self.latency['url_ms'] = round((LogTable.now() - run_start) * 1000)
+        return self.result()
+
+    def result(self):
+        tag_indices = sorted({index for kw in self.keywords for index in self.logs.match(kw['text'])})
+        tag_ends = [
+            self.logs.offsets[i] + self.logs.durations[i] for i in tag_indices
+            if self.logs.offsets[i] >= 0 and self.logs.durations[i] >= 0
+        ]
+        self.latency['last_tag_ms'] = round(max(tag_ends)) if tag_ends else None
+        return {
+            'url': self.url_obj['url'],
+            'lang': self.url_obj['lang'],
+            'num': self.url_obj.get('num', 1),
+            'logs': self.logs,
+            'statuses': {row['keyword']: row['status'] for row in self.report_rows},
+            'report_rows': self.report_rows,
+            'performance': {'url': self.url_obj['url'], 'lang': self.url_obj['lang'], **self.logs.tag_performance(tag_indices)},
+            'latency': self.latency,
+            'trace': self.trace,
+            'encoding': self.encoding,
+        }
+
+
+def _fast_test_worker(slot, task_queue, result_queue, settings):
+    """Entry point of a Fast Test worker process. Tests one URL per task from `task_queue`."""
+    async def worker_main():
+        from playwright.async_api import async_playwright
+        loop = asyncio.get_running_loop()
+        async with async_playwright() as p:
+            while True:
+                task = await loop.run_in_executor(None, task_queue.get)
+                if task is None:
+                    break
+                task_index, url_obj = task
+                runner = UrlTestRunner(
+                    url_obj,
+                    None,
+                    settings['captures_dir'],
+                    keywords=settings['keyword_groups'].get(RunPlan.group_key(url_obj), []),
+                    incognito=settings['incognito'],
+                    headless=settings['headless'],
+                    timeouts=settings['timeouts'].get(url_obj['url']),
+                    trace_dir=settings['trace_dir'],
+                    page_capture=settings['page_capture'],
+                    encoder=ScreenshotEncoder(*settings['encoding']),
+                    batch_clicks=settings['batch_clicks'],
+                    on_status=lambda message: result_queue.put(('status', slot, task_index, message)),
+                )
+                try:
+                    result = await runner.run(p)
+                    result_queue.put(('done', slot, task_index, result))
+                except Exception as e:
+                    traceback.print_exc()
+                    result_queue.put(('error', slot, task_index, {'error': f"{type(e).__name__}: {e}", 'trace': runner.trace}))
+
+    asyncio.run(worker_main())
+
+
+class FastTestCoordinator:
+    """Shards a Fast Test across local worker processes, each with its own browser.
+
+    URLs are handed to idle workers one at a time through per-worker queues, so
+    the coordinator always knows which URL a worker holds. Failed URLs are
+    retried at the end of the queue according to the RetryPolicy; if a worker
+    process dies, it is replaced and its URL is retried on a different worker.
+    `run` returns per-URL results in the original order; after `cancel`, only
+    those of the URLs finished so far.
+    """
+
+    def __init__(self, url_objects, keyword_objects, captures_dir, worker_count=2, incognito=True,
+                 headless=False, timeouts=None, trace_dir=None, page_capture=None, encoder=None, batch_clicks=False, retry_policy=None,
+                 metrics=None, on_status=None, on_result=None):
+        self.url_objects = list(url_objects)
+        self.worker_count = max(1, min(worker_count, len(self.url_objects)))
+        self.settings = {
+            'keyword_groups': RunPlan.group_keywords(keyword_objects), # (lang, num) -> keywords
+            'captures_dir': str(captures_dir),
+            'incognito': incognito,
+            'headless': headless,
+            'timeouts': timeouts or {}, # url -> LatencyHistory.timeouts_for(url)
+            'trace_dir': str(trace_dir) if trace_dir else None,
+            'page_capture': page_capture,
+            'encoding': (encoder.format_name, encoder.quality) if encoder else ("PNG", ScreenshotEncoder.DEFAULT_QUALITY),
+            'batch_clicks': batch_clicks,
+        }
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=2)
+        self.metrics = metrics
+        self.on_status = on_status
+        self.on_result = on_result
+        self.failed_urls = []
+        self._cancelled = threading.Event()
+
+        self._context = multiprocessing.get_context("spawn")
+        self._result_queue = self._context.Queue()
+        self._workers = {} # slot -> (process, task_queue)
+
+    def _status(self, message):
+        if self.on_status:
+            self.on_status(message)
+
+    def cancel(self):
+        """Makes `run` stop waiting for URLs and shut the workers down. Thread-safe."""
+        self._cancelled.set()
+
+    def _start_worker(self, slot):
+        task_queue = self._context.Queue()
+        process = self._context.Process(
+            target=_fast_test_worker,
+            args=(slot, task_queue, self._result_queue, self.settings),
+            daemon=True
+        )
+        process.start()
+        self._workers[slot] = (process, task_queue)
+
+    def _finish_task(self, results, task_index, result):
+        results[task_index] = result
+        if result.get('error'):
+            self.failed_urls.append(result['url'])
+        if self.on_result:
+            self.on_result(task_index, result)
+        self._status(f"Fast Test: {len(results)}/{len(self.url_objects)} URLs done")
+
+    def _fail_or_retry(self, task_index, error, attempt, pending, not_before, results, retired_traces, trace=None):
+        """Requeues a failed URL at the end of the queue with backoff, or records it as failed."""
+        url_obj = self.url_objects[task_index]
+        if self.retry_policy.should_retry(error, attempt):
+            delay = self.retry_policy.delay(attempt)
+            print(f"URL {url_obj['url']} failed ({error}); retrying in {delay:.0f}s")
+            retired_traces[task_index] = combine_traces(retired_traces.get(task_index), trace, keep=False)
+            not_before[task_index] = time.monotonic() + delay
+            pending.append(task_index)
+            return True
+        print(f"URL {url_obj['url']} failed after {attempt} attempt(s): {error}")
+        trace = combine_traces(retired_traces.pop(task_index, None), trace)
+        self._finish_task(results, task_index, failed_url_result(
+            url_obj, None, error, attempt, trace, keywords=self.settings['keyword_groups'].get(RunPlan.group_key(url_obj), [])
+        ))
+        return False
+
+    def run(self):
+        total = len(self.url_objects)
+        pending = deque(range(total))
+        attempts = Counter()
+        not_before = {} # task index -> monotonic time before which a retry must not start
+        retired_traces = {} # task index -> trace stats of attempts that were retried
+        avoid_slot = {} # task index -> slot whose process crashed on it
+        in_flight = {} # slot -> task index
+        results = {}
+        next_slot = self.worker_count
+
+        for slot in range(self.worker_count):
+            self._start_worker(slot)
+
+        try:
+            while len(results) < total and not self._cancelled.is_set():
+                # --- Hand out work to idle workers ---
+                idle_slots = [slot for slot in self._workers if slot not in in_flight]
+                now = time.monotonic()
+                for slot in idle_slots:
+                    if not pending:
+                        break
+                    task_index = next((
+                        t for t in pending
+                        if not_before.get(t, 0.0) <= now and (avoid_slot.get(t) != slot or len(self._workers) == 1)
+                    ), None)
+                    if task_index is None:
+                        continue
+                    pending.remove(task_index)
+                    attempts[task_index] += 1
+                    in_flight[slot] = task_index
+                    self._workers[slot][1].put((task_index, self.url_objects[task_index]))
+                if self.metrics:
+                    self.metrics.set_load(queue_depth=len(pending), browsers=len(in_flight))
+
+                # --- Collect messages ---
+                try:
+                    kind, slot, task_index, payload = self._result_queue.get(timeout=0.5)
+                except queue.Empty:
+                    kind = None
+
+                if kind == 'status':
+                    self._status(f"[Worker {slot + 1}] URL {task_index + 1}/{total}: {payload}")
+                elif kind == 'done':
+                    in_flight.pop(slot, None)
+                    payload['trace'] = combine_traces(retired_traces.pop(task_index, None), payload['trace'])
+                    self._finish_task(results, task_index, mark_attempts(payload, attempts[task_index]))
+                elif kind == 'error':
+                    in_flight.pop(slot, None)
+                    self._fail_or_retry(
+                        task_index, payload['error'], attempts[task_index], pending, not_before, results, retired_traces, payload['trace']
+                    )
+
+                # --- Replace crashed workers and retry their URL elsewhere ---
+                for slot, (process, _) in list(self._workers.items()):
+                    if process.is_alive():
+                        continue
+                    del self._workers[slot]
+                    crashed_task = in_flight.pop(slot, None)
+                    if crashed_task is not None:
+                        print(f"Worker {slot + 1} crashed on {self.url_objects[crashed_task]['url']}")
+                        if self._fail_or_retry(crashed_task, "Worker process crashed", attempts[crashed_task], pending, not_before, results,
+                                               retired_traces):
+                            avoid_slot[crashed_task] = next_slot # Retry on another worker, not the replacement
+                    if pending:
+                        self._start_worker(next_slot)
+                        next_slot += 1
+        finally:
+            for process, task_queue in self._workers.values():
+                task_queue.put(None)
+            for process, _ in self._workers.values():
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+
+        return [results[i] for i in range(total) if i in results]
+
+
+class ScreenshotEncoder:
+    """Encodes captures in the configured format on a small background thread pool.
+
+    Callers hand over the stitched PIL image and carry on while it is
+    compressed. Bytes saved are measured against Pillow's default PNG on a
+    sample of the captures (the first and every BASELINE_EVERY-th), so the
+    extra PNG encode is not paid for every capture. WebP cannot hold images
+    larger than WEBP_MAX_SIZE pixels on a side (long full-page captures), so
+    those are written as PNG next to the requested path instead.
+    """
+
+    FORMATS = {
+        # name -> (file extension, Pillow format, save options, uses quality)
+        "PNG": ("png", "PNG", {}, False),
+        "PNG (optimized)": ("png", "PNG", {'optimize': True}, False),
+        "WebP (lossless)": ("webp", "WEBP", {'lossless': True, 'method': 4}, False),
+        "WebP": ("webp", "WEBP", {'method': 4}, True),
+        "JPEG": ("jpg", "JPEG", {'optimize': True}, True),
+    }
+    DEFAULT_QUALITY = 85
+    BASELINE_EVERY = 20
+    MAX_PENDING = 4 # Captures a caller may have waiting for the encoder before it waits too
+    WEBP_MAX_SIZE = 16383
+    _executor = None
+    _executor_lock = threading.Lock()
+
+    def __init__(self, format_name="PNG", quality=DEFAULT_QUALITY):
+        self.format_name = format_name if format_name in self.FORMATS else "PNG"
+        self.quality = max(1, min(100, int(quality)))
+        self.extension, self.pil_format, options, uses_quality = self.FORMATS[self.format_name]
+        self.options = dict(options, quality=self.quality) if uses_quality else dict(options)
+        self._saved_count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_stats():
+        """Per-run (or per-URL) counters filled by `add_stats`."""
+        return {'count': 0, 'bytes': 0, 'sampled_bytes': 0, 'baseline_bytes': 0}
+
+    @staticmethod
+    def add_stats(stats, written, baseline):
+        stats['count'] += 1
+        stats['bytes'] += written
+        if baseline is not None:
+            stats['sampled_bytes'] += written
+            stats['baseline_bytes'] += baseline
+
+    @staticmethod
+    def estimated_savings(stats):
+        """Bytes saved versus default PNG, extrapolated from the sampled captures."""
+        if not stats['sampled_bytes']:
+            return 0
+        return round(stats['bytes'] * stats['baseline_bytes'] / stats['sampled_bytes']) - stats['bytes']
+
+    def save(self, image, path):
+        """Encodes `image` to `path`.
+
+        Returns (bytes written, default PNG bytes or None if not sampled, path
+        written), the path ending in .png when the image was too large for WebP.
+        """
+        pil_format, options = self.pil_format, self.options
+        if pil_format == "WEBP" and max(image.size) > self.WEBP_MAX_SIZE:
+            print(f"{image.width}x{image.height} capture is too large for WebP; saving it as PNG")
+            path, pil_format, options = Path(path).with_suffix(".png"), "PNG", {}
+        if pil_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(path, format=pil_format, **options)
+        written = os.path.getsize(path)
+        if pil_format == "PNG" and not options:
+            return written, written, path
+        with self._lock:
+            sampled = self._saved_count % self.BASELINE_EVERY == 0
+            self._saved_count += 1
+        if not sampled:
+            return written, None, path
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return written, buffer.tell(), path
+
+    def submit(self, image, path):
+        """Encodes in the background. Returns an asyncio future of `save`'s result."""
+        with ScreenshotEncoder._executor_lock:
+            if ScreenshotEncoder._executor is None:
+                ScreenshotEncoder._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="encoder")
+        return asyncio.get_running_loop().run_in_executor(ScreenshotEncoder._executor, self.save, image, path)
+
+
+class TiledPageCapture:
+    """Full-page screenshot taken one viewport at a time and stitched as the tiles arrive.
+
+    `full_page=True` makes Chromium render the whole page into one bitmap,
+    which peaks at several GB on 30k px campaign pages. Here the page is
+    scrolled a viewport at a time and each tile is decoded, cropped,
+    optionally downscaled and pasted into the output before the next one is
+    decoded. The output is the final stitched capture: `left_margin` pixels
+    are left free for the log panel, which callers draw straight into it, so
+    memory stays at a tile or two plus that one image. `max_height` (CSS px;
+    the rest of the page is cut off) and `scale` bound its size; with a
+    max_height of 0 it grows with the page.
+    Fixed and sticky elements are hidden after the first tile so that
+    headers and cookie bars are not repeated down the page.
+    """
+
+    DEFAULT_MAX_HEIGHT = 20000
+    SCALES = {"100%": 1.0, "75%": 0.75, "50%": 0.5, "25%": 0.25}
+    SCROLL_SETTLE_SECONDS = 0.15 # Lets lazy-loaded images and scroll handlers catch up
+    PAGE_METRICS_JS = """() => ({
+        height: Math.max(document.documentElement.scrollHeight, document.body ? document.body.scrollHeight : 0),
+        viewport: window.innerHeight,
+        dpr: window.devicePixelRatio
+    })"""
+    HIDE_FIXED_JS = """() => {
+        window.__tagQaHidden = [];
+        for (const el of document.querySelectorAll('body *')) {
+            const position = getComputedStyle(el).position;
+            if (position === 'fixed' || position === 'sticky') {
+                window.__tagQaHidden.push([el, el.style.visibility]);
+                el.style.visibility = 'hidden';
+            }
+        }
+    }"""
+    RESTORE_FIXED_JS = """() => {
+        for (const [el, visibility] of window.__tagQaHidden || []) el.style.visibility = visibility;
+        delete window.__tagQaHidden;
+    }"""
+
+    def __init__(self, max_height=DEFAULT_MAX_HEIGHT, scale=1.0):
+        self.max_height = max_height or None # None or 0 captures the whole page
+        self.scale = scale
+        self.truncated = False # Set when max_height cut the page off
+        self._canvas = None
+        self._left_margin = 0
+        self._min_height = 0
+
+    async def capture(self, page, left_margin=0, min_height=0):
+        """Returns the page as an RGB PIL image, scrolled back to the top afterwards.
+
+        The page is placed `left_margin` px from the left of a white image at
+        least `min_height` px high.
+        """
+        loop = asyncio.get_running_loop()
+        self._left_margin, self._min_height = left_margin, min_height
+        metrics = await page.evaluate(self.PAGE_METRICS_JS)
+        viewport = max(1, metrics['viewport'])
+        dpr = metrics['dpr'] or 1
+        page_height = max(1, metrics['height'])
+        target_height = min(page_height, self.max_height) if self.max_height else page_height
+        self.truncated = target_height < page_height
+        self._canvas = None
+
+        pending_paste = None
+        hid_fixed = False
+        try:
+            for top in range(0, target_height, viewport):
+                await page.evaluate("y => window.scrollTo(0, y)", top)
+                await asyncio.sleep(self.SCROLL_SETTLE_SECONDS)
+                scroll_y = await page.evaluate("() => window.scrollY") # Clamped at the bottom of the page
+                tile_png = await page.screenshot()
+                if pending_paste is not None:
+                    await pending_paste # At most one tile is decoded while the next is captured
+                pending_paste = loop.run_in_executor(
+                    None, self._paste_tile, tile_png, top, min(top + viewport, target_height), scroll_y, dpr, target_height
+                )
+                if not hid_fixed:
+                    await page.evaluate(self.HIDE_FIXED_JS)
+                    hid_fixed = True
+            await pending_paste
+        finally:
+            try:
+                if hid_fixed:
+                    await page.evaluate(self.RESTORE_FIXED_JS)
+                await page.evaluate("window.scrollTo(0, 0)")
+            except Exception as e:
+                print(f"Could not restore page after capture: {e}")
+
+        canvas, self._canvas = self._canvas, None
+        return canvas
+
+    def _paste_tile(self, tile_png, top, bottom, scroll_y, dpr, target_height):
+        """Pastes page rows [top, bottom) (CSS px) from a viewport tile scrolled to `scroll_y`."""
+        from PIL import Image
+        with Image.open(io.BytesIO(tile_png)) as tile:
+            crop_box = (0, round((top - scroll_y) * dpr), tile.width, min(tile.height, round((bottom - scroll_y) * dpr)))
+            part = tile.convert('RGB').crop(crop_box)
+        if self.scale != 1.0:
+            part = part.resize((max(1, round(part.width * self.scale)), max(1, round(part.height * self.scale))), Image.BILINEAR)
+        if self._canvas is None:
+            height = max(1, round(target_height * dpr * self.scale), self._min_height)
+            self._canvas = Image.new('RGB', (self._left_margin + part.width, height), (255, 255, 255))
+        self._canvas.paste(part, (self._left_margin, round(top * dpr * self.scale)))
+
+
+class LogPanelRenderer:
+    """Draws the keyword/status header and the filtered log rows into a PIL image.
+
+    This is an off-screen replacement for grabbing the Tk window: it needs no
+    display, no screen-recording permission and gives the same pixels for the
+    same input.
+    """
+
+    # Same columns as the log Treeview, with widths in pixels
+    COLUMNS = (
+        ("Name", 260), ("Status", 60), ("Method", 60), ("Type", 90),
+        ("Size", 70), ("Time", 150), ("URL Hash", 90), ("Duration", 70), ("Offset", 70),
+    )
+    PADDING = 8
+    ROW_HEIGHT = 22
+    HEADER_HEIGHT = 64
+
+    BACKGROUND = (255, 255, 255)
+    HEADER_BACKGROUND = (236, 236, 236)
+    GRID = (210, 210, 210)
+    TEXT = (20, 20, 20)
+    MUTED = (110, 110, 110)
+    STATUS_COLORS = {
+        "PASS": (22, 128, 61),
+        "FAILED": (200, 30, 30),
+    }
+
+    # Fonts with CJK coverage, tried in order before falling back to PIL's default
+    FONT_CANDIDATES = (
+        "/System/Library/Fonts/PingFang.ttc",
+        "/System/Library/Fonts/STHeiti Light.ttc",
+        "C:/Windows/Fonts/msyh.ttc",
+        "C:/Windows/Fonts/simsun.ttc",
+        "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    )
+
+    def __init__(self, font_size=13):
+        self.font = self._load_font(font_size)
+        self.title_font = self._load_font(font_size + 3)
+        self.width = sum(width for _, width in self.COLUMNS) + 2 * self.PADDING
+        self._fit_cache = {} # (text, max_width, font id) -> truncated text
+
+    def _load_font(self, size):
+        from PIL import ImageFont
+        for font_path in self.FONT_CANDIDATES:
+            if os.path.exists(font_path):
+                try:
+                    return ImageFont.truetype(font_path, size)
+                except OSError:
+                    continue
+        return ImageFont.load_default()
+
+    def _fit_text(self, text, max_width, font):
+        """Truncates text so it fits into max_width pixels."""
+        text = str(text)
+        cache_key = (text, max_width, id(font))
+        cached = self._fit_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        if len(self._fit_cache) > 5000:
+            self._fit_cache.clear()
+
+        if font.getlength(text) <= max_width:
+            self._fit_cache[cache_key] = text
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if font.getlength(text[:mid] + "..") <= max_width:
+                low = mid
+            else:
+                high = mid - 1
+        fitted = text[:low] + ".."
+        self._fit_cache[cache_key] = fitted
+        return fitted
+
+    def render(self, keyword, status, rows, height=None, into=None):
+        """Returns an RGB image of the log panel. `rows` are log value tuples.
+
+        With `into`, the panel is drawn onto the left `self.width` px of that
+        image (of `height`, by default its own) instead of a new one.
+        """
+        rows = list(rows)
+        if height is None:
+            height = into.height if into is not None else self.HEADER_HEIGHT + self.ROW_HEIGHT * (len(rows) + 2)
+
+        from PIL import Image, ImageDraw
+        if into is None:
+            image = Image.new("RGB", (self.width, height), self.BACKGROUND)
+        else:
+            image = into
+        draw = ImageDraw.Draw(image)
+        right = self.width - 1
+        if into is not None:
+            draw.rectangle((0, 0, right, height - 1), fill=self.BACKGROUND)
+
+        # --- Keyword & Status Header --- #
+        draw.rectangle((0, 0, right, self.HEADER_HEIGHT), fill=self.HEADER_BACKGROUND)
+        title = f"Keyword: {keyword}" if keyword else "All Logs"
+        draw.text((self.PADDING, self.PADDING), self._fit_text(title, self.width - 2 * self.PADDING, self.title_font),
+                  fill=self.TEXT, font=self.title_font)
+        status_text = status or "N/A"
+        draw.text((self.PADDING, self.PADDING + 26), f"Status: {status_text}   Matches: {len(rows)}",
+                  fill=self.STATUS_COLORS.get(status_text, self.MUTED), font=self.font)
+
+        # --- Column Headings --- #
+        y = self.HEADER_HEIGHT
+        x = self.PADDING
+        for title, width in self.COLUMNS:
+            draw.text((x + 2, y + 4), title, fill=self.TEXT, font=self.font)
+            x += width
+        y += self.ROW_HEIGHT
+        draw.line((0, y - 1, right, y - 1), fill=self.GRID)
+
+        # --- Rows --- #
+        max_rows = max(0, (height - y) // self.ROW_HEIGHT)
+        visible_rows = rows if len(rows) <= max_rows else rows[:max(0, max_rows - 1)]
+        for values in visible_rows:
+            x = self.PADDING
+            row_color = self.TEXT
+            try:
+                if int(values[1]) >= 400:
+                    row_color = self.STATUS_COLORS["FAILED"]
+            except (ValueError, TypeError, IndexError):
+                pass
+            for (_, width), value in zip(self.COLUMNS, values):
+                draw.text((x + 2, y + 4), self._fit_text(value, width - 6, self.font), fill=row_color, font=self.font)
+                x += width
+            y += self.ROW_HEIGHT
+            draw.line((0, y - 1, right, y - 1), fill=self.GRID)
+
+        if len(visible_rows) < len(rows):
+            draw.text((self.PADDING, y + 4), f"... {len(rows) - len(visible_rows)} more rows",
+                      fill=self.MUTED, font=self.font)
+
+        return image
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Fast Test workers in the packaged app
     root = tk.Tk()
     app = TaggingAutomationApp(root)
     root.mainloop()
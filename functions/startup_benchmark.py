@@ -0,0 +1,50 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Startup benchmark: launches Tag_QA_ProMax.py several times and reports
+# time-to-first-window and time-to-first-navigation.
+#
+# Usage: python functions/startup_benchmark.py [runs] [cold|warm]
+#   cold - open the first URL as soon as the window is shown
+#   warm - open it once the background pre-warm has finished
+#
+# Needs a display. Each run opens the first URL in the URL box and quits.
+# "wall" includes interpreter startup; "in-app" is measured from module import.
+
+APP = Path(__file__).resolve().parent.parent / "Tag_QA_ProMax.py"
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+MODE = sys.argv[2] if len(sys.argv) > 2 else "cold"
+MARKS = ["first_window", "prewarmed", "first_navigation"]
+
+results = {mark: {'wall': [], 'in-app': []} for mark in MARKS}
+
+for run in range(RUNS):
+    env = dict(os.environ, TAG_QA_STARTUP_BENCHMARK=MODE)
+    started = time.time()
+    process = subprocess.Popen([sys.executable, str(APP)], env=env, stdout=subprocess.PIPE, text=True)
+    try:
+        for line in process.stdout:
+            if not line.startswith('{"startup_mark"'):
+                continue
+            mark = json.loads(line)
+            results[mark['startup_mark']]['wall'].append(mark['epoch'] - started)
+            results[mark['startup_mark']]['in-app'].append(mark['seconds'])
+        process.wait(timeout=120)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        print(f"Run {run + 1} timed out")
+    print(f"Run {run + 1}/{RUNS} done")
+
+print(f"\nStartup benchmark ({MODE}, {RUNS} runs), seconds")
+print(f"{'milestone':<18}{'wall median':>12}{'wall min':>10}{'in-app median':>15}")
+for mark in MARKS:
+    wall, in_app = results[mark]['wall'], results[mark]['in-app']
+    if not wall:
+        print(f"{mark:<18}{'-':>12}{'-':>10}{'-':>15}")
+        continue
+    print(f"{mark:<18}{statistics.median(wall):>12.3f}{min(wall):>10.3f}{statistics.median(in_app):>15.3f}")